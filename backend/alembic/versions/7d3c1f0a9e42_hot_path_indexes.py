@@ -0,0 +1,92 @@
+"""Hot-path composite and partial indexes
+
+Revision ID: 7d3c1f0a9e42
+Revises: cbebb90bb7b7
+Create Date: 2026-10-19 10:12:44.318205
+
+Built with CREATE INDEX CONCURRENTLY so bill writes are not blocked while
+the indexes build. That cannot run inside a transaction, hence the
+autocommit block. If a concurrent build fails it leaves an INVALID index
+behind; drop it and re-run the upgrade.
+
+Use scripts/explain_hot_paths.py before and after upgrading to compare
+plans on a realistic dataset. Plans for 300k bills / 3M shares are kept in
+benchmarks/baselines/explain_hot_paths_{before,after}.txt (execution time,
+PostgreSQL 16, warm cache):
+
+    group bills, newest first     13.9 ms -> 0.09 ms  (top-N index scan, no sort)
+    unpaid shares of a group       827 ms -> 150 ms   (no seq scan of BillShare)
+    total owed                     3.0 ms -> 2.3 ms
+    user's groups / members      ~0.1 ms, unchanged  (index-only scan now)
+    total owe                  43-150 ms -> ~90 ms;  43 ms -> 12.5 ms with
+                                 random_page_cost = 1.1, which SSD-backed
+                                 servers should run with: at the default of
+                                 4 the planner prefers a hash join over Bill
+
+app/tests/test_hot_path_indexes.py checks each query can use its index.
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3c1f0a9e42'
+down_revision: str | Sequence[str] | None = 'cbebb90bb7b7'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Group bill listing: WHERE group_id = ? AND deleted_at IS NULL ORDER BY created_at DESC
+        op.create_index(
+            'ix_Bill_group_active_created', 'Bill', ['group_id', sa.text('created_at DESC')],
+            unique=False, postgresql_where=sa.text('deleted_at IS NULL'),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # "Owed" totals and user bill listing: WHERE paid_by = ? [AND group_id = ?]
+        op.create_index(
+            'ix_Bill_paid_by_group_active', 'Bill', ['paid_by', 'group_id'],
+            unique=False, postgresql_where=sa.text('deleted_at IS NULL'),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # "Owe" totals: WHERE user_id = ? AND paid = false, joined to Bill
+        op.create_index(
+            'ix_BillShare_user_unpaid', 'BillShare', ['user_id', 'bill_id'],
+            unique=False, postgresql_include=['amount'], postgresql_where=sa.text('paid = false'),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # Group balances and simplified debts: unpaid shares of a group's bills
+        op.create_index(
+            'ix_BillShare_bill_unpaid', 'BillShare', ['bill_id'],
+            unique=False, postgresql_include=['user_id', 'amount'],
+            postgresql_where=sa.text('paid = false'),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # A user's active groups (membership checks, group listing, membership cache)
+        op.create_index(
+            'ix_GroupMember_user_active', 'GroupMember', ['user_id', 'group_id'],
+            unique=False, postgresql_where=sa.text('deleted_at IS NULL'),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # A group's active members in join order (dashboard documents, friends)
+        op.create_index(
+            'ix_GroupMember_group_active', 'GroupMember', ['group_id', 'created_at'],
+            unique=False, postgresql_where=sa.text('deleted_at IS NULL'),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, name in [
+            ('GroupMember', 'ix_GroupMember_group_active'),
+            ('GroupMember', 'ix_GroupMember_user_active'),
+            ('BillShare', 'ix_BillShare_bill_unpaid'),
+            ('BillShare', 'ix_BillShare_user_unpaid'),
+            ('Bill', 'ix_Bill_paid_by_group_active'),
+            ('Bill', 'ix_Bill_group_active_created'),
+        ]:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
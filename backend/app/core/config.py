@@ -1,8 +1,20 @@
 from datetime import timedelta
 
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
+_RATE_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """Parse "10/minute" (or "10/60") into (requests, period_seconds)."""
+    count, _, period = rate.partition("/")
+    period = period.strip().lower()
+    seconds = _RATE_PERIODS.get(period.rstrip("s")) or int(period)
+    if int(count) <= 0 or seconds <= 0:
+        raise ValueError(f"rate {rate!r} needs a positive count and period")
+    return int(count), seconds
+
 
 class Settings(BaseSettings):
     # === Environment-based values ===
@@ -11,6 +23,9 @@ class Settings(BaseSettings):
     REDIS_URL: str = Field(..., env="REDIS_URL")
     PORT: int = Field(8000, env="PORT")
     HOST: str = Field("0.0.0.0", env="HOST")
+    # Proxies whose X-Forwarded-For uvicorn honours (comma-separated IPs or
+    # CIDRs). The client is the right-most address not in this list.
+    FORWARDED_ALLOW_IPS: str = Field("127.0.0.1", env="FORWARDED_ALLOW_IPS")
 
     # === App constants ===
     api_base_path: str = "/api/v1"
@@ -19,6 +34,98 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE: timedelta = timedelta(hours=1)
     REFRESH_TOKEN_EXPIRE: timedelta = timedelta(days=7)
 
+    # === Database ===
+    READ_DATABASE_URL: str | None = None  # replica for read-only endpoints; unset = primary
+    READ_AFTER_WRITE_WINDOW: int = 5  # seconds a user's reads stay on the primary after a write
+    DB_ECHO: bool = False  # log every SQL statement; development only
+    DB_POOL_SIZE: int = 10  # connections kept open per worker
+    DB_MAX_OVERFLOW: int = 10  # extra connections allowed under burst, closed when returned
+    DB_POOL_TIMEOUT: float = 10.0  # seconds to wait for a free connection before erroring
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True  # check connections on checkout; survives DB/proxy restarts
+    # asyncpg prepared statements cached per connection; set 0 behind PgBouncer
+    # in transaction pooling mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    QUERY_BUDGET: int = 20  # queries per request before it is logged as a likely N+1
+    SERVER_TIMING: bool = True  # report DB query count and time in a Server-Timing header
+    SLOW_QUERY_THRESHOLD: float = 0.2  # seconds; slower statements go to the slow-query log (0 = off)
+    SLOW_QUERY_LOG_SIZE: int = 200  # slow queries kept per worker
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.1  # share of slow SELECTs re-run under EXPLAIN ANALYZE
+    SLOW_QUERY_EXPLAIN_TIMEOUT: float = 5.0  # seconds an EXPLAIN ANALYZE may run
+    READY_TIMEOUT: float = 2.0  # seconds /ready waits on each dependency before reporting it down
+
+    # === Token revocation ===
+    REVOCATION_BLOOM_CAPACITY: int = 100_000  # revoked jtis per worker before the error rate degrades
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_REBUILD_INTERVAL: int = 3600  # seconds between rebuilds that drop expired jtis
+
+    # === Rate limiting ===
+    RATE_LIMIT_ENABLED: bool = True
+    # scope -> "requests/period"; a scope missing here is not limited
+    RATE_LIMITS: dict[str, str] = {
+        "login": "10/minute",
+        "bills:write": "60/minute",
+        "settle": "10/minute",
+    }
+
+    @field_validator("RATE_LIMITS")
+    @classmethod
+    def _check_rates(cls, rates: dict[str, str]) -> dict[str, str]:
+        for rate in rates.values():
+            parse_rate(rate)
+        return rates
+
+    # === Realtime ===
+    WS_SEND_QUEUE_SIZE: int = 64  # frames buffered per socket before it is evicted as too slow
+    WS_SEND_TIMEOUT: float = 10.0  # seconds a single send may take
+    WS_REPLAY_MAXLEN: int = 500  # recent events kept per group for reconnecting clients
+    WS_REPLAY_TTL: int = 86400  # seconds an idle group's sequence and replay buffer live
+    # Milliseconds to hold events of these types so bursts in one group go out
+    # as a single BATCH frame; types not listed are sent immediately
+    WS_COALESCE_WINDOWS: dict[str, int] = {
+        "UPDATE_BILL": 250,
+        "PAYMENT_UPDATE": 250,
+    }
+    WS_COALESCE_MAX_EVENTS: int = 50  # a batch is sent early once it holds this many events
+    WS_PING_INTERVAL: float = 25.0  # seconds between server PINGs
+    WS_IDLE_TIMEOUT: float = 75.0  # seconds a client that has PONGed may stay silent before it is reaped
+    # Protocol-level ping frames sent by uvicorn; these catch dead listen-only
+    # clients that never answer the JSON PING
+    WS_TRANSPORT_PING_INTERVAL: float = 20.0
+    WS_TRANSPORT_PING_TIMEOUT: float = 20.0
+    WS_MAX_CONNECTIONS_PER_USER: int = 10
+    WS_MAX_CONNECTIONS_PER_WORKER: int = 10_000
+    WS_DRAIN_TIMEOUT: float = 5.0  # seconds to flush send queues on shutdown before closing
+    WS_PER_MESSAGE_DEFLATE: bool = True  # let clients negotiate permessage-deflate compression
+
+    # === Background tasks ===
+    TASK_BACKEND: str = "local"  # "local" (in-process queues) or "redis" (shared lists)
+    TASK_WORKERS: int = 4  # consumers per worker process
+    TASK_QUEUE_SIZE: int = 1000  # local backlog before callers run tasks themselves
+    TASK_DRAIN_TIMEOUT: float = 5.0  # seconds to finish queued tasks on shutdown
+    TASK_ENQUEUE_TIMEOUT: float = 1.0  # seconds a keyed task waits for room in a full local queue before it is dropped
+    TASK_SHARDS: int = 16  # lists keyed tasks are spread over, redis backend; each is consumed by one process
+    TASK_SHARD_LEASE: float = 30.0  # seconds a process keeps a shard without renewing; keyed tasks should finish well within it
+
+    # === Password hashing ===
+    BCRYPT_ROUNDS: int = 12  # changing this rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: int = 4  # concurrent bcrypt operations per worker process
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # waiting operations before new ones get a 503
+
+    # === Caching ===
+    GROUP_DASHBOARD_TTL: int = 600  # seconds a group dashboard document lives in Redis
+    USER_CACHE_SIZE: int = 10_000  # authenticated users kept in-process per worker
+    USER_CACHE_TTL: int = 60  # seconds; bounds staleness only while the revocation channel is down
+    JWT_CACHE_SIZE: int = 10_000  # verified token payloads kept per worker
+    MEMBERSHIP_CACHE_TTL: int = 3600  # seconds a user's group-id set lives in Redis
+
+    # === Profiling ===
+    PROFILE_TOKEN: str | None = None  # requests sending "X-Profile: <token>" are profiled; unset = off
+    PROFILE_SAMPLE_RATE: float = 0.0  # share of all requests profiled regardless of the header
+    PROFILE_INTERVAL: float = 0.005  # seconds between stack samples
+    PROFILE_DIR: str = "/tmp/rupaya-profiles"  # collapsed-stack files, one per profiled request
+    PROFILE_MAX_FILES: int = 200  # oldest profiles are deleted beyond this
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -28,3 +28,15 @@ class ConflictError(RupayaException):
 class ValidationError(RupayaException):
     """Raised when business logic validation fails"""
     pass
+
+
+class ServiceUnavailableError(RupayaException):
+    """Raised when the server is temporarily overloaded"""
+    pass
+
+
+class RateLimitedError(RupayaException):
+    """Raised when a client exceeds a rate limit"""
+    def __init__(self, message: str, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(message)
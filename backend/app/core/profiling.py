@@ -0,0 +1,175 @@
+# app/core/profiling.py
+"""
+On-demand sampling profiler for single HTTP requests.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` or is
+picked by PROFILE_SAMPLE_RATE. A background thread samples that request's
+stack every PROFILE_INTERVAL seconds and the result is written to
+PROFILE_DIR in collapsed-stack format, one file per request, ready for
+flamegraph.pl or speedscope:
+
+    GroupService.get_user_groups (app/services/group_service.py:106);... 12
+
+Samples taken while the request is suspended on an await end in a
+"(waiting)" frame, so the graph shows wall-clock time: on-CPU Python work
+(serialisation, simplify_debts) next to time parked on the database, Redis
+or the bcrypt thread pool. Only frames from this middleware inward are kept,
+which means work done by other requests on the same event loop is excluded.
+"""
+import asyncio
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from uuid import uuid4
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _frame_name(code) -> str:
+    path = code.co_filename
+    if path.startswith(_ROOT):
+        path = os.path.relpath(path, _ROOT)
+    elif "site-packages" in path:
+        path = path.split("site-packages" + os.sep, 1)[-1]
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+class _Sampler(threading.Thread):
+    """Samples one asyncio task, from another thread, until stopped."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, task: asyncio.Task, root_frame):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop = loop
+        self.task = task
+        self.root_frame = root_frame
+        self.loop_thread = threading.get_ident()
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(settings.PROFILE_INTERVAL):
+            stack = self._sample()
+            if stack:
+                self.stacks[stack] += 1
+
+    def stop(self):
+        self._stopped.set()
+
+    def _sample(self) -> str | None:
+        if asyncio.current_task(self.loop) is self.task:
+            return self._running_stack()
+        return self._suspended_stack()
+
+    def _running_stack(self) -> str | None:
+        frame = sys._current_frames().get(self.loop_thread)
+        names = []
+        while frame is not None:
+            if frame is self.root_frame:
+                return ";".join(reversed(names))
+            names.append(_frame_name(frame.f_code))
+            frame = frame.f_back
+        # The task was switched out while we walked; skip this tick
+        return None
+
+    def _suspended_stack(self) -> str | None:
+        awaitable = self.task.get_coro()
+        names, inside = [], False
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                break
+            if frame is self.root_frame:
+                inside = True
+            elif inside:
+                names.append(_frame_name(frame.f_code))
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        if not inside:
+            return None
+        names.append("(waiting)")
+        return ";".join(names)
+
+
+class RequestProfiler:
+    """
+    ASGI middleware. Add it before any other middleware so it wraps the
+    endpoint directly: BaseHTTPMiddleware runs the inner app in a separate
+    task, which the sampler would not be watching.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _wanted(self, scope) -> bool:
+        if scope["type"] != "http":
+            return False
+        if settings.PROFILE_TOKEN:
+            token = settings.PROFILE_TOKEN.encode()
+            for name, value in scope.get("headers", ()):
+                if name == PROFILE_HEADER.encode() and hmac.compare_digest(value, token):
+                    return True
+        return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex[:12]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = _Sampler(asyncio.get_running_loop(), asyncio.current_task(), sys._getframe())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            # The sampler may be mid-sample; wait for it off the loop
+            sampler.stop()
+            await asyncio.to_thread(sampler.join)
+            await asyncio.to_thread(self._write, scope, profile_id, elapsed, sampler.stacks)
+
+    def _write(self, scope, profile_id: str, elapsed: float, stacks: Counter):
+        route = getattr(scope.get("route"), "path", scope["path"])
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{_UNSAFE.sub('_', route).strip('_')}-{profile_id}"
+        try:
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            path = os.path.join(settings.PROFILE_DIR, f"{name}.collapsed")
+            with open(path, "w") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            self._prune()
+        except OSError:
+            logger.exception("Could not write profile %s", profile_id)
+            return
+        logger.info(
+            "Profiled %s %s in %.0fms (%d samples): %s",
+            scope["method"], route, elapsed * 1000, sum(stacks.values()), path,
+        )
+
+    def _prune(self):
+        files = sorted(
+            entry.path for entry in os.scandir(settings.PROFILE_DIR)
+            if entry.name.endswith(".collapsed")
+        )
+        for path in files[: max(0, len(files) - settings.PROFILE_MAX_FILES)]:
+            os.remove(path)
@@ -1,6 +1,27 @@
 # app/core/redis.py
+import time
+
 import redis.asyncio as aioredis
 
+from app.core import metrics
 from app.core.config import settings
 
-redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+_command_seconds = metrics.histogram(
+    "redis_command_duration_seconds", "Redis round trips, by command", ("command",)
+)
+
+
+class InstrumentedRedis(aioredis.Redis):
+    """Redis client that times every command (pipelines and pub/sub reads are not included)."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            _command_seconds.observe(
+                time.perf_counter() - started, command=str(args[0]).split(" ", 1)[0].upper()
+            )
+
+
+redis_client = InstrumentedRedis.from_url(settings.REDIS_URL, decode_responses=True)
@@ -0,0 +1,191 @@
+# app/core/revocation.py
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+
+from app.core.config import settings
+from app.core.exceptions import UnauthorizedError
+from app.core.redis import redis_client
+from app.utils.bloom_filter import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "auth:revocations"
+
+
+class RevocationRegistry:
+    """
+    Token revocation keyed on the short `jti` claim.
+
+    Redis is the source of truth (`revoked:{jti}` and `revoke_all:{user_id}`).
+    Every worker mirrors it locally: revoked jtis go into a Bloom filter and
+    logout-all timestamps into a dict, kept current over Redis pub/sub. While
+    the mirror is in sync, a token that is not in the filter is known not to
+    be revoked without leaving the process; filter hits are confirmed in Redis.
+    When the mirror is not in sync, every check goes to Redis.
+
+    The same channel tells every worker when a user's record changed
+    (`user_changed`), so per-worker caches of it can drop their copy.
+    """
+
+    def __init__(self):
+        self._bloom = self._new_bloom()
+        self._revoke_all: dict[str, int] = {}
+        self._synced = False
+        self._task: asyncio.Task | None = None
+        # Called with a user id when that user changed, or None when changes
+        # may have been missed (the mirror was out of sync)
+        self._user_listeners: list[Callable[[str | None], None]] = []
+
+    @staticmethod
+    def _new_bloom() -> BloomFilter:
+        return BloomFilter(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE)
+
+    # -------------------------
+    # LIFECYCLE
+    # -------------------------
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._synced = False
+
+    async def _sync_forever(self):
+        backoff = 1
+        while True:
+            try:
+                await self._sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Revocation sync lost; falling back to Redis checks", exc_info=True)
+            self._synced = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    async def _sync(self):
+        pubsub = redis_client.pubsub()
+        try:
+            # Subscribe before loading so nothing published meanwhile is missed
+            await pubsub.subscribe(CHANNEL)
+            await self._reload()
+            self._synced = True
+            self._notify_user_changed(None)
+            rebuild_at = time.monotonic() + settings.REVOCATION_REBUILD_INTERVAL
+
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    self._apply(message["data"])
+                if time.monotonic() >= rebuild_at:
+                    # Bloom filters cannot forget; rebuild to drop expired jtis
+                    await self._reload()
+                    rebuild_at = time.monotonic() + settings.REVOCATION_REBUILD_INTERVAL
+        finally:
+            await pubsub.aclose()
+
+    async def _reload(self):
+        bloom = self._new_bloom()
+        async for key in redis_client.scan_iter(match="revoked:*", count=1000):
+            bloom.add(key.split(":", 1)[1])
+
+        revoke_all = {}
+        async for key in redis_client.scan_iter(match="revoke_all:*", count=1000):
+            value = await redis_client.get(key)
+            if value:
+                revoke_all[key.split(":", 1)[1]] = int(value)
+
+        self._bloom = bloom
+        self._revoke_all = revoke_all
+
+    def _apply(self, data: str):
+        kind, _, rest = data.partition(":")
+        if kind == "jti":
+            self._bloom.add(rest)
+        elif kind == "user":
+            user_id, _, ts = rest.partition(":")
+            self._revoke_all[user_id] = max(int(ts), self._revoke_all.get(user_id, 0))
+        elif kind == "changed":
+            self._notify_user_changed(rest)
+
+    def on_user_changed(self, listener: Callable[[str | None], None]):
+        self._user_listeners.append(listener)
+
+    def _notify_user_changed(self, user_id: str | None):
+        for listener in self._user_listeners:
+            listener(user_id)
+
+    # -------------------------
+    # WRITES
+    # -------------------------
+    async def revoke_token(self, token: str, payload: dict):
+        """Revoke a single token until it expires."""
+        jti = payload.get("jti")
+        ttl = payload.get("exp", 0) - int(time.time())
+        if ttl <= 0:
+            return
+        if not jti:
+            # Legacy token issued before tokens carried a jti
+            await redis_client.setex(f"blacklist:{token}", ttl, "1")
+            return
+
+        await redis_client.setex(f"revoked:{jti}", ttl, "1")
+        self._bloom.add(jti)
+        await redis_client.publish(CHANNEL, f"jti:{jti}")
+
+    async def revoke_user(self, user_id: str, ts: int):
+        """Revoke every token issued to a user before `ts`."""
+        # After the refresh token lifetime, every older token has expired anyway
+        ttl = int(settings.REFRESH_TOKEN_EXPIRE.total_seconds())
+        await redis_client.set(f"revoke_all:{user_id}", ts, ex=ttl)
+        self._apply(f"user:{user_id}:{ts}")
+        await redis_client.publish(CHANNEL, f"user:{user_id}:{ts}")
+
+    async def user_changed(self, user_id: str):
+        """Tell every worker (this one included) that a user's record changed."""
+        self._notify_user_changed(user_id)
+        await redis_client.publish(CHANNEL, f"changed:{user_id}")
+
+    # -------------------------
+    # CHECKS
+    # -------------------------
+    async def ensure_not_revoked(self, token: str, payload: dict):
+        """Raise UnauthorizedError if the token was revoked."""
+        user_id = str(payload.get("sub"))
+        jti = payload.get("jti")
+        iat = payload.get("iat", 0)
+
+        if self._synced and jti:
+            revoke_ts = self._revoke_all.get(user_id)
+            if revoke_ts and iat < revoke_ts:
+                raise UnauthorizedError("Session revoked. Please log in again.")
+            if jti not in self._bloom:
+                return
+            # Possible false positive; Redis has the final word
+            if await redis_client.exists(f"revoked:{jti}"):
+                raise UnauthorizedError("Token invalidated. Please log in again.")
+            return
+
+        # Not in sync (or a legacy token without a jti): ask Redis directly
+        revoked_key = f"revoked:{jti}" if jti else f"blacklist:{token}"
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.exists(revoked_key)
+            pipe.get(f"revoke_all:{user_id}")
+            revoked, revoke_ts = await pipe.execute()
+
+        if revoked:
+            raise UnauthorizedError("Token invalidated. Please log in again.")
+        if revoke_ts and iat < int(revoke_ts):
+            raise UnauthorizedError("Session revoked. Please log in again.")
+
+
+revocation_registry = RevocationRegistry()
@@ -1,11 +1,63 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from app.core import metrics
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
+
+# Password context. Pinning min/max rounds to the configured cost makes hashes
+# created with any other cost "need update", so they are rehashed on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+_hash_queue_depth = metrics.gauge(
+    "password_hash_queue_depth", "Password hash operations waiting for a worker"
+)
+_hash_in_flight = metrics.gauge(
+    "password_hash_in_flight", "Password hash operations currently running"
+)
+_hash_operations = metrics.counter(
+    "password_hash_operations_total", "Password hash operations by kind", ("operation",)
+)
+_hash_rejected = metrics.counter(
+    "password_hash_rejected_total", "Password hash operations rejected because the queue was full"
+)
+
+# Verified JWT payloads keyed by sha256(token); entries expire with the token
+_verified_tokens = TTLCache(maxsize=settings.JWT_CACHE_SIZE, ttl=settings.ACCESS_TOKEN_EXPIRE.total_seconds())
+
+_jwt_cache_lookups = metrics.counter(
+    "jwt_cache_lookups_total", "Verified-JWT cache lookups", ("result",)
+)
+
 
-# Password context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def _jwt_cache_hit_ratio() -> float:
+    hits = _jwt_cache_lookups.value(result="hit")
+    total = hits + _jwt_cache_lookups.value(result="miss")
+    return hits / total if total else 0.0
+
+
+metrics.gauge(
+    "jwt_cache_hit_ratio", "Share of token verifications served from the cache"
+).set_function(_jwt_cache_hit_ratio)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -21,6 +73,51 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def _run_hash(operation: str, func, *args):
+    """Run a bcrypt call on the hashing pool, bounded by PASSWORD_HASH_WORKERS."""
+    if _hash_slots.locked() and _hash_queue_depth.value() >= settings.PASSWORD_HASH_MAX_QUEUE:
+        _hash_rejected.inc()
+        raise ServiceUnavailableError("Server is busy, please try again shortly")
+
+    _hash_queue_depth.inc()
+    try:
+        await _hash_slots.acquire()
+    finally:
+        _hash_queue_depth.dec()
+
+    _hash_in_flight.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_in_flight.dec()
+        _hash_slots.release()
+        _hash_operations.inc(operation=operation)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await _run_hash("hash", pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool"""
+    return await _run_hash("verify", pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Verify a password on the hashing pool.
+    Returns (valid, new_hash); new_hash is set when the stored hash was made
+    with a different cost factor and should be replaced.
+    """
+    return await _run_hash(
+        "verify", pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
 def encode_token(data: dict) -> str:
     """Encode a dictionary into a JWT token."""
     to_encode = data.copy()
@@ -32,13 +129,29 @@ def encode_token(data: dict) -> str:
 
 
 def decode_token(token: str) -> dict | None:
-    """Decode and validate a JWT. Returns payload or None."""
+    """
+    Decode and validate a JWT. Returns payload or None.
+
+    Verified payloads are cached by token digest until the token's `exp`, so
+    signature verification runs once per token per worker.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _verified_tokens.get(key)
+    if payload is not None:
+        _jwt_cache_lookups.inc(result="hit")
+        return dict(payload)
+
+    _jwt_cache_lookups.inc(result="miss")
     try:
         payload = jwt.decode(
             token,
             settings.SECRET_KEY,
             algorithms=[settings.JWT_ALGORITHM],
         )
-        return payload
     except JWTError:
         return None
+
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl > 0:
+        _verified_tokens.set(key, payload, ttl=ttl)
+    return dict(payload)
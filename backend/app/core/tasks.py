@@ -0,0 +1,278 @@
+# app/core/tasks.py
+import asyncio
+import json
+import logging
+import uuid
+import zlib
+from collections.abc import Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "tasks:queue"
+SHARD_PREFIX = "tasks:shard:"
+OWNER_PREFIX = "tasks:owner:"
+
+_enqueued = metrics.counter("tasks_enqueued_total", "Background tasks enqueued", ("task",))
+_failed = metrics.counter("tasks_failed_total", "Background tasks that raised", ("task",))
+_inline = metrics.counter(
+    "tasks_run_inline_total", "Background tasks run by the caller because the queue was full"
+)
+_dropped = metrics.counter(
+    "tasks_dropped_total", "Keyed tasks dropped because their queue stayed full", ("task",)
+)
+_queue_depth = metrics.gauge("task_queue_depth", "Background tasks waiting in this worker")
+
+# Takes or renews the lease on a shard of keyed tasks: succeeds when the lease
+# is free or already held by ARGV[1]. Returns 1 if ARGV[1] now holds it.
+_CLAIM = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+_claim = redis_client.register_script(_CLAIM)
+
+# Gives up a lease, if ARGV[1] still holds it
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+_release = redis_client.register_script(_RELEASE)
+
+
+class TaskDispatcher:
+    """
+    Runs post-commit side effects (websocket broadcasts and the like) off the
+    request path.
+
+    Tasks are async functions registered by name; arguments must be JSON
+    serialisable so the same call works with either backend:
+
+        @task_dispatcher.task("broadcast_group_event")
+        async def broadcast_group_event(group_id: str, message: dict): ...
+
+        await task_dispatcher.enqueue("broadcast_group_event", group_id=..., message=...)
+
+    Tasks enqueued with the same `key` (a group id, say) run one at a time,
+    in the order they were enqueued. Everything else is spread across
+    consumers.
+
+    settings.TASK_BACKEND picks where queued tasks wait. "local" keeps them in
+    in-process queues (lost if the worker dies); each key always lands on the
+    same consumer's queue. "redis" pushes unkeyed tasks onto a list that every
+    worker process polls, and keyed tasks onto one of TASK_SHARDS lists by
+    key. A shard is consumed by a single process at a time, the one holding
+    its lease, so a key's order holds across processes. A task that runs
+    longer than TASK_SHARD_LEASE can lose the lease, and with it that
+    guarantee. While Redis is unreachable, tasks fall back to the local
+    queues and keyed order holds per process only. Delivery is at most once
+    either way. Enqueue only after the transaction has committed.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, Callable[..., Awaitable]] = {}
+        self._queues: list[asyncio.Queue] = []
+        self._workers: list[asyncio.Task] = []
+        # shard -> the task consuming it while this process holds its lease
+        self._shards: dict[int, asyncio.Task] = {}
+        self._next = 0
+        self._stopping = asyncio.Event()
+        # Names this process as a shard lease holder
+        self._owner = uuid.uuid4().hex
+
+    def task(self, name: str):
+        def register(fn):
+            self._handlers[name] = fn
+            return fn
+
+        return register
+
+    # -------------------------
+    # LIFECYCLE
+    # -------------------------
+    async def start(self):
+        if self._workers:
+            return
+        self._stopping.clear()
+        self._queues = [
+            asyncio.Queue(maxsize=settings.TASK_QUEUE_SIZE) for _ in range(settings.TASK_WORKERS)
+        ]
+        _queue_depth.set_function(lambda: sum(q.qsize() for q in self._queues))
+        self._workers = [asyncio.create_task(self._consume_local(q)) for q in self._queues]
+        if settings.TASK_BACKEND == "redis":
+            self._workers.append(asyncio.create_task(self._poll_redis()))
+            self._workers.append(asyncio.create_task(self._claim_shards()))
+
+    async def stop(self):
+        """
+        Finish what is already queued locally or taken off a shard (up to
+        TASK_DRAIN_TIMEOUT), then stop.
+        """
+        self._stopping.set()
+        # Shard consumers exit once their current job (if any) is done
+        waits = [*self._shards.values(), *(q.join() for q in self._queues)]
+        if waits:
+            try:
+                await asyncio.wait_for(asyncio.gather(*waits), timeout=settings.TASK_DRAIN_TIMEOUT)
+            except TimeoutError:
+                logger.warning(
+                    "Stopping with %d background tasks unfinished", sum(q.qsize() for q in self._queues)
+                )
+        workers = self._workers + list(self._shards.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # Whatever is left in our shards waits in Redis for the next lease holder
+        for shard in self._shards:
+            try:
+                await _release(keys=[f"{OWNER_PREFIX}{shard}"], args=[self._owner])
+            except RedisError:
+                pass
+        self._workers = []
+        self._shards = {}
+        self._queues = []
+
+    # -------------------------
+    # ENQUEUE
+    # -------------------------
+    async def enqueue(self, name: str, *, key: str | None = None, **kwargs):
+        """Queue a registered task; never waits for it to run."""
+        if name not in self._handlers:
+            raise KeyError(f"Unknown task {name!r}")
+        _enqueued.inc(task=name)
+
+        if settings.TASK_BACKEND == "redis":
+            target = QUEUE_KEY if key is None else f"{SHARD_PREFIX}{self._shard_for(key)}"
+            try:
+                await redis_client.lpush(target, json.dumps({"name": name, "kwargs": kwargs}))
+                return
+            except RedisError:
+                logger.warning("Task queue unavailable; running %s locally", name, exc_info=True)
+
+        if not self._queues:
+            # Not started (scripts, tests): run it now
+            await self._run(name, kwargs)
+            return
+        queue = self._queue_for(key)
+        if key is not None:
+            # Running it here could overtake earlier tasks for the same key, so
+            # wait briefly for room and drop it if none frees up
+            try:
+                await asyncio.wait_for(queue.put((name, kwargs)), settings.TASK_ENQUEUE_TIMEOUT)
+            except TimeoutError:
+                _dropped.inc(task=name)
+                logger.error("Task queue full; dropped %s for %s", name, key)
+            return
+        try:
+            queue.put_nowait((name, kwargs))
+        except asyncio.QueueFull:
+            # Backpressure: the caller pays for this one rather than losing it
+            _inline.inc()
+            await self._run(name, kwargs)
+
+    @staticmethod
+    def _shard_for(key: str) -> int:
+        return zlib.crc32(key.encode()) % settings.TASK_SHARDS
+
+    def _queue_for(self, key: str | None) -> asyncio.Queue:
+        if key is None:
+            self._next = (self._next + 1) % len(self._queues)
+            return self._queues[self._next]
+        return self._queues[zlib.crc32(key.encode()) % len(self._queues)]
+
+    # -------------------------
+    # WORKERS
+    # -------------------------
+    async def _run(self, name: str, kwargs: dict):
+        try:
+            await self._handlers[name](**kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            _failed.inc(task=name)
+            logger.exception("Background task %s failed", name)
+
+    async def _consume_local(self, queue: asyncio.Queue):
+        while True:
+            name, kwargs = await queue.get()
+            try:
+                await self._run(name, kwargs)
+            finally:
+                queue.task_done()
+
+    def _job(self, item) -> tuple[str, dict] | None:
+        job = json.loads(item[1])
+        if job["name"] not in self._handlers:
+            logger.error("Dropping unknown task %s", job["name"])
+            return None
+        return job["name"], job["kwargs"]
+
+    async def _poll_redis(self):
+        # Unkeyed jobs go to the local consumers
+        while True:
+            try:
+                item = await redis_client.brpop(QUEUE_KEY, timeout=1)
+            except asyncio.CancelledError:
+                raise
+            except RedisError:
+                logger.warning("Task queue unavailable", exc_info=True)
+                await asyncio.sleep(1)
+                continue
+            job = self._job(item) if item is not None else None
+            if job is not None:
+                await self._queue_for(None).put(job)
+
+    async def _claim_shards(self):
+        # Picks up shards whose lease is free, including ones a dead process held
+        lease_ms = int(settings.TASK_SHARD_LEASE * 1000)
+        while not self._stopping.is_set():
+            for shard in range(settings.TASK_SHARDS):
+                consumer = self._shards.get(shard)
+                if consumer is not None and not consumer.done():
+                    continue
+                try:
+                    claimed = await _claim(keys=[f"{OWNER_PREFIX}{shard}"], args=[self._owner, lease_ms])
+                except RedisError:
+                    logger.warning("Could not claim task shards", exc_info=True)
+                    break
+                if claimed:
+                    self._shards[shard] = asyncio.create_task(self._consume_shard(shard))
+            await asyncio.sleep(settings.TASK_SHARD_LEASE / 3)
+
+    async def _consume_shard(self, shard: int):
+        # Runs the shard's jobs one at a time, renewing the lease before each
+        lease_ms = int(settings.TASK_SHARD_LEASE * 1000)
+        owner_key = f"{OWNER_PREFIX}{shard}"
+        while not self._stopping.is_set():
+            try:
+                if not await _claim(keys=[owner_key], args=[self._owner, lease_ms]):
+                    logger.warning("Lost the lease on task shard %d", shard)
+                    return
+                # Block for less than the lease so it is renewed in time
+                item = await redis_client.brpop(
+                    f"{SHARD_PREFIX}{shard}", timeout=min(1, settings.TASK_SHARD_LEASE / 3)
+                )
+            except asyncio.CancelledError:
+                raise
+            except RedisError:
+                logger.warning("Task shard %d unavailable", shard, exc_info=True)
+                await asyncio.sleep(1)
+                continue
+            job = self._job(item) if item is not None else None
+            if job is not None:
+                await self._run(*job)
+
+
+task_dispatcher = TaskDispatcher()
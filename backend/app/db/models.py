@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, String, Boolean, Float, DateTime, ForeignKey, Enum as SAEnum, text, Table, UniqueConstraint
+from sqlalchemy import Column, String, Boolean, Float, DateTime, ForeignKey, Enum as SAEnum, Index, false, text, Table, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -86,6 +86,9 @@ class GroupMember(Base):
     
     __table_args__ = (
         UniqueConstraint('user_id', 'group_id', name='unique_user_group'),
+        # Hot-path partial indexes; see migration 7d3c1f0a9e42
+        Index("ix_GroupMember_user_active", user_id, group_id, postgresql_where=deleted_at.is_(None)),
+        Index("ix_GroupMember_group_active", group_id, created_at, postgresql_where=deleted_at.is_(None)),
     )
 
 class Bill(Base):
@@ -110,6 +113,12 @@ class Bill(Base):
     payer = relationship("User", foreign_keys=[paid_by])
     shares = relationship("BillShare", back_populates="bill")
 
+    __table_args__ = (
+        # Hot-path partial indexes; see migration 7d3c1f0a9e42
+        Index("ix_Bill_group_active_created", group_id, created_at.desc(), postgresql_where=deleted_at.is_(None)),
+        Index("ix_Bill_paid_by_group_active", paid_by, group_id, postgresql_where=deleted_at.is_(None)),
+    )
+
 class BillShare(Base):
     __tablename__ = "BillShare"
 
@@ -133,4 +142,13 @@ class BillShare(Base):
 
     __table_args__ = (
         UniqueConstraint('bill_id', 'user_id', name='unique_bill_user'),
+        # Hot-path partial indexes; see migration 7d3c1f0a9e42
+        Index(
+            "ix_BillShare_user_unpaid", user_id, bill_id,
+            postgresql_include=["amount"], postgresql_where=paid == false(),
+        ),
+        Index(
+            "ix_BillShare_bill_unpaid", bill_id,
+            postgresql_include=["user_id", "amount"], postgresql_where=paid == false(),
+        ),
     )
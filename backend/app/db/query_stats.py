@@ -0,0 +1,101 @@
+# app/db/query_stats.py
+"""
+Per-request query accounting.
+
+`instrument(engine)` hooks the engine's cursor events so every statement
+executed while a `QueryStats` is active (see `track_queries`) is counted and
+timed. The HTTP middleware in main.py opens one per request; tests can use
+`query_budget` to fail when an endpoint's query count grows with the data:
+
+    with query_budget(6):
+        await client.get(f"/api/v1/summary/debts?group_id={gid}")
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db.slow_queries import slow_query_log
+
+
+class QueryStats:
+    __slots__ = ("count", "elapsed", "statements")
+
+    def __init__(self, keep_statements: bool = False):
+        self.count = 0
+        self.elapsed = 0.0  # seconds spent waiting on the database
+        # Only kept when asked for, so production requests don't hold SQL text
+        self.statements: list[str] | None = [] if keep_statements else None
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.elapsed += elapsed
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(keep_statements: bool = False):
+    """Count queries run in this context (and tasks/greenlets spawned from it)."""
+    stats = QueryStats(keep_statements)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(limit: int):
+    """Raise QueryBudgetExceeded if the block runs more than `limit` queries."""
+    with track_queries(keep_statements=True) as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {i}. {sql}" for i, sql in enumerate(stats.statements, 1))
+        raise QueryBudgetExceeded(
+            f"{stats.count} queries run, budget is {limit}:\n{listing}"
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if 0 < settings.SLOW_QUERY_THRESHOLD <= elapsed:
+        slow_query_log.record(conn, statement, parameters, elapsed, executemany)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument(engine: AsyncEngine):
+    sync_engine = engine.sync_engine
+    slow_query_log.attach(engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
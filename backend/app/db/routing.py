@@ -0,0 +1,76 @@
+# app/db/routing.py
+from fastapi import Request
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.core.security import decode_token
+from app.db.session import AsyncSessionLocal, ReadSessionLocal, read_engine
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def request_user_id(request: Request) -> str | None:
+    """The bearer token's subject, if the request carries a valid one."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_token(token)
+    return str(payload["sub"]) if payload and payload.get("sub") else None
+
+
+class ReadRouting:
+    """
+    Read-your-writes stickiness for replica reads.
+
+    A user who has just written is pinned to the primary for
+    READ_AFTER_WRITE_WINDOW seconds, so they never read their own write from
+    a replica that has not caught up. The marker lives in Redis
+    (`recent_write:{user_id}`) so it holds across workers, with a local copy
+    for the worker that took the write.
+    """
+
+    key_prefix = "recent_write:"
+
+    def __init__(self):
+        self._local = TTLCache(maxsize=10_000, ttl=settings.READ_AFTER_WRITE_WINDOW)
+
+    @property
+    def enabled(self) -> bool:
+        return read_engine is not None
+
+    async def mark_write(self, user_id: str):
+        self._local.set(user_id, True)
+        try:
+            await redis_client.set(
+                f"{self.key_prefix}{user_id}", 1, ex=settings.READ_AFTER_WRITE_WINDOW
+            )
+        except RedisError:
+            pass
+
+    async def recently_wrote(self, user_id: str) -> bool:
+        if user_id in self._local:
+            return True
+        try:
+            return bool(await redis_client.exists(f"{self.key_prefix}{user_id}"))
+        except RedisError:
+            # Cannot tell; the primary is always safe
+            return True
+
+
+read_routing = ReadRouting()
+
+
+async def get_read_db(request: Request):
+    """
+    Session for read-only endpoints: the replica, unless the caller wrote
+    within the stickiness window (or no replica is configured).
+    """
+    session_factory = ReadSessionLocal
+    if read_routing.enabled:
+        user_id = request_user_id(request)
+        if user_id is not None and await read_routing.recently_wrote(user_id):
+            session_factory = AsyncSessionLocal
+    async with session_factory() as session:
+        yield session
@@ -5,12 +5,16 @@ from dotenv import load_dotenv
 
 from sqlalchemy.engine.url import make_url
 
-load_dotenv()
+from app.core import metrics
+from app.core.config import settings
+from app.db.query_stats import instrument
 
-db_url_str = os.getenv("DATABASE_URL")
-DATABASE_URL = ""
+load_dotenv()
 
-if db_url_str:
+def _async_url(db_url_str: str | None) -> str:
+    """Normalise a postgres URL for the asyncpg driver."""
+    if not db_url_str:
+        return ""
     url_obj = make_url(db_url_str)
     if url_obj.drivername == "postgresql":
         url_obj = url_obj.set(drivername="postgresql+asyncpg")
@@ -20,11 +24,72 @@ if db_url_str:
         del query_dict["schema"]
         url_obj = url_obj.set(query=query_dict)
     
-    DATABASE_URL = url_obj.render_as_string(hide_password=False)
+    return url_obj.render_as_string(hide_password=False)
+
+
+DATABASE_URL = _async_url(os.getenv("DATABASE_URL"))
+READ_DATABASE_URL = _async_url(settings.READ_DATABASE_URL)
+
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+def _engine_options(url: str) -> dict:
+    """Engine keyword arguments for `url`, taken from Settings."""
+    options = {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url and make_url(url).drivername == "postgresql+asyncpg":
+        # asyncpg's own statement cache, and SQLAlchemy's cache of prepared statements
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Read-only sessions: the replica when READ_DATABASE_URL is set, else the primary.
+# `info["replica"]` tells callers the data may lag behind the primary.
+read_engine = (
+    create_async_engine(READ_DATABASE_URL, **_engine_options(READ_DATABASE_URL))
+    if READ_DATABASE_URL
+    else None
+)
+ReadSessionLocal = (
+    async_sessionmaker(
+        read_engine, class_=AsyncSession, expire_on_commit=False, info={"replica": True}
+    )
+    if read_engine is not None
+    else AsyncSessionLocal
+)
+
+# Count queries and DB time per request (see app.db.query_stats)
+instrument(engine)
+if read_engine is not None:
+    instrument(read_engine)
+
+# Pool usage, to size workers against Postgres max_connections
+_pool = engine.sync_engine.pool
+metrics.gauge("db_pool_size", "Connections the pool keeps open").set_function(_pool.size)
+metrics.gauge("db_pool_checked_out", "Connections currently in use").set_function(_pool.checkedout)
+metrics.gauge("db_pool_checked_in", "Idle connections in the pool").set_function(_pool.checkedin)
+metrics.gauge(
+    "db_pool_overflow", "Connections open beyond pool_size (negative: unused capacity)"
+).set_function(_pool.overflow)
+if read_engine is not None:
+    _read_pool = read_engine.sync_engine.pool
+    metrics.gauge(
+        "db_read_pool_checked_out", "Replica connections currently in use"
+    ).set_function(_read_pool.checkedout)
+    metrics.gauge(
+        "db_read_pool_overflow", "Replica connections open beyond pool_size"
+    ).set_function(_read_pool.overflow)
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
@@ -0,0 +1,147 @@
+# app/db/slow_queries.py
+"""
+Slow-query log.
+
+app.db.query_stats times every statement; anything slower than
+SLOW_QUERY_THRESHOLD lands here with normalised SQL, the shape (not the
+values) of its parameters, its duration and the service method that ran it.
+A sampled share of slow SELECTs is re-run as EXPLAIN (ANALYZE, BUFFERS) on a
+separate connection, off the request path, and the plan is attached to the
+entry. Entries live in a per-worker ring buffer served at /admin/slow-queries.
+"""
+import asyncio
+import contextvars
+import logging
+import random
+import re
+import sys
+from collections import deque
+from datetime import UTC, datetime
+
+import greenlet
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_slow = metrics.counter("db_slow_queries_total", "Statements over SLOW_QUERY_THRESHOLD", ("caller",))
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):\w+\b|\?")
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_SPACE = re.compile(r"\s+")
+_MAX_SQL = 2000
+
+# Frames from these packages are the ones worth naming as "who ran this"
+_CALLER_PACKAGES = ("/app/services/", "/app/routers/")
+
+
+def normalize_sql(statement: str) -> str:
+    """Literals and bind markers become ?, IN lists collapse, whitespace is squeezed."""
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    sql = _SPACE.sub(" ", sql).strip()
+    return sql[:_MAX_SQL]
+
+
+def parameter_shape(parameters, executemany: bool):
+    """Types of the bound values, never the values themselves."""
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "types": parameter_shape(rows[0], False) if rows else []}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def _calling_method() -> str | None:
+    # Cursor events run in SQLAlchemy's worker greenlet; the awaiting service
+    # coroutine is on the parent greenlet's stack, not ours
+    current = greenlet.getcurrent()
+    frame = current.parent.gr_frame if current.parent is not None else sys._getframe()
+    while frame is not None:
+        filename = frame.f_code.co_filename.replace("\\", "/")
+        if any(package in filename for package in _CALLER_PACKAGES):
+            return f"{frame.f_code.co_qualname}:{frame.f_lineno}"
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self._entries: deque[dict] = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+        self._engines: dict = {}  # sync Engine -> AsyncEngine, to run EXPLAIN on the same database
+        self._explains: set[asyncio.Task] = set()
+
+    def attach(self, engine: AsyncEngine):
+        self._engines[engine.sync_engine] = engine
+
+    def entries(self, limit: int | None = None) -> list[dict]:
+        """Newest first."""
+        newest = list(reversed(self._entries))
+        return newest[:limit] if limit is not None else newest
+
+    def clear(self):
+        self._entries.clear()
+
+    def record(self, conn, statement: str, parameters, elapsed: float, executemany: bool):
+        """Called from the cursor event for statements over the threshold."""
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+        caller = _calling_method()
+        entry = {
+            "at": datetime.now(UTC).isoformat(),
+            "duration_ms": round(elapsed * 1000, 2),
+            "sql": normalize_sql(statement),
+            "parameters": parameter_shape(parameters, executemany),
+            "caller": caller,
+            "plan": None,
+        }
+        self._entries.append(entry)
+        _slow.inc(caller=caller or "unknown")
+        logger.warning("Slow query %.1fms in %s: %s", entry["duration_ms"], caller, entry["sql"][:200])
+
+        if self._should_explain(statement, executemany):
+            engine = self._engines.get(conn.engine)
+            if engine is not None:
+                self._explain_later(engine, entry, statement, parameters)
+
+    def _should_explain(self, statement: str, executemany: bool) -> bool:
+        if executemany or random.random() >= settings.SLOW_QUERY_EXPLAIN_RATE:
+            return False
+        # ANALYZE executes the statement: plain reads only
+        sql = statement.lstrip().upper()
+        return sql.startswith("SELECT") and "FOR UPDATE" not in sql and "FOR SHARE" not in sql
+
+    def _explain_later(self, engine: AsyncEngine, entry: dict, statement: str, parameters):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # A fresh context, so the EXPLAIN isn't counted against the request that was slow
+        task = loop.create_task(
+            self._explain(engine, entry, statement, parameters), context=contextvars.Context()
+        )
+        self._explains.add(task)
+        task.add_done_callback(self._explains.discard)
+
+    async def _explain(self, engine: AsyncEngine, entry: dict, statement: str, parameters):
+        try:
+            async with engine.connect() as conn:
+                timeout_ms = int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT * 1000)
+                await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                )
+                entry["plan"] = "\n".join(row[0] for row in result)
+                await conn.rollback()
+        except Exception as exc:
+            entry["plan"] = f"EXPLAIN failed: {exc!r}"
+
+
+slow_query_log = SlowQueryLog()
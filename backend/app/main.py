@@ -1,24 +1,71 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
 
+from app.core import metrics
 from app.core.config import settings
 from app.core.exceptions import (
     ConflictError,
     ForbiddenError,
     NotFoundError,
+    RateLimitedError,
     RupayaException,
+    ServiceUnavailableError,
     UnauthorizedError,
     ValidationError,
 )
+from app.core.profiling import RequestProfiler
+from app.core.redis import redis_client
+from app.core.revocation import revocation_registry
+from app.core.tasks import task_dispatcher
+from app.core.security import decode_token
 
-from app.routers import auth, bills, groups, users, summary
-from app.services.socket_manager import socket_manager
+from app.routers import admin, auth, bills, groups, users, summary
+from app.services.membership_cache import membership_cache
+from app.services.socket_manager import ENCODINGS, socket_manager
 from app.services.auth_service import get_current_user
-from app.db.session import get_db
+from app.db.query_stats import track_queries
+from app.db.routing import WRITE_METHODS, read_routing, request_user_id
+from app.db.session import engine, get_db, read_engine
 from fastapi import WebSocket, WebSocketDisconnect, Depends
 
-app = FastAPI(title="Rupaya API", openapi_url=f"{settings.api_base_path}/openapi.json")
+logger = logging.getLogger(__name__)
+
+_request_seconds = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+_over_budget = metrics.counter(
+    "http_query_budget_exceeded_total", "Requests that ran more than QUERY_BUDGET queries", ("route",)
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await revocation_registry.start()
+    await socket_manager.start()
+    await task_dispatcher.start()
+    yield
+    # Let queued broadcasts go out before the sockets are drained
+    await task_dispatcher.stop()
+    await socket_manager.stop()
+    await revocation_registry.stop()
+
+
+app = FastAPI(
+    title="Rupaya API",
+    openapi_url=f"{settings.api_base_path}/openapi.json",
+    lifespan=lifespan,
+)
+
+# Innermost, so the profiler shares a task with the endpoint it samples
+app.add_middleware(RequestProfiler)
 
 # Enable CORS - Configure based on environment
 # In production, you should set ALLOWED_ORIGINS environment variable
@@ -57,6 +104,14 @@ async def rupaya_exception_handler(request: Request, exc: RupayaException):
         status_code = 409
     elif isinstance(exc, ValidationError):
         status_code = 400
+    elif isinstance(exc, ServiceUnavailableError):
+        status_code = 503
+    elif isinstance(exc, RateLimitedError):
+        return JSONResponse(
+            status_code=429,
+            content={"detail": exc.message},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
 
     return JSONResponse(
         status_code=status_code,
@@ -64,48 +119,136 @@ async def rupaya_exception_handler(request: Request, exc: RupayaException):
     )
 
 
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    """After a successful write, keep that user's reads on the primary for a while."""
+    response = await call_next(request)
+    if (
+        read_routing.enabled
+        and request.method in WRITE_METHODS
+        and response.status_code < 400
+    ):
+        user_id = request_user_id(request)
+        if user_id is not None:
+            await read_routing.mark_write(user_id)
+    return response
+
+
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    """
+    Record latency per route template, count DB queries, report both in
+    Server-Timing and log N+1 suspects.
+    """
+    started = time.perf_counter()
+    with track_queries() as stats:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    total_ms = elapsed * 1000
+    db_ms = stats.elapsed * 1000
+
+    # The matched route's template keeps label cardinality bounded
+    route = request.scope.get("route")
+    template = getattr(route, "path", "unmatched")
+    _request_seconds.observe(
+        elapsed, method=request.method, route=template, status=response.status_code
+    )
+
+    if settings.SERVER_TIMING:
+        response.headers.append(
+            "Server-Timing",
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}',
+        )
+    if stats.count > settings.QUERY_BUDGET:
+        _over_budget.inc(route=template)
+        logger.warning(
+            "%s %s ran %d queries (budget %d, %.1fms in DB)",
+            request.method, template, stats.count, settings.QUERY_BUDGET, db_ms,
+        )
+    return response
+
+
 app.include_router(auth.router, prefix=settings.api_base_path)
 app.include_router(users.router, prefix=settings.api_base_path)
 app.include_router(groups.router, prefix=settings.api_base_path)
 app.include_router(bills.router, prefix=settings.api_base_path)
 app.include_router(summary.router, prefix=settings.api_base_path)
+app.include_router(admin.router, prefix=settings.api_base_path)
+
+
+@app.websocket("/ws")
+async def user_websocket_endpoint(
+    websocket: WebSocket, token: str = None, encoding: str = "json"
+):
+    """One socket per user, subscribed to every group they belong to."""
+    if not token:
+        token = websocket.query_params.get("token")
+
+    payload = decode_token(token) if token else None
+    if not payload or not payload.get("sub"):
+        await websocket.close(code=1008)
+        return
+
+    if encoding not in ENCODINGS:
+        await websocket.close(code=1003)
+        return
+
+    # Group ids come from the membership cache, so a warm connect never hits the DB
+    if not await socket_manager.connect_user(websocket, token, payload, encoding):
+        return
+    try:
+        while True:
+            # PONGs, and RESUME with the last seq seen per group after a reconnect
+            await socket_manager.handle_message(websocket, await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await socket_manager.disconnect(websocket)
 
 
 @app.websocket("/ws/{group_id}")
-async def websocket_endpoint(websocket: WebSocket, group_id: str, token: str = None):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    group_id: str,
+    token: str = None,
+    since: int | None = None,
+    encoding: str = "json",
+):
     # If token is not provided in query, check headers (though query is more common for WS)
     if not token:
         token = websocket.query_params.get("token")
     
-    try:
-        # Simple token verification (we can't use Depends(get_current_user) directly for WS in all cases easily)
-        # For now, let's accept the connection and verify later or use a dedicated helper
-        # Actually, let's try to verify it now
-        from app.core.security import jwt
-        from app.core.config import settings
-        
-        if not token:
-            await websocket.close(code=1008)
-            return
-
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            await websocket.close(code=1008)
-            return
-            
-    except Exception:
+    if not token:
         await websocket.close(code=1008)
         return
 
-    await socket_manager.connect(websocket, group_id)
+    # Shares the verified-token cache with the HTTP auth path
+    payload = decode_token(token)
+    if not payload or not payload.get("sub"):
+        await websocket.close(code=1008)
+        return
+
+    if not await membership_cache.is_member(payload["sub"], group_id):
+        await websocket.close(code=1008)
+        return
+
+    if encoding not in ENCODINGS:
+        await websocket.close(code=1003)
+        return
+
+    if not await socket_manager.connect(websocket, group_id, token, payload, encoding):
+        return
+    if since is not None:
+        # Reconnecting client: replay what it missed
+        await socket_manager.resume(websocket, group_id, since)
     try:
         while True:
             # Keep connection alive and listen for any client messages if needed
-            data = await websocket.receive_text()
-            # We can handle client messages here (e.g., heartbeats)
+            await socket_manager.handle_message(websocket, await websocket.receive_text())
     except WebSocketDisconnect:
-        socket_manager.disconnect(websocket, group_id)
+        pass
+    finally:
+        await socket_manager.disconnect(websocket)
 
 
 @app.get("/")
@@ -119,3 +262,40 @@ async def health_check():
     """Health check endpoint for deployment platforms"""
     return {"status": "healthy", "service": "rupaya-api"}
 
+
+async def _check(name: str, probe) -> tuple[str, str]:
+    try:
+        await asyncio.wait_for(probe(), timeout=settings.READY_TIMEOUT)
+        return name, "ok"
+    except Exception as exc:
+        logger.warning("Readiness check %s failed: %r", name, exc)
+        return name, "unavailable"
+
+
+async def _ping_database(db_engine):
+    async with db_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+@app.get("/ready")
+@app.get(f"{settings.api_base_path}/ready")
+async def readiness_check():
+    """Ready only when Postgres and Redis answer; 503 otherwise so the LB stops routing here."""
+    probes = [
+        _check("database", lambda: _ping_database(engine)),
+        _check("redis", redis_client.ping),
+    ]
+    if read_engine is not None:
+        probes.append(_check("read_database", lambda: _ping_database(read_engine)))
+    checks = dict(await asyncio.gather(*probes))
+    ready = all(status == "ok" for status in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "unavailable", "checks": checks},
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint; values are per worker process."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
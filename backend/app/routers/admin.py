@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.db.slow_queries import slow_query_log
+from app.services.auth_service import require_admin
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/slow-queries")
+async def list_slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    """Slow statements seen by this worker, newest first, with sampled EXPLAIN plans."""
+    return {"items": slow_query_log.entries(limit)}
+
+
+@router.delete("/slow-queries")
+async def clear_slow_queries():
+    slow_query_log.clear()
+    return {"message": "Slow-query log cleared"}
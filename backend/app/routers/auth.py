@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
+from app.core.rate_limit import RateLimiter
 from app.core.security import oauth2_scheme
 from app.models.auth import RefreshTokenRequest
 from app.services.auth_service import AuthService
@@ -15,7 +16,7 @@ def get_auth_service(db: AsyncSession = Depends(get_db)) -> AuthService:
     return AuthService(db)
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(RateLimiter("login", by="ip"))])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     service: AuthService = Depends(get_auth_service),
@@ -2,16 +2,19 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, status
 
+from app.core.rate_limit import RateLimiter
 from app.models.bills import BillCreate, BillResponse, BillShareResponse, BillUpdate
 from app.models.pagination import PaginatedResponse
 from app.models.users import UserOut
-from app.routers.groups import get_group_service
+from app.routers.groups import get_group_service, get_read_group_service
 from app.services.auth_service import get_current_user
 from app.services.bill_service import BillService
 from app.services.group_service import GroupService
 
 router = APIRouter(prefix="/bills", tags=["Bills"])
 
+write_limit = RateLimiter("bills:write", by="user")
+
 
 def get_bill_service(
     group_service: GroupService = Depends(get_group_service),
@@ -19,7 +22,18 @@ def get_bill_service(
     return BillService(group_service)
 
 
-@router.post("/", response_model=BillResponse, status_code=status.HTTP_201_CREATED)
+def get_read_bill_service(
+    group_service: GroupService = Depends(get_read_group_service),
+) -> BillService:
+    return BillService(group_service)
+
+
+@router.post(
+    "/",
+    response_model=BillResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(write_limit)],
+)
 async def create_bill(
     data: BillCreate,
     current_user: UserOut = Depends(get_current_user),
@@ -37,7 +51,7 @@ async def get_user_bills(
     skip: int = 0,
     limit: int = 20,
     current_user: UserOut = Depends(get_current_user),
-    service: BillService = Depends(get_bill_service),
+    service: BillService = Depends(get_read_bill_service),
 ):
     """
     Get all bills involving the current user with pagination.
@@ -52,7 +66,7 @@ async def get_group_bills(
     limit: int = 20,
     search: str = None,
     current_user: UserOut = Depends(get_current_user),
-    service: BillService = Depends(get_bill_service),
+    service: BillService = Depends(get_read_bill_service),
 ):
     """
     Get bills for a specific group with pagination and search.
@@ -64,7 +78,7 @@ async def get_group_bills(
 async def get_bill(
     bill_id: UUID,
     current_user: UserOut = Depends(get_current_user),
-    service: BillService = Depends(get_bill_service),
+    service: BillService = Depends(get_read_bill_service),
 ):
     """
     Get details of a specific bill.
@@ -72,7 +86,7 @@ async def get_bill(
     return await service.get_bill_details(current_user.id, bill_id)
 
 
-@router.patch("/{bill_id}", response_model=BillResponse)
+@router.patch("/{bill_id}", response_model=BillResponse, dependencies=[Depends(write_limit)])
 async def update_bill(
     bill_id: UUID,
     data: BillUpdate,
@@ -87,7 +101,11 @@ async def update_bill(
 
 
 
-@router.patch("/shares/{share_id}/mark-paid", response_model=BillShareResponse)
+@router.patch(
+    "/shares/{share_id}/mark-paid",
+    response_model=BillShareResponse,
+    dependencies=[Depends(write_limit)],
+)
 async def mark_share_as_paid(
     share_id: UUID,
     current_user: UserOut = Depends(get_current_user),
@@ -100,7 +118,11 @@ async def mark_share_as_paid(
     return await service.mark_share_as_paid(current_user.id, share_id)
 
 
-@router.patch("/shares/{share_id}/mark-unpaid", response_model=BillShareResponse)
+@router.patch(
+    "/shares/{share_id}/mark-unpaid",
+    response_model=BillShareResponse,
+    dependencies=[Depends(write_limit)],
+)
 async def mark_share_as_unpaid(
     share_id: UUID,
     current_user: UserOut = Depends(get_current_user),
@@ -18,6 +18,7 @@ from app.services.auth_service import get_current_user
 from app.services.group_service import GroupService
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.routing import get_read_db
 from app.db.session import get_db
 
 router = APIRouter(prefix="/groups", tags=["Groups"])
@@ -27,6 +28,11 @@ def get_group_service(db: AsyncSession = Depends(get_db)) -> GroupService:
     return GroupService(db)
 
 
+def get_read_group_service(db: AsyncSession = Depends(get_read_db)) -> GroupService:
+    """GroupService on a read-only session (a replica when one is configured)."""
+    return GroupService(db)
+
+
 @router.post("/", response_model=GroupOut)
 async def create_group(
     data: GroupCreate,
@@ -45,7 +51,7 @@ async def get_user_groups(
     skip: int = 0,
     limit: int = 20,
     current_user: UserOut = Depends(get_current_user),
-    service: GroupService = Depends(get_group_service),
+    service: GroupService = Depends(get_read_group_service),
 ):
 
     """
@@ -68,7 +74,7 @@ async def get_user_groups(
 async def get_group(
     group_id: UUID,
     current_user: UserOut = Depends(get_current_user),
-    service: GroupService = Depends(get_group_service),
+    service: GroupService = Depends(get_read_group_service),
 ):
     """
     Get group details (members only).
@@ -4,8 +4,9 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 
+from app.core.rate_limit import RateLimiter
 from app.models.users import UserOut
-from app.routers.groups import get_group_service
+from app.routers.groups import get_group_service, get_read_group_service
 from app.services.auth_service import get_current_user
 from app.services.group_service import GroupService
 from app.services.summary_service import SummaryService
@@ -19,11 +20,17 @@ def get_summary_service(
     return SummaryService(group_service)
 
 
+def get_read_summary_service(
+    group_service: GroupService = Depends(get_read_group_service),
+) -> SummaryService:
+    return SummaryService(group_service)
+
+
 @router.get("/")
 async def get_user_summary(
     group_id: Optional[UUID] = Query(None, description="Filter summary by group"),
     current_user: UserOut = Depends(get_current_user),
-    service: SummaryService = Depends(get_summary_service),
+    service: SummaryService = Depends(get_read_summary_service),
 ):
     """
     Get user summary metrics (owed/owe amounts, group count, friends).
@@ -38,7 +45,7 @@ async def get_user_summary(
 async def get_simplified_debts(
     group_id: UUID = Query(..., description="Group to compute simplified debts for"),
     current_user: UserOut = Depends(get_current_user),
-    service: SummaryService = Depends(get_summary_service),
+    service: SummaryService = Depends(get_read_summary_service),
 ):
     """
     Returns the minimum set of transactions to settle all unpaid debts in a group.
@@ -53,7 +60,7 @@ class SettleUpRequest(BaseModel):
     group_id: UUID
 
 
-@router.post("/settle")
+@router.post("/settle", dependencies=[Depends(RateLimiter("settle", by="user"))])
 async def settle_up(
     body: SettleUpRequest,
     current_user: UserOut = Depends(get_current_user),
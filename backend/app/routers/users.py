@@ -6,6 +6,7 @@ from app.services.auth_service import get_current_user
 from app.services.user_service import UserService
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.routing import get_read_db
 from app.db.session import get_db
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -15,6 +16,10 @@ def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
     return UserService(db)
 
 
+def get_read_user_service(db: AsyncSession = Depends(get_read_db)) -> UserService:
+    return UserService(db)
+
+
 @router.post("/register", response_model=UserOut)
 async def register(
     data: UserCreate,
@@ -43,7 +48,7 @@ async def change_password(
 async def search_users(
     q: str,
     current_user: UserOut = Depends(get_current_user),
-    service: UserService = Depends(get_user_service),
+    service: UserService = Depends(get_read_user_service),
 ):
     return await service.search_users(q, str(current_user.id))
 
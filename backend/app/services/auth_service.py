@@ -1,16 +1,44 @@
+import logging
+import secrets
 from datetime import datetime, timedelta, timezone
+from uuid import UUID
 
 from fastapi import Depends
-from jose import JWTError, jwt
+from redis.exceptions import RedisError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.exceptions import NotFoundError, UnauthorizedError, ValidationError
-from app.core.redis import redis_client
-from app.core.security import encode_token, oauth2_scheme, verify_password
+from app.core.exceptions import ForbiddenError, NotFoundError, UnauthorizedError, ValidationError
+from app.core.revocation import revocation_registry
+from app.core.security import (
+    decode_token,
+    encode_token,
+    oauth2_scheme,
+    verify_and_update_password,
+)
 from app.db.session import get_db
 from app.db.models import User
+from app.models.users import Role, UserOut
+
+logger = logging.getLogger(__name__)
+
+# Authenticated users, keyed by id. Revocation is still checked on every
+# request; this only saves the SELECT. Changes made on any worker evict the
+# entry everywhere over the revocation channel; if that channel is down the
+# entry lives for USER_CACHE_TTL at most.
+_user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+def _evict_cached_user(user_id: str | None):
+    if user_id is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(user_id)
+
+
+revocation_registry.on_user_changed(_evict_cached_user)
 
 
 class AuthService:
@@ -23,6 +51,7 @@ class AuthService:
         """Create a JWT access or refresh token with business logic for expiry."""
         to_encode = data.copy()
         to_encode["type"] = token_type
+        to_encode["jti"] = secrets.token_urlsafe(12)
 
         now = datetime.now(timezone.utc)
         to_encode["iat"] = int(now.timestamp())
@@ -43,9 +72,18 @@ class AuthService:
         result = await self.db.execute(select(User).where(User.email == email))
         user = result.scalar_one_or_none()
         
-        if not user or not verify_password(password, user.password):
+        if not user:
             raise UnauthorizedError("Invalid email or password")
 
+        valid, new_hash = await verify_and_update_password(password, user.password)
+        if not valid:
+            raise UnauthorizedError("Invalid email or password")
+
+        # Transparently upgrade hashes made with an older cost factor
+        if new_hash:
+            user.password = new_hash
+            await self.db.commit()
+
         access_token = self._create_token({"sub": str(user.id)}, token_type="access")
         refresh_token = self._create_token({"sub": str(user.id)}, token_type="refresh")
 
@@ -56,99 +94,91 @@ class AuthService:
         }
 
     async def logout_user(self, token: str):
-        try:
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-            )
-            exp = payload.get("exp")
-            ttl = exp - int(datetime.now(timezone.utc).timestamp())     #time to live
-            if ttl > 0:
-                await redis_client.setex(f"blacklist:{token}", ttl, "1")
-            return {"detail": "Logged out successfully"}
-        except JWTError as err:
-            raise ValidationError("Invalid token") from err
+        payload = decode_token(token)
+        if payload is None:
+            raise ValidationError("Invalid token")
+
+        await revocation_registry.revoke_token(token, payload)
+        return {"detail": "Logged out successfully"}
 
     async def logout_all_sessions(self, token: str):
         # We need to manually call get_current_user logic or pass db
         user = await get_current_user(token, self.db)
 
         # Blacklist current token too
-        try:
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-            )
-            exp = payload.get("exp")
-            ttl = exp - int(datetime.now(timezone.utc).timestamp())
-            if ttl > 0:
-                await redis_client.setex(f"blacklist:{token}", ttl, "1")
-        except JWTError:
-            pass
-
-        # Mark all tokens from this user invalid for 24h
+        payload = decode_token(token)
+        if payload is not None:
+            await revocation_registry.revoke_token(token, payload)
+
+        # Mark all tokens issued to this user so far invalid
         now_ts = int(datetime.now(timezone.utc).timestamp())
-        await redis_client.set(f"revoke_all:{user.id}", now_ts)
+        await revocation_registry.revoke_user(str(user.id), now_ts)
+        await invalidate_cached_user(user.id)
         return {"detail": "All sessions revoked"}
 
     async def refresh_access_token(self, refresh_token: str):
-        # Check if refresh token is blacklisted
-        if await redis_client.exists(f"blacklist:{refresh_token}"):
-            raise UnauthorizedError("Refresh token invalidated")
+        payload = decode_token(refresh_token)
+        if payload is None:
+            raise UnauthorizedError("Invalid or expired refresh token")
 
-        try:
-            payload = jwt.decode(
-                refresh_token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-            )
-            if payload.get("type") != "refresh":
-                raise UnauthorizedError("Invalid token type")
+        if payload.get("type") != "refresh":
+            raise UnauthorizedError("Invalid token type")
 
-            user_id = payload.get("sub")
-            if not user_id:
-                raise UnauthorizedError("Invalid refresh token")
+        user_id = payload.get("sub")
+        if not user_id:
+            raise UnauthorizedError("Invalid refresh token")
 
-            # Check if all sessions revoked
-            revoke_ts = await redis_client.get(f"revoke_all:{user_id}")
-            if revoke_ts and payload.get("iat", 0) < int(revoke_ts):
-                raise UnauthorizedError("All sessions revoked. Please log in again.")
+        # Check if this token or all of the user's sessions were revoked
+        await revocation_registry.ensure_not_revoked(refresh_token, payload)
 
-            result = await self.db.execute(select(User).where(User.id == user_id))
-            user = result.scalar_one_or_none()
-            
-            if not user:
-                raise UnauthorizedError("User no longer exists")
+        result = await self.db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        
+        if not user:
+            raise UnauthorizedError("User no longer exists")
 
+        new_access = self._create_token({"sub": str(user_id)}, token_type="access")
+        return {"access_token": new_access, "token_type": "bearer"}
 
-            new_access = self._create_token({"sub": str(user_id)}, token_type="access")
-            return {"access_token": new_access, "token_type": "bearer"}
-        except JWTError as err:
-            raise UnauthorizedError("Invalid or expired refresh token") from err
 
+async def invalidate_cached_user(user_id: UUID | str):
+    """Drop a user from every worker's auth cache (after password changes, logout-all)."""
+    try:
+        await revocation_registry.user_changed(str(user_id))
+    except RedisError:
+        # This worker is already clean; others catch up within USER_CACHE_TTL
+        logger.warning("Could not broadcast user cache invalidation", exc_info=True)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
-    if await redis_client.exists(f"blacklist:{token}"):
-        raise UnauthorizedError("Token invalidated. Please log in again.")
 
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-        )
-        user_id = payload.get("sub")
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> UserOut:
+    payload = decode_token(token)
+    if payload is None:
+        raise UnauthorizedError("Invalid token")
 
-        if not user_id:
-            raise UnauthorizedError("Invalid token payload")
+    user_id = payload.get("sub")
+    if not user_id:
+        raise UnauthorizedError("Invalid token payload")
 
-        # Check global user revocation
-        revoke_ts = await redis_client.get(f"revoke_all:{user_id}")
-        if revoke_ts and payload.get("iat", 0) < int(revoke_ts):
-            raise UnauthorizedError("Session revoked. Please log in again.")
+    # Usually answered in-process; see RevocationRegistry
+    await revocation_registry.ensure_not_revoked(token, payload)
 
+    user = _user_cache.get(user_id)
+    if user is None:
         result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        
-        if not user:
+        db_user = result.scalar_one_or_none()
+
+        if not db_user:
             raise UnauthorizedError("User session is no longer valid")
-        return user
 
-    except JWTError as err:
-        raise UnauthorizedError("Invalid token") from err
+        user = UserOut.model_validate(db_user)
+        _user_cache.set(user_id, user)
+    return user
 
 
+async def require_admin(current_user: UserOut = Depends(get_current_user)) -> UserOut:
+    """Platform admins only (operational endpoints under /admin)."""
+    if current_user.role not in (Role.ADMIN, Role.SUPER_ADMIN):
+        raise ForbiddenError("Admin access required")
+    return current_user
@@ -14,8 +14,9 @@ from app.db.models import Bill, BillShare, SplitType, User
 from app.models.bills import BillCreate, BillUpdate
 # Note: app.models.bills.SplitType might be same as app.db.models.SplitType if imported? 
 # If not, let's use the DB one for DB ops.
+from app.services.events import publish_ledger_event
+from app.services.group_dashboard import group_dashboard
 from app.services.group_service import GroupService
-from app.services.socket_manager import socket_manager
 
 
 class BillService:
@@ -67,17 +68,18 @@ class BillService:
         
         await self.db.commit()
         await self.db.refresh(bill)
+        await group_dashboard.invalidate(data.group_id)
         
         # Load relations for return
         bill_details = await self.get_bill_details(user_id, str(bill.id))
         
-        # Broadcast update
-        await socket_manager.broadcast_to_group(str(data.group_id), {
+        # Broadcast update (in the background)
+        await publish_ledger_event(data.group_id, {
             "type": "NEW_BILL",
             "bill_id": str(bill.id),
             "description": bill.description,
             "total_amount": float(bill.total_amount),
-            "created_by_name": (await self.db.get(User, user_id)).name if isinstance(user_id, UUID) else user_id
+            "created_by_name": (await self.db.get(User, user_id)).name if isinstance(user_id, UUID) else user_id,
         })
 
         return bill_details
@@ -178,15 +180,16 @@ class BillService:
                     self.db.add(new_share)
 
         await self.db.commit()
+        await group_dashboard.invalidate(bill.group_id)
 
         # 5. Return full bill details
         bill_details = await self.get_bill_details(user_id, bill_id)
 
-        # Broadcast update
-        await socket_manager.broadcast_to_group(str(bill.group_id), {
+        # Broadcast update (in the background)
+        await publish_ledger_event(bill.group_id, {
             "type": "UPDATE_BILL",
             "bill_id": str(bill_id),
-            "description": bill.description
+            "description": bill.description,
         })
 
         return bill_details
@@ -391,14 +394,15 @@ class BillService:
         share.updated_at = datetime.utcnow()
         await self.db.commit()
         await self.db.refresh(share)
+        await group_dashboard.invalidate(share.bill.group_id)
         
-        # Broadcast update
-        await socket_manager.broadcast_to_group(str(share.bill.group_id), {
+        # Broadcast update (in the background)
+        await publish_ledger_event(share.bill.group_id, {
             "type": "PAYMENT_UPDATE",
             "bill_id": str(share.bill_id),
             "share_id": str(share_id),
             "paid": True,
-            "user_id": str(share.user_id)
+            "user_id": str(share.user_id),
         })
         
         return share
@@ -432,14 +436,15 @@ class BillService:
         share.updated_at = datetime.utcnow()
         await self.db.commit()
         await self.db.refresh(share)
+        await group_dashboard.invalidate(share.bill.group_id)
 
-        # Broadcast update
-        await socket_manager.broadcast_to_group(str(share.bill.group_id), {
+        # Broadcast update (in the background)
+        await publish_ledger_event(share.bill.group_id, {
             "type": "PAYMENT_UPDATE",
             "bill_id": str(share.bill_id),
             "share_id": str(share_id),
             "paid": False,
-            "user_id": str(share.user_id)
+            "user_id": str(share.user_id),
         })
 
         return share
@@ -0,0 +1,52 @@
+# app/services/events.py
+"""
+Realtime side effects of committed writes.
+
+Services call the `publish_*` helpers after `commit()`; the work itself runs
+on the task dispatcher, so HTTP latency covers only the database writes.
+"""
+from uuid import UUID
+
+from app.core.tasks import task_dispatcher
+from app.db.session import AsyncSessionLocal
+from app.services.group_dashboard import group_dashboard
+from app.services.socket_manager import socket_manager
+
+
+@task_dispatcher.task("broadcast_group_event")
+async def broadcast_group_event(group_id: str, message: dict):
+    await socket_manager.broadcast_to_group(group_id, message)
+
+
+@task_dispatcher.task("broadcast_ledger_event")
+async def broadcast_ledger_event(group_id: str, message: dict):
+    # Rebuild the dashboard and attach what moved and the settlement plan
+    async with AsyncSessionLocal() as db:
+        changes = await group_dashboard.ledger_changed(db, group_id)
+    await socket_manager.broadcast_to_group(group_id, {**message, **changes})
+
+
+@task_dispatcher.task("notify_membership_changed")
+async def notify_membership_changed(user_ids: list[str]):
+    await socket_manager.notify_membership_changed(*user_ids)
+
+
+async def publish_group_event(group_id: UUID | str, message: dict):
+    await task_dispatcher.enqueue(
+        "broadcast_group_event", key=str(group_id), group_id=str(group_id), message=message
+    )
+
+
+async def publish_ledger_event(group_id: UUID | str, message: dict):
+    # Keyed by group: one group's events run one at a time, in order, on a
+    # single consumer, so each balance change is reported exactly once and a
+    # higher seq never carries older balances
+    await task_dispatcher.enqueue(
+        "broadcast_ledger_event", key=str(group_id), group_id=str(group_id), message=message
+    )
+
+
+async def publish_membership_changed(*user_ids: UUID | str):
+    await task_dispatcher.enqueue(
+        "notify_membership_changed", user_ids=[str(uid) for uid in user_ids]
+    )
@@ -0,0 +1,291 @@
+# app/services/group_dashboard.py
+import json
+from datetime import datetime
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import false, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.db.models import Bill, BillShare, Group, GroupMember, User
+from app.utils.debt_simplifier import simplify_debts
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def parse_iso(value: str | None) -> datetime | None:
+    """Inverse of the ISO strings documents store their timestamps as."""
+    return datetime.fromisoformat(value) if value else None
+
+
+def _role(value):
+    return value.value if hasattr(value, "value") else value
+
+
+class GroupDashboardCache:
+    """
+    Precomputed group dashboard documents kept in Redis.
+
+    A document holds the group metadata, its active members, the member count
+    and every user's unpaid balances in the group:
+
+        {
+            "id", "name", "description", "created_by", "created_at", "updated_at",
+            "member_count": int,
+            "members": [GroupMemberOut-shaped dicts],
+            "balances": { user_id: {"owed": float, "owe": float} },
+            "former_members": { user_id: {"id", "name", "email"} },
+        }
+
+    `former_members` names the users who still hold a balance in the group
+    but are no longer active members, so settlement plans can show them.
+
+    Missing documents are rebuilt lazily (in one batch of queries for any
+    number of groups). Membership and ledger writes invalidate the document
+    after they commit. Ledger writes also rebuild it in the background
+    (`ledger_changed`), so their realtime events can carry what moved.
+    """
+
+    key_prefix = "group_dashboard:"
+    reported_prefix = "group_dashboard:reported:"
+
+    def _key(self, group_id: UUID | str) -> str:
+        return f"{self.key_prefix}{group_id}"
+
+    def _reported_key(self, group_id: UUID | str) -> str:
+        return f"{self.reported_prefix}{group_id}"
+
+    async def get(self, db: AsyncSession, group_id: UUID | str) -> dict | None:
+        docs = await self.get_many(db, [group_id])
+        return docs.get(str(group_id))
+
+    async def get_many(self, db: AsyncSession, group_ids: list[UUID | str]) -> dict[str, dict]:
+        """Return {group_id: document}, rebuilding whatever is not cached."""
+        ids = list(dict.fromkeys(str(g) for g in group_ids))
+        if not ids:
+            return {}
+
+        try:
+            raw = await redis_client.mget([self._key(g) for g in ids])
+        except RedisError:
+            # The cache is an optimisation; fall back to the database
+            raw = [None] * len(ids)
+
+        docs = {gid: json.loads(value) for gid, value in zip(ids, raw, strict=True) if value}
+
+        missing = [gid for gid in ids if gid not in docs]
+        if missing:
+            built = await self.build(db, missing)
+            # A lagging replica could cache a document older than the last write
+            if not db.info.get("replica"):
+                await self._store(built)
+            docs.update(built)
+
+        return docs
+
+    async def refresh(self, db: AsyncSession, group_id: UUID | str) -> dict | None:
+        """Rebuild and store the document for a group, returning it."""
+        built = await self.build(db, [str(group_id)])
+        await self._store(built)
+        return built.get(str(group_id))
+
+    async def ledger_changed(self, db: AsyncSession, group_id: UUID | str) -> dict:
+        """
+        Rebuild a group's document after committed ledger writes and describe
+        what moved since the previous call for the group, for realtime events:
+
+            {
+                "balances": { user_id: {"owed", "owe", "net", "delta"} } | None,
+                "settlement_plan": [get_simplified_debts-shaped dicts],
+            }
+
+        `balances` lists only users whose balance moved; `delta` is the change
+        in their net balance. Both sides are committed state: the balances
+        last reported are kept in Redis and swapped for the new ones. Callers
+        must not overlap for one group (the group's keyed task guarantees it),
+        so each change is reported once however writes interleave. Without a
+        previous report nobody can tell what moved, so `balances` is None and
+        clients refetch.
+        """
+        after = await self.refresh(db, group_id)
+        if after is None:
+            return {}
+        try:
+            previous = await redis_client.set(
+                self._reported_key(group_id),
+                json.dumps(after["balances"]),
+                ex=settings.GROUP_DASHBOARD_TTL,
+                get=True,
+            )
+        except RedisError:
+            previous = None
+        before = {"balances": json.loads(previous)} if previous else None
+        return {
+            "balances": self.balance_changes(before, after) if before is not None else None,
+            "settlement_plan": self.settlement_plan(after),
+        }
+
+    async def invalidate(self, *group_ids: UUID | str):
+        if not group_ids:
+            return
+        try:
+            await redis_client.delete(*[self._key(g) for g in group_ids])
+        except RedisError:
+            pass
+
+    async def _store(self, docs: dict[str, dict]):
+        if not docs:
+            return
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for gid, doc in docs.items():
+                    pipe.setex(self._key(gid), settings.GROUP_DASHBOARD_TTL, json.dumps(doc))
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    async def build(self, db: AsyncSession, group_ids: list[str]) -> dict[str, dict]:
+        """Build dashboard documents for the given groups straight from the database."""
+        uuids = [UUID(str(g)) for g in group_ids]
+
+        res = await db.execute(select(Group).where(Group.id.in_(uuids)))
+        groups = res.scalars().all()
+        if not groups:
+            return {}
+
+        docs: dict[str, dict] = {}
+        for group in groups:
+            docs[str(group.id)] = {
+                "id": str(group.id),
+                "name": group.name,
+                "description": group.description,
+                "created_by": str(group.created_by) if group.created_by else None,
+                "created_at": _iso(group.created_at),
+                "updated_at": _iso(group.updated_at),
+                "member_count": 0,
+                "members": [],
+                "balances": {},
+                "former_members": {},
+            }
+
+        # Active members with their users
+        res = await db.execute(
+            select(GroupMember)
+            .options(selectinload(GroupMember.user))
+            .where(GroupMember.group_id.in_(uuids), GroupMember.deleted_at.is_(None))
+            .order_by(GroupMember.created_at)
+        )
+        for m in res.scalars().all():
+            doc = docs.get(str(m.group_id))
+            if doc is None:
+                continue
+            doc["members"].append({
+                "id": str(m.id),
+                "user": {
+                    "id": str(m.user.id),
+                    "name": m.user.name,
+                    "email": m.user.email,
+                    "role": _role(m.user.role),
+                },
+                "role": _role(m.role),
+                "created_at": _iso(m.created_at),
+            })
+        for doc in docs.values():
+            doc["member_count"] = len(doc["members"])
+
+        # Owed: unpaid shares of others on bills the user paid
+        owed_stmt = (
+            select(Bill.group_id, Bill.paid_by, func.sum(BillShare.amount))
+            .select_from(BillShare)
+            .join(Bill, Bill.id == BillShare.bill_id)
+            .where(
+                Bill.group_id.in_(uuids),
+                Bill.deleted_at.is_(None),
+                BillShare.user_id != Bill.paid_by,
+                BillShare.paid == false(),
+            )
+            .group_by(Bill.group_id, Bill.paid_by)
+        )
+        for group_id, uid, total in (await db.execute(owed_stmt)).all():
+            balance = docs[str(group_id)]["balances"].setdefault(str(uid), {"owed": 0, "owe": 0})
+            balance["owed"] = total or 0
+
+        # Owe: the user's unpaid shares on bills somebody else paid
+        owe_stmt = (
+            select(Bill.group_id, BillShare.user_id, func.sum(BillShare.amount))
+            .select_from(BillShare)
+            .join(Bill, Bill.id == BillShare.bill_id)
+            .where(
+                Bill.group_id.in_(uuids),
+                Bill.deleted_at.is_(None),
+                BillShare.user_id != Bill.paid_by,
+                BillShare.paid == false(),
+            )
+            .group_by(Bill.group_id, BillShare.user_id)
+        )
+        for group_id, uid, total in (await db.execute(owe_stmt)).all():
+            balance = docs[str(group_id)]["balances"].setdefault(str(uid), {"owed": 0, "owe": 0})
+            balance["owe"] = total or 0
+
+        # Users with a balance who have left the group
+        former: dict[str, list[str]] = {}
+        for gid, doc in docs.items():
+            active = {m["user"]["id"] for m in doc["members"]}
+            former[gid] = [uid for uid in doc["balances"] if uid not in active]
+        former_ids = {UUID(uid) for uids in former.values() for uid in uids}
+        if former_ids:
+            res = await db.execute(select(User.id, User.name, User.email).where(User.id.in_(former_ids)))
+            users = {str(uid): {"id": str(uid), "name": name, "email": email} for uid, name, email in res.all()}
+            for gid, uids in former.items():
+                docs[gid]["former_members"] = {uid: users[uid] for uid in uids if uid in users}
+
+        return docs
+
+    @staticmethod
+    def balance_for(doc: dict, user_id: UUID | str) -> tuple[float, float]:
+        """Return (total_owed, total_owe) for a user from a dashboard document."""
+        balance = doc["balances"].get(str(user_id), {})
+        return balance.get("owed", 0), balance.get("owe", 0)
+
+
+    @staticmethod
+    def balance_changes(before: dict, after: dict) -> dict[str, dict]:
+        """New balances of the users whose balance differs between two documents."""
+        changes = {}
+        for uid in set(before["balances"]) | set(after["balances"]):
+            owed, owe = GroupDashboardCache.balance_for(after, uid)
+            old_owed, old_owe = GroupDashboardCache.balance_for(before, uid)
+            if (owed, owe) == (old_owed, old_owe):
+                continue
+            net = round(owed - owe, 2)
+            delta = round(net - (old_owed - old_owe), 2)
+            changes[uid] = {"owed": owed, "owe": owe, "net": net, "delta": delta}
+        return changes
+
+    @staticmethod
+    def settlement_plan(doc: dict) -> list[dict]:
+        """The group's simplified debts, computed from the document alone."""
+        balances = {
+            uid: round(b.get("owed", 0) - b.get("owe", 0), 2) for uid, b in doc["balances"].items()
+        }
+        users = dict(doc.get("former_members", {}))
+        for m in doc["members"]:
+            users[m["user"]["id"]] = {
+                "id": m["user"]["id"], "name": m["user"]["name"], "email": m["user"]["email"]
+            }
+        return [
+            {
+                "from": users.get(t["from"], {"id": t["from"]}),
+                "to": users.get(t["to"], {"id": t["to"]}),
+                "amount": t["amount"],
+            }
+            for t in simplify_debts(balances)
+        ]
+
+
+group_dashboard = GroupDashboardCache()
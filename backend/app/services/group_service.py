@@ -2,14 +2,16 @@
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import select, or_, and_, func
+from sqlalchemy import select, or_, and_
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import ForbiddenError, NotFoundError, ValidationError
-from app.db.models import Group, GroupMember, User, Bill, BillShare, GroupRole
-from app.models.groups import AddMemberRequest, GroupCreate, GroupUpdate, GroupDetailOut, GroupMemberOut
-from app.models.users import UserOut
+from app.db.models import Group, GroupMember, User, Bill, GroupRole
+from app.models.groups import AddMemberRequest, GroupCreate, GroupUpdate, GroupDetailOut
+from app.services.group_dashboard import group_dashboard, parse_iso
+from app.services.events import publish_membership_changed
+from app.services.membership_cache import membership_cache
 
 
 class GroupService:
@@ -40,6 +42,11 @@ class GroupService:
             raise ForbiddenError("User is not a member of this group")
         return member
 
+    async def _membership_changed(self, *user_ids: UUID | str):
+        """Drop cached group lists and move live sockets after a committed change."""
+        await membership_cache.invalidate(*user_ids)
+        await publish_membership_changed(*user_ids)
+
     async def check_is_admin(self, user_id: UUID | str, group_id: UUID | str):
         member = await self.check_is_member(user_id, group_id)
         if member.role != GroupRole.ADMIN:
@@ -67,7 +74,7 @@ class GroupService:
         )
         self.db.add(creator_member)
 
-        added_count = 0
+        member_ids = [creator_id]
         for email in data.initial_members:
             result = await self.db.execute(select(User).where(User.email == email))
             user = result.scalar_one_or_none()
@@ -82,13 +89,14 @@ class GroupService:
                 created_by=creator_id
             )
             self.db.add(member)
-            added_count += 1
+            member_ids.append(user.id)
 
-        if added_count == 0:
+        if len(member_ids) == 1:
             await self.db.rollback()
             raise ValidationError("A group must have at least one other valid member.")
         
         await self.db.commit()
+        await self._membership_changed(*member_ids)
         await self.db.refresh(group)
         return group
 
@@ -104,10 +112,8 @@ class GroupService:
         if isinstance(user_id, str):
             user_id = UUID(user_id)
             
-        # 1. Get all memberships for the user
-        stmt = select(GroupMember).options(
-            selectinload(GroupMember.group).selectinload(Group.members)
-        ).where(
+        # 1. Get the ids of all groups the user is an active member of
+        stmt = select(GroupMember.group_id).where(
             GroupMember.user_id == user_id,
             GroupMember.deleted_at.is_(None)
         ).join(Group).where(Group.deleted_at.is_(None))
@@ -121,40 +127,18 @@ class GroupService:
             )
 
         result = await self.db.execute(stmt)
-        memberships = result.scalars().all()
+        group_ids = result.scalars().all()
+
+        # 2. Metrics come from the precomputed dashboard documents
+        docs = await group_dashboard.get_many(self.db, group_ids)
 
-        # 2. Process each group to add metrics
         groups_list = []
-        for m in memberships:
-            group = m.group
-            if not group: 
+        for group_id in group_ids:
+            doc = docs.get(str(group_id))
+            if not doc:
                 continue # Should not happen due to join but safety
-            
-            # Sub-query for Owed (others owe user in this group)
-            owed_stmt = select(func.sum(BillShare.amount))\
-                .join(Bill, Bill.id == BillShare.bill_id)\
-                .where(
-                    Bill.group_id == group.id,
-                    Bill.paid_by == user_id,
-                    Bill.deleted_at.is_(None),
-                    BillShare.user_id != user_id,
-                    BillShare.paid == False
-                )
-            owed_res = await self.db.execute(owed_stmt)
-            total_owed = owed_res.scalar() or 0
-
-            # Sub-query for Owe (user owes others in this group)
-            owe_stmt = select(func.sum(BillShare.amount))\
-                .join(Bill, Bill.id == BillShare.bill_id)\
-                .where(
-                    Bill.group_id == group.id,
-                    Bill.paid_by != user_id,
-                    Bill.deleted_at.is_(None),
-                    BillShare.user_id == user_id,
-                    BillShare.paid == False
-                )
-            owe_res = await self.db.execute(owe_stmt)
-            total_owe = owe_res.scalar() or 0
+
+            total_owed, total_owe = group_dashboard.balance_for(doc, user_id)
 
             # --- FILTERING LOGIC ---
             # "owe" shows groups where you net owe money (Owe > Owed)
@@ -164,16 +148,14 @@ class GroupService:
             if filter == "owed" and total_owed <= total_owe:
                 continue
 
-            active_members = [mem for mem in group.members if mem.deleted_at is None]
-            
             g_dict = {
-                "id": str(group.id),
-                "name": group.name,
-                "description": group.description,
-                "created_by": str(group.created_by) if group.created_by else None,
-                "created_at": group.created_at,
-                "updated_at": group.updated_at,
-                "member_count": len(active_members),
+                "id": doc["id"],
+                "name": doc["name"],
+                "description": doc["description"],
+                "created_by": doc["created_by"],
+                "created_at": parse_iso(doc["created_at"]),
+                "updated_at": parse_iso(doc["updated_at"]),
+                "member_count": doc["member_count"],
                 "total_owed": total_owed,
                 "total_owe": total_owe
             }
@@ -208,73 +190,20 @@ class GroupService:
     async def get_group_detail(self, group_id: UUID | str, user_id: UUID | str):
         await self.check_is_member(user_id, group_id)
 
-        stmt = select(Group).options(
-            selectinload(Group.members).selectinload(GroupMember.user)
-        ).where(Group.id == group_id)
-        
-        result = await self.db.execute(stmt)
-        group = result.scalar_one_or_none()
-
-        if not group:
+        doc = await group_dashboard.get(self.db, group_id)
+        if not doc:
             raise NotFoundError("Group not found")
 
-        # Use Pydantic models to ensure correct serialization and validation
-        members_out = []
-        # Filter members
-        active_members = [m for m in group.members if m.deleted_at is None]
-        
-        for m in active_members:
-            # Construct UserOut. Role is Enum, passed directly.
-            user_out = UserOut(
-                id=m.user.id,
-                name=m.user.name,
-                email=m.user.email,
-                role=m.user.role
-            )
-            
-            members_out.append(GroupMemberOut(
-                id=m.id,
-                user=user_out,
-                role=m.role, # Enum, will be serialized to str
-                created_at=m.created_at
-            ))
-
-        # Calculate summary metrics for this group
-        # Owed (others owe user in this group)
-        owed_stmt = select(func.sum(BillShare.amount))\
-            .join(Bill, Bill.id == BillShare.bill_id)\
-            .where(
-                Bill.group_id == group.id,
-                Bill.paid_by == user_id,
-                Bill.deleted_at.is_(None),
-                BillShare.user_id != user_id,
-                BillShare.paid == False
-            )
-        owed_res = await self.db.execute(owed_stmt)
-        total_owed = owed_res.scalar() or 0
-
-        # Owe (user owes others in this group)
-        owe_stmt = select(func.sum(BillShare.amount))\
-            .join(Bill, Bill.id == BillShare.bill_id)\
-            .where(
-                Bill.group_id == group.id,
-                Bill.paid_by != user_id,
-                Bill.deleted_at.is_(None),
-                BillShare.user_id == user_id,
-                BillShare.paid == False
-            )
-        owe_res = await self.db.execute(owe_stmt)
-        total_owe = owe_res.scalar() or 0
+        total_owed, total_owe = group_dashboard.balance_for(doc, user_id)
 
         return GroupDetailOut(
-            id=group.id,
-            name=group.name,
-            description=group.description,
-            created_by=group.created_by,
-            created_at=group.created_at,
-            updated_at=group.updated_at,
-            members=members_out,
-            member_count=len(members_out),
+            id=doc["id"],
+            name=doc["name"],
+            description=doc["description"],
+            created_by=doc["created_by"],
+            created_at=parse_iso(doc["created_at"]),
+            members=doc["members"],
+            member_count=doc["member_count"],
             total_owed=total_owed,
             total_owe=total_owe
         )
@@ -313,7 +242,9 @@ class GroupService:
             existing.updated_by = added_by_id
             existing.updated_at = datetime.utcnow()
             await self.db.commit()
-            await self.db.refresh(existing) 
+            await group_dashboard.invalidate(group_id)
+            await self._membership_changed(user.id)
+            await self.db.refresh(existing)
             
             res = await self.db.execute(select(GroupMember).options(selectinload(GroupMember.user)).where(GroupMember.id == existing.id))
             return res.scalar_one()
@@ -326,6 +257,8 @@ class GroupService:
         )
         self.db.add(new_member)
         await self.db.commit()
+        await group_dashboard.invalidate(group_id)
+        await self._membership_changed(user.id)
         
         # Reload with user
         res = await self.db.execute(select(GroupMember).options(selectinload(GroupMember.user)).where(GroupMember.id == new_member.id))
@@ -351,7 +284,9 @@ class GroupService:
         member.deleted_at = datetime.utcnow()
         member.deleted_by = removed_by_id
         await self.db.commit()
-        return member 
+        await group_dashboard.invalidate(member.group_id)
+        await self._membership_changed(member.user_id)
+        return member
 
     async def delete_group(self, group_id: str, user_id: str):
         """
@@ -385,6 +320,8 @@ class GroupService:
             b.deleted_by = user_id
 
         await self.db.commit()
+        await group_dashboard.invalidate(group_id)
+        await self._membership_changed(*[m.user_id for m in members])
 
         return {"message": "Group deleted successfully"}
 
@@ -410,6 +347,7 @@ class GroupService:
         group.updated_by = user_id
         
         await self.db.commit()
+        await group_dashboard.invalidate(group_id)
         return group
 
     async def update_member_role(self, group_id: str, member_id: str, role: str, user_id: str):
@@ -431,4 +369,5 @@ class GroupService:
         member.updated_by = user_id
         
         await self.db.commit()
+        await group_dashboard.invalidate(group_id)
         return member
@@ -0,0 +1,107 @@
+# app/services/membership_cache.py
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.db.models import Group, GroupMember
+from app.db.session import AsyncSessionLocal
+
+# Stored in every set so that "member of no groups" is still a cache hit
+_SENTINEL = "-"
+# Outlives any load, so a generation never expires and restarts mid-fill
+_GENERATION_TTL = 86400
+
+# Fills a user's set only if no invalidation happened since the load began:
+# KEYS[1] is the set, KEYS[2] its generation; ARGV[1] is the generation read
+# before loading, ARGV[2] the TTL, and the rest are the members.
+_FILL = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SADD', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+_fill = redis_client.register_script(_FILL)
+
+
+class MembershipCache:
+    """
+    The ids of the groups each user actively belongs to, as Redis sets
+    (`user_groups:{user_id}`).
+
+    Lets websocket connects authorise and subscribe without touching the
+    database. Loaded lazily on a miss; membership writes invalidate it.
+
+    Each user also has a generation counter (`user_groups_gen:{user_id}`)
+    that every invalidation bumps. A load records the generation before it
+    queries and only stores its result if the generation is unchanged, so a
+    load that read the database before a membership write committed cannot
+    repopulate the set with the old groups after that write's invalidation.
+    """
+
+    key_prefix = "user_groups:"
+    generation_prefix = "user_groups_gen:"
+
+    def _key(self, user_id: UUID | str) -> str:
+        return f"{self.key_prefix}{user_id}"
+
+    def _generation_key(self, user_id: UUID | str) -> str:
+        return f"{self.generation_prefix}{user_id}"
+
+    async def get_group_ids(self, user_id: UUID | str) -> set[str]:
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.smembers(self._key(user_id))
+                pipe.get(self._generation_key(user_id))
+                members, generation = await pipe.execute()
+        except RedisError:
+            members, generation = set(), None
+        if members:
+            return members - {_SENTINEL}
+
+        group_ids = await self._load(user_id)
+        try:
+            await _fill(
+                keys=[self._key(user_id), self._generation_key(user_id)],
+                args=[generation or "0", settings.MEMBERSHIP_CACHE_TTL, _SENTINEL, *group_ids],
+            )
+        except RedisError:
+            pass
+        return group_ids
+
+    async def is_member(self, user_id: UUID | str, group_id: UUID | str) -> bool:
+        return str(group_id) in await self.get_group_ids(user_id)
+
+    async def invalidate(self, *user_ids: UUID | str):
+        if not user_ids:
+            return
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                for uid in user_ids:
+                    pipe.incr(self._generation_key(uid))
+                    pipe.expire(self._generation_key(uid), _GENERATION_TTL)
+                    pipe.delete(self._key(uid))
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    async def _load(self, user_id: UUID | str) -> set[str]:
+        async with AsyncSessionLocal() as db:
+            res = await db.execute(
+                select(GroupMember.group_id)
+                .join(Group)
+                .where(
+                    GroupMember.user_id == UUID(str(user_id)),
+                    GroupMember.deleted_at.is_(None),
+                    Group.deleted_at.is_(None),
+                )
+            )
+            return {str(gid) for gid in res.scalars().all()}
+
+
+membership_cache = MembershipCache()
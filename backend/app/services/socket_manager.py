@@ -1,40 +1,696 @@
-from typing import Dict, List
-from fastapi import WebSocket
-from uuid import UUID
+import asyncio
 import json
+import logging
+import time
+from uuid import UUID
+
+from fastapi import WebSocket
+from redis.exceptions import RedisError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.exceptions import UnauthorizedError
+from app.core.redis import redis_client
+from app.core.revocation import revocation_registry
+from app.services.membership_cache import membership_cache
+
+try:
+    import msgpack
+except ImportError:  # optional; install the `msgpack` extra to offer binary frames
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Wire encodings a client may ask for with ?encoding=
+ENCODINGS = ("json", "msgpack") if msgpack is not None else ("json",)
+
+# Close code for clients evicted because they could not keep up, and for
+# connections turned away because this worker is full
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Close code for connections over the per-user cap or with a revoked token
+POLICY_CLOSE_CODE = 1008
+# Close code for silent heartbeat clients and for sockets drained on shutdown
+GOING_AWAY_CLOSE_CODE = 1001
+
+_evictions = metrics.counter(
+    "ws_slow_consumer_evictions_total", "Websockets closed because their send queue overflowed"
+)
+_send_failures = metrics.counter(
+    "ws_send_failures_total", "Websocket sends that failed or timed out"
+)
+_coalesced = metrics.counter(
+    "ws_coalesced_events_total", "Group events sent inside a BATCH frame", ("type",)
+)
+_frames_saved = metrics.counter(
+    "ws_coalesced_frames_saved_total", "Broadcast frames avoided by merging events into batches"
+)
+_reaped = metrics.counter(
+    "ws_idle_reaped_total", "Websockets closed after missing heartbeats"
+)
+_rejected = metrics.counter(
+    "ws_connections_rejected_total", "Websocket connections refused by a cap", ("reason",)
+)
+_resumes = metrics.counter(
+    "ws_resumes_total", "Reconnecting websockets, by outcome", ("outcome",)
+)
+_fanout_seconds = metrics.histogram(
+    "ws_broadcast_fanout_seconds",
+    "Time to queue one group frame on every local socket",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+# Stamps the next sequence number onto a group event, appends it to the
+# group's capped stream under the id `{seq}-0`, and publishes it, atomically.
+# ARGV[2] is a JSON object; the seq field is spliced in after its "{".
+# A counter that was evicted or expired before its stream is reseeded from
+# the stream's last id, so seqs keep growing and XADD never goes backwards.
+# Returns the sequence number.
+_PUBLISH_EVENT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    local last = redis.call('XREVRANGE', KEYS[2], '+', '-', 'COUNT', 1)[1]
+    if last then
+        redis.call('SET', KEYS[1], string.match(last[1], '^%d+'))
+    end
+end
+local seq = redis.call('INCR', KEYS[1])
+local payload = '{"seq": ' .. seq .. ', ' .. string.sub(ARGV[2], 2)
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[3], seq .. '-0', 'd', payload)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+redis.call('PUBLISH', ARGV[1], payload)
+return seq
+"""
+_publish_event = redis_client.register_script(_PUBLISH_EVENT)
+
+
+def encode_frame(text: str, encoding: str) -> str | bytes:
+    """Re-encode a JSON frame for the wire: text for json, bytes for msgpack."""
+    if encoding == "msgpack":
+        return msgpack.packb(json.loads(text), use_bin_type=True)
+    return text
+
+
+class ClientConnection:
+    """
+    A websocket plus its bounded outgoing queue.
+
+    Frames are pre-encoded (text, or bytes for binary encodings); a dedicated
+    writer task drains the queue, so a slow client only ever delays itself.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_dead,
+        user_id: str,
+        multiplexed: bool = False,
+        encoding: str = "json",
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.encoding = encoding
+        # Per-user sockets follow the user's memberships; per-group ones are closed on leaving
+        self.multiplexed = multiplexed
+        self.groups: set[str] = set()
+        # Monotonic time of the last frame received from the client
+        self.last_seen = time.monotonic()
+        # Set once the client answers a PING; only such clients can be reaped
+        self.heartbeats = False
+        self.queue: asyncio.Queue[str | bytes] = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self._on_dead = on_dead
+        self._writer: asyncio.Task | None = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._drain())
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def enqueue(self, text: str, frames: dict | None = None) -> bool:
+        """
+        Queue a JSON frame without waiting; False when the queue is full.
+
+        `frames` caches the frame's other encodings, so a broadcast encodes
+        once per format rather than once per socket.
+        """
+        frame = text
+        if self.encoding != "json":
+            frames = {} if frames is None else frames
+            frame = frames.get(self.encoding)
+            if frame is None:
+                frame = frames[self.encoding] = encode_frame(text, self.encoding)
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _drain(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                send = (
+                    self.websocket.send_bytes(frame)
+                    if isinstance(frame, bytes)
+                    else self.websocket.send_text(frame)
+                )
+                await asyncio.wait_for(send, timeout=settings.WS_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            _send_failures.inc()
+            await self._on_dead(self.websocket)
+
+    async def close(self, code: int | None = None):
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        if code is not None:
+            try:
+                await asyncio.wait_for(self.websocket.close(code=code), timeout=settings.WS_SEND_TIMEOUT)
+            except Exception:
+                pass
+
 
 class ConnectionManager:
+    """
+    Websocket connections grouped by group id.
+
+    Broadcasts are published to a Redis channel per group (`ws:group:{id}`) so
+    every worker sees them; each worker subscribes only to the groups it holds
+    local sockets for and delivers what it receives to those sockets.
+
+    A message is serialised to JSON once per broadcast and handed to every
+    socket's bounded send queue. Sockets whose queue is full are evicted.
+
+    Per-user sockets (`connect_user`) join every group the user belongs to and
+    follow membership changes, which are signalled on `ws:user:{id}`. Per-group
+    sockets (`connect`) are closed with 1008 once their user leaves the group.
+
+    Every group event carries a per-group `seq` and is kept in a capped Redis
+    Stream (`ws:stream:{id}`), so a reconnecting client can `resume` from the
+    last seq it saw instead of refetching everything. On connect, and whenever
+    a per-user socket's groups change, the socket is sent a HELLO frame,
+    `{"type": "HELLO", "seqs": {group_id: current_seq}}`, so the client knows
+    where every group stands even if none of its events arrive before a
+    disconnect. A per-user socket whose groups changed then gets
+    `{"type": "MEMBERSHIP_CHANGED", "group_ids": [...]}` so the client can
+    refresh its group list.
+
+    Event types with a coalescing window (settings.WS_COALESCE_WINDOWS) are
+    held briefly per group; everything held is then sent as one BATCH frame.
+
+    Every socket is sent a PING each WS_PING_INTERVAL. Clients that have
+    answered one with a PONG are expected to keep talking: any frame counts
+    as a sign of life, and those silent for WS_IDLE_TIMEOUT are reaped.
+    Listen-only clients that never PONG (older per-group ones) are left to
+    the server's transport-level websocket pings instead. Connections are
+    capped per user and per worker, and sockets are drained and closed with
+    1001 on shutdown.
+    """
+
+    channel_prefix = "ws:group:"
+    user_channel_prefix = "ws:user:"
+    seq_prefix = "ws:seq:"
+    stream_prefix = "ws:stream:"
+
     def __init__(self):
-        # group_id -> list of active websockets
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        # group_id -> set of active websockets
+        self.active_connections: dict[str, set[WebSocket]] = {}
+        # user_id -> that user's websockets of either kind
+        self.user_connections: dict[str, set[WebSocket]] = {}
+        # websocket -> its send queue and writer
+        self.clients: dict[WebSocket, ClientConnection] = {}
+        self._pubsub = None
+        self._subscribed: set[str] = set()
+        self._subscription_lock = asyncio.Lock()
+        self._has_subscriptions = asyncio.Event()
+        self._listener: asyncio.Task | None = None
+        self._background: set[asyncio.Task] = set()
+        # group_id -> events held for coalescing, and the task that will flush them
+        self._pending: dict[str, list[dict]] = {}
+        self._flush_tasks: dict[str, asyncio.Task] = {}
+        # user_id -> number of open sockets (of either kind) on this worker
+        self._user_counts: dict[str, int] = {}
+        self._reaper: asyncio.Task | None = None
+
+    # -------------------------
+    # LIFECYCLE
+    # -------------------------
+    async def start(self):
+        if self._listener is None:
+            self._pubsub = redis_client.pubsub()
+            self._listener = asyncio.create_task(self._listen())
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._heartbeat_forever())
+
+    async def stop(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        for group_id in list(self._pending):
+            await self._flush(group_id)
+        await self._drain_all()
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._subscribed.clear()
+        self._has_subscriptions.clear()
+
+    async def _drain_all(self):
+        """Give queued frames a moment to go out, then close every socket with 1001."""
+        deadline = time.monotonic() + settings.WS_DRAIN_TIMEOUT
+        while time.monotonic() < deadline and any(
+            not c.queue.empty() for c in self.clients.values()
+        ):
+            await asyncio.sleep(0.05)
+        await asyncio.gather(
+            *(self._drop(ws, GOING_AWAY_CLOSE_CODE) for ws in list(self.clients)),
+            return_exceptions=True,
+        )
+
+    async def _heartbeat_forever(self):
+        while True:
+            await asyncio.sleep(settings.WS_PING_INTERVAL)
+            try:
+                self._heartbeat()
+            except Exception:
+                logger.warning("Websocket heartbeat failed", exc_info=True)
+
+    def _heartbeat(self):
+        """Reap heartbeat clients that have gone quiet and ping the rest."""
+        now = time.monotonic()
+        ping = json.dumps({"type": "PING", "ts": int(time.time())})
+        frames: dict = {}
+        for websocket, client in list(self.clients.items()):
+            if client.heartbeats and now - client.last_seen > settings.WS_IDLE_TIMEOUT:
+                # Half-open or abandoned: no PONG (or anything else) in time
+                _reaped.inc()
+                self._spawn(self._drop(websocket, GOING_AWAY_CLOSE_CODE))
+            elif not client.enqueue(ping, frames):
+                _evictions.inc()
+                self._spawn(self._drop(websocket, SLOW_CONSUMER_CLOSE_CODE))
+
+    async def _listen(self):
+        while True:
+            await self._has_subscriptions.wait()
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # redis-py resubscribes on reconnect; back off and keep listening
+                logger.warning("Websocket pub/sub listener error", exc_info=True)
+                await asyncio.sleep(1)
+                continue
+
+            if message is None:
+                continue
+            channel = message["channel"]
+            if channel.startswith(self.user_channel_prefix):
+                user_id = channel[len(self.user_channel_prefix):]
+                self._spawn(self._refresh_user_groups(user_id))
+            else:
+                group_id = channel[len(self.channel_prefix):]
+                # Already JSON; forwarded to sockets as-is
+                self._deliver_local(group_id, message["data"])
 
-    async def connect(self, websocket: WebSocket, group_id: str):
+    def _wants(self, channel: str) -> bool:
+        if channel.startswith(self.user_channel_prefix):
+            return channel[len(self.user_channel_prefix):] in self.user_connections
+        return channel[len(self.channel_prefix):] in self.active_connections
+
+    async def _sync_subscription(self, channel: str):
+        """Subscribe to a channel while it has local sockets, unsubscribe after."""
+        if self._pubsub is None:
+            return
+        async with self._subscription_lock:
+            wanted = self._wants(channel)
+            try:
+                if wanted and channel not in self._subscribed:
+                    await self._pubsub.subscribe(channel)
+                    self._subscribed.add(channel)
+                elif not wanted and channel in self._subscribed:
+                    await self._pubsub.unsubscribe(channel)
+                    self._subscribed.discard(channel)
+            except RedisError:
+                logger.warning("Could not update subscription to %s", channel, exc_info=True)
+
+            if self._subscribed:
+                self._has_subscriptions.set()
+            else:
+                self._has_subscriptions.clear()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    # -------------------------
+    # CONNECTIONS
+    # -------------------------
+    async def _admission_error(self, token: str, payload: dict) -> int | None:
+        """Close code to turn a new connection away with, or None to admit it."""
+        try:
+            await revocation_registry.ensure_not_revoked(token, payload)
+        except UnauthorizedError:
+            _rejected.inc(reason="revoked")
+            return POLICY_CLOSE_CODE
+        except RedisError:
+            # Cannot tell whether the token was revoked; let the client retry
+            logger.warning("Revocation check unavailable; refusing websocket", exc_info=True)
+            _rejected.inc(reason="revocation_unavailable")
+            return SLOW_CONSUMER_CLOSE_CODE
+        user_id = str(payload["sub"])
+        if len(self.clients) >= settings.WS_MAX_CONNECTIONS_PER_WORKER:
+            _rejected.inc(reason="worker")
+            return SLOW_CONSUMER_CLOSE_CODE
+        if self._user_counts.get(user_id, 0) >= settings.WS_MAX_CONNECTIONS_PER_USER:
+            _rejected.inc(reason="user")
+            return POLICY_CLOSE_CODE
+        return None
+
+    async def _accept(
+        self, websocket: WebSocket, token: str, payload: dict, multiplexed: bool, encoding: str
+    ) -> bool:
+        code = await self._admission_error(token, payload)
+        # Accept first so the client sees the close code rather than a failed handshake
         await websocket.accept()
-        if group_id not in self.active_connections:
-            self.active_connections[group_id] = []
-        self.active_connections[group_id].append(websocket)
-
-    def disconnect(self, websocket: WebSocket, group_id: str):
-        if group_id in self.active_connections:
-            self.active_connections[group_id].remove(websocket)
-            if not self.active_connections[group_id]:
+        if code is not None:
+            await websocket.close(code=code)
+            return False
+
+        user_id = str(payload["sub"])
+        client = ClientConnection(websocket, self._drop, user_id, multiplexed, encoding)
+        self.clients[websocket] = client
+        self._user_counts[user_id] = self._user_counts.get(user_id, 0) + 1
+        client.start()
+        return True
+
+    async def _join(self, websocket: WebSocket, group_id: str):
+        self.clients[websocket].groups.add(group_id)
+        self.active_connections.setdefault(group_id, set()).add(websocket)
+        await self._sync_subscription(f"{self.channel_prefix}{group_id}")
+
+    async def _leave(self, websocket: WebSocket, group_id: str):
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.groups.discard(group_id)
+        sockets = self.active_connections.get(group_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
                 del self.active_connections[group_id]
+        await self._sync_subscription(f"{self.channel_prefix}{group_id}")
 
-    async def broadcast_to_group(self, group_id: str, message: dict):
-        if group_id in self.active_connections:
-            # Create a list of dead connections to remove
-            dead_connections = []
-            for connection in self.active_connections[group_id]:
+    async def connect(
+        self, websocket: WebSocket, group_id: str, token: str, payload: dict, encoding: str = "json"
+    ) -> bool:
+        """
+        Attach a socket to a single group. False if it was turned away.
+
+        `payload` is the decoded `token`; revoked tokens are refused here.
+        """
+        if not await self._accept(websocket, token, payload, multiplexed=False, encoding=encoding):
+            return False
+        await self._follow_user(websocket, str(payload["sub"]))
+        await self._join(websocket, group_id)
+        await self._hello(self.clients[websocket], {group_id})
+        return True
+
+    async def connect_user(
+        self, websocket: WebSocket, token: str, payload: dict, encoding: str = "json"
+    ) -> bool:
+        """Attach a per-user socket to every group the user belongs to."""
+        if not await self._accept(websocket, token, payload, multiplexed=True, encoding=encoding):
+            return False
+        user_id = str(payload["sub"])
+        await self._follow_user(websocket, user_id)
+
+        group_ids = await membership_cache.get_group_ids(user_id)
+        for group_id in group_ids:
+            await self._join(websocket, group_id)
+        await self._hello(self.clients[websocket], group_ids)
+        return True
+
+    async def disconnect(self, websocket: WebSocket, group_id: str | None = None):
+        """Remove a socket from one group, or entirely when group_id is None."""
+        client = self.clients.get(websocket)
+        if group_id is not None:
+            await self._leave(websocket, group_id)
+            # Per-user sockets stay open even when they belong to no group
+            if client is None or client.multiplexed or client.groups:
+                return
+
+        if client is None:
+            return
+        del self.clients[websocket]
+        await client.close()
+
+        count = self._user_counts.get(client.user_id, 0) - 1
+        if count > 0:
+            self._user_counts[client.user_id] = count
+        else:
+            self._user_counts.pop(client.user_id, None)
+
+        for gid in list(client.groups):
+            await self._leave(websocket, gid)
+
+        sockets = self.user_connections.get(client.user_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self.user_connections[client.user_id]
+        await self._sync_subscription(f"{self.user_channel_prefix}{client.user_id}")
+
+    async def _follow_user(self, websocket: WebSocket, user_id: str):
+        # Membership changes for the user are signalled on their channel
+        self.user_connections.setdefault(user_id, set()).add(websocket)
+        await self._sync_subscription(f"{self.user_channel_prefix}{user_id}")
+
+    async def _drop(self, websocket: WebSocket, code: int | None = None):
+        client = self.clients.get(websocket)
+        await self.disconnect(websocket)
+        if client is not None and code is not None:
+            await client.close(code)
+
+    async def handle_message(self, websocket: WebSocket, text: str):
+        """Act on a frame sent by the client; anything unrecognised is ignored."""
+        client = self.clients.get(websocket)
+        if client is not None:
+            # Any frame, PONG or otherwise, proves the connection is alive
+            client.touch()
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+
+        if message.get("type") == "PONG":
+            if client is not None:
+                client.heartbeats = True
+        elif message.get("type") == "RESUME":
+            # {"type": "RESUME", "seqs": {group_id: last_seen_seq}}
+            seqs = message.get("seqs")
+            if not isinstance(seqs, dict):
+                return
+            for group_id, seq in seqs.items():
                 try:
-                    await connection.send_json(message)
-                except Exception:
-                    dead_connections.append(connection)
-            
-            # Cleanup dead connections
-            for dead in dead_connections:
-                self.active_connections[group_id].remove(dead)
-            
-            if not self.active_connections[group_id]:
-                del self.active_connections[group_id]
+                    last_seq = int(seq)
+                except (TypeError, ValueError):
+                    continue
+                await self.resume(websocket, str(group_id), last_seq)
+
+    # -------------------------
+    # MEMBERSHIP
+    # -------------------------
+    async def notify_membership_changed(self, *user_ids: UUID | str):
+        """Tell every worker to re-sync these users' sockets with their memberships."""
+        payload = json.dumps({"type": "MEMBERSHIP_CHANGED"})
+        for user_id in {str(uid) for uid in user_ids}:
+            try:
+                await redis_client.publish(f"{self.user_channel_prefix}{user_id}", payload)
+            except RedisError:
+                logger.warning("Publish failed; re-syncing local sockets only", exc_info=True)
+                await self._refresh_user_groups(user_id)
+
+    async def _refresh_user_groups(self, user_id: str):
+        sockets = self.user_connections.get(user_id)
+        if not sockets:
+            return
+        group_ids = await membership_cache.get_group_ids(user_id)
+        # Lets the client refresh its group list, after HELLO has named the new groups' seqs
+        changed = json.dumps({"type": "MEMBERSHIP_CHANGED", "group_ids": sorted(group_ids)})
+        for websocket in list(sockets):
+            client = self.clients.get(websocket)
+            if client is None:
+                continue
+            if not client.multiplexed:
+                # A per-group socket cannot switch groups; close it if access was lost
+                if not client.groups <= group_ids:
+                    await self._drop(websocket, POLICY_CLOSE_CODE)
+                continue
+            for gid in client.groups - group_ids:
+                await self._leave(websocket, gid)
+            for gid in group_ids - client.groups:
+                await self._join(websocket, gid)
+            await self._hello(client, group_ids)
+            client.enqueue(changed)
+
+    # -------------------------
+    # BROADCAST
+    # -------------------------
+    async def broadcast_to_group(self, group_id: str, message: dict):
+        """Send a message to every socket in the group, on any worker."""
+        # Per-user sockets carry many groups, so every event names its group
+        event = {"group_id": group_id, **message}
+        window = settings.WS_COALESCE_WINDOWS.get(message.get("type"), 0)
+        if window > 0:
+            self._hold(group_id, event, window / 1000)
+            return
+        # Anything already held goes first so the group's order is kept
+        await self._flush(group_id)
+        await self._publish(group_id, event)
+
+    def _hold(self, group_id: str, event: dict, window: float):
+        pending = self._pending.setdefault(group_id, [])
+        pending.append(event)
+        if len(pending) >= settings.WS_COALESCE_MAX_EVENTS:
+            self._spawn(self._flush(group_id))
+        elif group_id not in self._flush_tasks:
+            self._flush_tasks[group_id] = self._spawn(self._flush_after(group_id, window))
+
+    async def _flush_after(self, group_id: str, delay: float):
+        await asyncio.sleep(delay)
+        await self._flush(group_id)
+
+    async def _flush(self, group_id: str):
+        """Send whatever is held for a group: as-is if alone, else as one BATCH frame."""
+        task = self._flush_tasks.pop(group_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        events = self._pending.pop(group_id, None)
+        if not events:
+            return
+        if len(events) == 1:
+            await self._publish(group_id, events[0])
+            return
+
+        for event in events:
+            _coalesced.inc(type=event.get("type", "unknown"))
+        _frames_saved.inc(len(events) - 1)
+        await self._publish(group_id, {"group_id": group_id, "type": "BATCH", "events": events})
+
+    async def _publish(self, group_id: str, event: dict):
+        payload = json.dumps(event)
+        if self._pubsub is not None:
+            try:
+                await _publish_event(
+                    keys=[f"{self.seq_prefix}{group_id}", f"{self.stream_prefix}{group_id}"],
+                    args=[
+                        f"{self.channel_prefix}{group_id}",
+                        payload,
+                        settings.WS_REPLAY_MAXLEN,
+                        settings.WS_REPLAY_TTL,
+                    ],
+                )
+                return
+            except RedisError:
+                logger.warning("Publish failed; delivering to local sockets only", exc_info=True)
+        # Unsequenced; clients simply apply it
+        self._deliver_local(group_id, payload)
+
+    async def _hello(self, client: ClientConnection, group_ids: set[str]):
+        """Tell a socket the current seq of each of its groups."""
+        groups = sorted(group_ids)
+        try:
+            values = await redis_client.mget([f"{self.seq_prefix}{g}" for g in groups]) if groups else []
+        except RedisError:
+            # Events go out unsequenced while Redis is down anyway
+            logger.warning("Could not read group seqs for HELLO", exc_info=True)
+            return
+        seqs = {gid: int(value or 0) for gid, value in zip(groups, values, strict=True)}
+        client.enqueue(json.dumps({"type": "HELLO", "seqs": seqs}))
+
+    async def resume(self, websocket: WebSocket, group_id: str, last_seq: int):
+        """
+        Replay the group events a reconnecting socket missed after `last_seq`.
+
+        Sends a RESYNC frame instead when the missed events are no longer
+        buffered or would not fit in the socket's queue. Live events may
+        interleave with the replay; clients drop any seq they have seen.
+        """
+        client = self.clients.get(websocket)
+        if client is None or group_id not in client.groups:
+            return
+
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.get(f"{self.seq_prefix}{group_id}")
+                pipe.xrange(
+                    f"{self.stream_prefix}{group_id}",
+                    min=f"{last_seq + 1}-0",
+                    count=settings.WS_SEND_QUEUE_SIZE + 1,
+                )
+                current, entries = await pipe.execute()
+        except RedisError:
+            logger.warning("Replay unavailable for group %s", group_id, exc_info=True)
+            current, entries = None, None
+
+        current = int(current or 0)
+        if entries is not None and last_seq == current:
+            _resumes.inc(outcome="current")
+            return
+
+        first_seq = int(entries[0][0].split("-")[0]) if entries else None
+        complete = (
+            entries is not None
+            and last_seq < current
+            and first_seq == last_seq + 1
+            and len(entries) <= client.queue.maxsize - client.queue.qsize()
+        )
+        if not complete:
+            # Buffer trimmed, seq reset, Redis down, or too much to replay
+            _resumes.inc(outcome="resync")
+            client.enqueue(json.dumps({"type": "RESYNC", "group_id": group_id, "seq": current}))
+            return
+
+        _resumes.inc(outcome="replayed")
+        for _, fields in entries:
+            client.enqueue(fields["d"])
+
+    def _deliver_local(self, group_id: str, payload: str):
+        """Queue a serialised frame on every local socket of the group; never blocks."""
+        started = time.perf_counter()
+        frames: dict = {}
+        for websocket in list(self.active_connections.get(group_id, ())):
+            client = self.clients.get(websocket)
+            if client is None:
+                continue
+            if not client.enqueue(payload, frames):
+                _evictions.inc()
+                self._spawn(self._drop(websocket, SLOW_CONSUMER_CLOSE_CODE))
+        _fanout_seconds.observe(time.perf_counter() - started)
+
 
 socket_manager = ConnectionManager()
+metrics.gauge("ws_connections", "Open websockets on this worker").set_function(
+    lambda: len(socket_manager.clients)
+)
+metrics.gauge("ws_groups", "Groups with at least one local socket on this worker").set_function(
+    lambda: len(socket_manager.active_connections)
+)
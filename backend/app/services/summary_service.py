@@ -3,9 +3,9 @@ from typing import Optional
 from uuid import UUID
 
 from sqlalchemy import select, func, and_
-from sqlalchemy.orm import selectinload
 
 from app.db.models import GroupMember, Bill, BillShare, User
+from app.services.group_dashboard import group_dashboard
 from app.services.group_service import GroupService
 
 
@@ -127,9 +127,8 @@ class SummaryService:
 
         # Fetch all unpaid shares in this group (with bill for paid_by)
         stmt = (
-            select(BillShare)
+            select(BillShare.user_id, BillShare.amount, Bill.paid_by)
             .join(Bill, Bill.id == BillShare.bill_id)
-            .options(selectinload(BillShare.user))
             .where(
                 Bill.group_id == group_id,
                 Bill.deleted_at.is_(None),
@@ -138,20 +137,13 @@ class SummaryService:
             )
         )
         res = await self.db.execute(stmt)
-        shares = res.scalars().all()
+        shares = res.all()
 
         # Build net balances: { user_id_str: net_balance }
         balances: dict[str, float] = {}
 
         for share in shares:
-            # Load parent bill to find payer
-            bill_stmt = select(Bill).where(Bill.id == share.bill_id)
-            bill_res = await self.db.execute(bill_stmt)
-            bill = bill_res.scalar_one_or_none()
-            if not bill:
-                continue
-
-            payer_id = str(bill.paid_by)
+            payer_id = str(share.paid_by)
             debtor_id = str(share.user_id)
 
             # Payer is owed this amount (skip self-payment)
@@ -191,7 +183,7 @@ class SummaryService:
         """
         from datetime import datetime
         from app.db.models import SplitType, BillShare, Bill
-        from app.services.socket_manager import socket_manager
+        from app.services.events import publish_ledger_event
 
         if isinstance(group_id, str):
             group_id = UUID(group_id)
@@ -252,10 +244,11 @@ class SummaryService:
 
         await self.db.commit()
 
-        # 3. Broadcast update
+        # 3. Broadcast update (in the background)
         if settled_count > 0:
+            await group_dashboard.invalidate(group_id)
             user = await self.db.get(User, user_id)
-            await socket_manager.broadcast_to_group(str(group_id), {
+            await publish_ledger_event(group_id, {
                 "type": "SETTLE_UP",
                 "group_id": str(group_id),
                 "user_name": user.name if user else "Someone",
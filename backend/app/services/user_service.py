@@ -5,8 +5,9 @@ from app.core.exceptions import (
     NotFoundError,
     ValidationError,
 )
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password_async, verify_password_async
 from app.db.models import User
+from app.services.auth_service import invalidate_cached_user
 
 
 class UserService:
@@ -22,7 +23,7 @@ class UserService:
         if existing:
             raise ConflictError("Email already registered")
 
-        hashed_pw = hash_password(password)
+        hashed_pw = await hash_password_async(password)
         new_user = User(name=name, email=email, password=hashed_pw)
         self.db.add(new_user)
         await self.db.commit()
@@ -38,12 +39,13 @@ class UserService:
         if not user:
             raise NotFoundError("User not found")
 
-        if not verify_password(old_password, user.password):
+        if not await verify_password_async(old_password, user.password):
             raise ValidationError("Old password incorrect")
 
-        hashed_new = hash_password(new_password)
+        hashed_new = await hash_password_async(new_password)
         user.password = hashed_new
         await self.db.commit()
+        await invalidate_cached_user(user.id)
         return {"detail": "Password changed successfully"}
 
     async def get_user_by_id(self, user_id: str):
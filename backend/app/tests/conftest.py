@@ -0,0 +1,25 @@
+import sys
+
+import pytest
+from redis.commands.core import AsyncScript
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    Point every loaded app module's `redis_client` (and the Lua scripts
+    registered on it) at an in-memory fakeredis server.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis needs it for EVALSHA
+    fake = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("app.") or module is None:
+            continue
+        if hasattr(module, "redis_client"):
+            monkeypatch.setattr(module, "redis_client", fake)
+        for value in list(vars(module).values()):
+            if isinstance(value, AsyncScript):
+                monkeypatch.setattr(value, "registered_client", fake)
+    return fake
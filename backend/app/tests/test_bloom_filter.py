@@ -0,0 +1,36 @@
+from app.utils.bloom_filter import BloomFilter
+
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter(capacity=1000)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert bloom.count == 1000
+
+
+def test_false_positive_rate_stays_near_the_configured_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+
+    probes = 10_000
+    false_positives = sum(f"other-{i}" in bloom for i in range(probes))
+
+    # Deterministic hashing, so this is stable; allow some slack over 1%
+    assert false_positives / probes < 0.02
+
+
+def test_empty_filter_contains_nothing():
+    bloom = BloomFilter(capacity=10)
+    assert "anything" not in bloom
+
+
+def test_sizing_handles_degenerate_capacity():
+    bloom = BloomFilter(capacity=0)
+    assert bloom.size >= 8
+    assert bloom.hash_count >= 1
+    bloom.add("x")
+    assert "x" in bloom
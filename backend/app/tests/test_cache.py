@@ -0,0 +1,71 @@
+from app.core import cache
+from app.core.cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _frozen(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_get_returns_stored_value_until_it_expires(monkeypatch):
+    clock = _frozen(monkeypatch)
+    c = TTLCache(maxsize=10, ttl=5)
+    c.set("k", "v")
+
+    clock.now += 4.9
+    assert c.get("k") == "v"
+
+    clock.now += 0.1
+    assert c.get("k") is None
+    assert len(c) == 0
+
+
+def test_per_entry_ttl_overrides_default(monkeypatch):
+    clock = _frozen(monkeypatch)
+    c = TTLCache(maxsize=10, ttl=60)
+    c.set("short", 1, ttl=1)
+    c.set("long", 2)
+
+    clock.now += 2
+    assert "short" not in c
+    assert "long" in c
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    _frozen(monkeypatch)
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")  # "b" is now the least recently used
+    c.set("c", 3)
+
+    assert "a" in c
+    assert "b" not in c
+    assert "c" in c
+
+
+def test_zero_maxsize_stores_nothing():
+    c = TTLCache(maxsize=0, ttl=60)
+    c.set("a", 1)
+    assert c.get("a", "missing") == "missing"
+
+
+def test_pop_and_clear():
+    c = TTLCache(maxsize=10, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+
+    assert c.pop("a") == 1
+    assert c.pop("a", "gone") == "gone"
+
+    c.clear()
+    assert len(c) == 0
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime
+
+from app.services.group_dashboard import GroupDashboardCache, group_dashboard, parse_iso
+
+
+def _member(uid, name):
+    return {"id": f"m-{uid}", "user": {"id": uid, "name": name, "email": f"{name}@example.com"}}
+
+
+def _doc(balances, members=(), former_members=None):
+    return {
+        "members": list(members),
+        "balances": balances,
+        "former_members": former_members or {},
+    }
+
+
+def test_parse_iso_round_trips_document_timestamps():
+    value = datetime(2024, 5, 1, 12, 30, 15, 250)
+    assert parse_iso(value.isoformat()) == value
+    assert parse_iso(None) is None
+    assert parse_iso("") is None
+
+
+def test_balance_changes_lists_only_users_whose_balance_moved():
+    before = _doc({"a": {"owed": 30, "owe": 0}, "b": {"owed": 0, "owe": 30}, "c": {"owed": 5, "owe": 0}})
+    after = _doc({"a": {"owed": 50, "owe": 0}, "b": {"owed": 0, "owe": 50}, "c": {"owed": 5, "owe": 0}})
+
+    changes = GroupDashboardCache.balance_changes(before, after)
+
+    assert changes == {
+        "a": {"owed": 50, "owe": 0, "net": 50, "delta": 20},
+        "b": {"owed": 0, "owe": 50, "net": -50, "delta": -20},
+    }
+
+
+def test_balance_changes_covers_users_appearing_or_settling():
+    before = _doc({"a": {"owed": 10, "owe": 0}, "b": {"owed": 0, "owe": 10}})
+    after = _doc({"c": {"owed": 0, "owe": 4}})
+
+    changes = GroupDashboardCache.balance_changes(before, after)
+
+    assert changes["a"] == {"owed": 0, "owe": 0, "net": 0, "delta": -10}
+    assert changes["b"] == {"owed": 0, "owe": 0, "net": 0, "delta": 10}
+    assert changes["c"] == {"owed": 0, "owe": 4, "net": -4, "delta": -4}
+
+
+def test_balance_changes_is_empty_when_nothing_moved():
+    doc = _doc({"a": {"owed": 10, "owe": 0}, "b": {"owed": 0, "owe": 10}})
+    assert GroupDashboardCache.balance_changes(doc, doc) == {}
+
+
+def test_settlement_plan_names_members():
+    doc = _doc(
+        {"a": {"owed": 25, "owe": 0}, "b": {"owed": 0, "owe": 25}},
+        members=[_member("a", "alice"), _member("b", "bob")],
+    )
+
+    plan = GroupDashboardCache.settlement_plan(doc)
+
+    assert plan == [{
+        "from": {"id": "b", "name": "bob", "email": "bob@example.com"},
+        "to": {"id": "a", "name": "alice", "email": "alice@example.com"},
+        "amount": 25,
+    }]
+
+
+def test_settlement_plan_names_former_members():
+    doc = _doc(
+        {"a": {"owed": 12.5, "owe": 0}, "gone": {"owed": 0, "owe": 12.5}},
+        members=[_member("a", "alice")],
+        former_members={"gone": {"id": "gone", "name": "gina", "email": "gina@example.com"}},
+    )
+
+    [tx] = GroupDashboardCache.settlement_plan(doc)
+
+    assert tx["from"] == {"id": "gone", "name": "gina", "email": "gina@example.com"}
+    assert tx["to"]["name"] == "alice"
+    assert tx["amount"] == 12.5
+
+
+def test_settlement_plan_is_empty_for_a_settled_group():
+    doc = _doc({"a": {"owed": 0, "owe": 0}}, members=[_member("a", "alice")])
+    assert GroupDashboardCache.settlement_plan(doc) == []
+
+
+def _ledger_changes(monkeypatch, *docs) -> list[dict]:
+    """`ledger_changed` for one group whose rebuilt documents are `docs`, in turn."""
+    pending = list(docs)
+
+    async def refresh(db, group_id):
+        return pending.pop(0)
+
+    monkeypatch.setattr(group_dashboard, "refresh", refresh)
+
+    async def main():
+        return [await group_dashboard.ledger_changed(None, "g1") for _ in docs]
+
+    return [changes["balances"] for changes in asyncio.run(main())]
+
+
+def test_ledger_changed_reports_nothing_without_a_previous_report(fake_redis, monkeypatch):
+    doc = _doc({"a": {"owed": 10, "owe": 0}, "b": {"owed": 0, "owe": 10}})
+    assert _ledger_changes(monkeypatch, doc) == [None]
+
+
+def test_ledger_changed_reports_each_change_since_the_previous_report(fake_redis, monkeypatch):
+    first = _doc({"a": {"owed": 10, "owe": 0}, "b": {"owed": 0, "owe": 10}})
+    second = _doc({"a": {"owed": 30, "owe": 0}, "b": {"owed": 0, "owe": 30}})
+    third = _doc({"a": {"owed": 30, "owe": 5}, "b": {"owed": 5, "owe": 30}})
+
+    _, moved, settled = _ledger_changes(monkeypatch, first, second, third)
+
+    assert moved["a"]["delta"] == 20 and moved["b"]["delta"] == -20
+    assert settled["a"] == {"owed": 30, "owe": 5, "net": 25, "delta": -5}
+    assert settled["b"] == {"owed": 5, "owe": 30, "net": -25, "delta": 5}
+
+
+def test_ledger_changed_counts_writes_committed_together_once(fake_redis, monkeypatch):
+    # Two writes commit before either event runs: both rebuild the same
+    # document, the first event carries both changes and the second none
+    before = _doc({"a": {"owed": 10, "owe": 0}, "b": {"owed": 0, "owe": 10}})
+    both = _doc({"a": {"owed": 40, "owe": 0}, "b": {"owed": 0, "owe": 40}})
+
+    _, first, second = _ledger_changes(monkeypatch, before, both, both)
+
+    assert first["a"]["delta"] == 30 and first["b"]["delta"] == -30
+    assert second == {}
@@ -0,0 +1,85 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.metrics import MetricsRegistry
+
+
+def test_render_uses_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs run", ("kind",)).inc(2, kind='say "hi"')
+    registry.gauge("queue_depth", "Waiting jobs").set_function(lambda: 7)
+    latency = registry.histogram("job_seconds", "Job latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP jobs_total Jobs run",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="say \\"hi\\""} 2',
+        "# HELP queue_depth Waiting jobs",
+        "# TYPE queue_depth gauge",
+        "queue_depth 7",
+        "# HELP job_seconds Job latency",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="0.1"} 1',
+        'job_seconds_bucket{le="1.0"} 2',
+        'job_seconds_bucket{le="+Inf"} 3',
+        "job_seconds_sum 5.55",
+        "job_seconds_count 3",
+    ]
+
+
+def test_metrics_are_registered_once_per_name():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs run")
+
+    assert registry.counter("jobs_total", "Jobs run") is counter
+    with pytest.raises(ValueError):
+        registry.gauge("jobs_total", "Jobs run")
+    with pytest.raises(ValueError):
+        counter.inc(kind="unexpected")
+
+
+@pytest.fixture
+def client(fake_redis):
+    # No lifespan: the endpoints under test need neither sockets nor tasks
+    return TestClient(main.app)
+
+
+def test_metrics_endpoint_reports_request_latency_by_route(client):
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in (
+        response.text
+    )
+
+
+@pytest.mark.parametrize(
+    "database_up, redis_up, status",
+    [(True, True, 200), (False, True, 503), (True, False, 503)],
+)
+def test_ready_reports_each_dependency(client, fake_redis, monkeypatch, database_up, redis_up, status):
+    async def ping_database(db_engine):
+        if not database_up:
+            raise ConnectionError("database down")
+
+    async def ping_redis():
+        if not redis_up:
+            raise ConnectionError("redis down")
+        return True
+
+    monkeypatch.setattr(main, "_ping_database", ping_database)
+    monkeypatch.setattr(fake_redis, "ping", ping_redis)
+
+    response = client.get("/ready")
+
+    assert response.status_code == status
+    assert response.json()["checks"] == {
+        "database": "ok" if database_up else "unavailable",
+        "redis": "ok" if redis_up else "unavailable",
+    }
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import RequestProfiler
+
+TOKEN = "let-me-profile"
+
+
+def _busy(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def report():
+    await asyncio.sleep(0.05)
+    _busy(0.05)
+    return {"ok": True}
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILE_INTERVAL", 0.001)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def client(profile_dir):
+    app = FastAPI()
+    app.get("/groups/{group_id}/report")(report)
+    app.add_middleware(RequestProfiler)
+    return TestClient(app)
+
+
+def _stacks(path) -> dict[str, int]:
+    stacks = {}
+    for line in path.read_text().splitlines():
+        stack, _, count = line.rpartition(" ")
+        stacks[stack] = int(count)
+    return stacks
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Profile": "wrong"}])
+def test_requests_are_not_profiled_without_the_token(client, profile_dir, headers):
+    response = client.get("/groups/g1/report", headers=headers)
+
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_profiled_requests_record_waiting_and_running_stacks(client, profile_dir):
+    response = client.get("/groups/g1/report", headers={"X-Profile": TOKEN})
+
+    assert response.json() == {"ok": True}
+    profile_id = response.headers["x-profile-id"]
+    [path] = profile_dir.iterdir()
+    assert path.name.endswith(f"-GET-groups_group_id_report-{profile_id}.collapsed")
+
+    stacks = _stacks(path)
+    waiting = [s for s in stacks if s.endswith("(waiting)") and "report (" in s]
+    running = [s for s in stacks if s.split(";")[-1].startswith("_busy (")]
+    assert waiting and running
+    # Frames are named after the code, relative to the backend directory
+    assert "app/tests/test_profiling.py:" in running[0]
+
+
+def test_sampled_requests_are_profiled_without_the_token(client, profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1.0)
+
+    response = client.get("/groups/g1/report")
+
+    assert "x-profile-id" in response.headers
+    assert len(list(profile_dir.iterdir())) == 1
+
+
+def test_only_the_newest_profiles_are_kept(client, profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_MAX_FILES", 2)
+    (profile_dir / "00000000T000000-GET-old-1.collapsed").write_text("")
+    (profile_dir / "00000000T000000-GET-old-2.collapsed").write_text("")
+
+    response = client.get("/groups/g1/report", headers={"X-Profile": TOKEN})
+
+    names = sorted(path.name for path in profile_dir.iterdir())
+    assert len(names) == 2
+    assert names[0].endswith("old-2.collapsed")
+    assert names[1].endswith(f"{response.headers['x-profile-id']}.collapsed")
@@ -0,0 +1,123 @@
+"""
+Query counts of the read paths must not grow with the data.
+
+Each test seeds a group of N members and bills, then one of 2N, and checks
+the service runs the same number of queries for both. They need the
+migrated database at DATABASE_URL; everything runs in a transaction that
+is rolled back, and they are skipped when the database is unreachable.
+"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Bill, BillShare, Group, GroupMember, GroupRole, SplitType, User
+from app.db.query_stats import query_budget, track_queries
+from app.db.session import engine
+from app.services.bill_service import BillService
+from app.services.group_dashboard import group_dashboard
+from app.services.group_service import GroupService
+from app.services.summary_service import SummaryService
+
+SMALL = 3  # members; each size seeds twice as many bills as members
+
+
+async def _seed(db: AsyncSession, members: int) -> tuple[User, Group]:
+    users = [
+        User(name=f"user {i}", email=f"budget-{uuid4()}@example.com", password="x")
+        for i in range(members)
+    ]
+    db.add_all(users)
+    await db.flush()
+
+    owner = users[0]
+    group = Group(name="budget", created_by=owner.id)
+    db.add(group)
+    await db.flush()
+
+    db.add_all(
+        GroupMember(
+            user_id=u.id,
+            group_id=group.id,
+            created_by=owner.id,
+            role=GroupRole.ADMIN if u is owner else GroupRole.MEMBER,
+        )
+        for u in users
+    )
+    # The owner pays for everything, so every other member ends up owing
+    for i in range(members * 2):
+        bill = Bill(
+            group_id=group.id,
+            paid_by=owner.id,
+            created_by=owner.id,
+            description=f"bill {i}",
+            total_amount=10.0 * members,
+            split_type=SplitType.EQUAL,
+        )
+        db.add(bill)
+        await db.flush()
+        db.add_all(BillShare(bill_id=bill.id, user_id=u.id, amount=10.0) for u in users)
+    await db.flush()
+    return owner, group
+
+
+def _run_in_rolled_back_session(scenario):
+    async def main():
+        try:
+            conn = await engine.connect()
+        except Exception as exc:
+            pytest.skip(f"database unavailable: {exc}")
+        try:
+            async with conn.begin() as outer:
+                db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+                try:
+                    await scenario(db)
+                finally:
+                    await db.close()
+                    await outer.rollback()
+        finally:
+            await conn.close()
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+async def _same_query_count(db: AsyncSession, call):
+    """Run `call(db, user, group)` against N and 2N seeds; the counts must match."""
+    owner, group = await _seed(db, SMALL)
+    await group_dashboard.invalidate(group.id)
+    with track_queries() as small:
+        await call(db, owner, group)
+
+    owner, group = await _seed(db, SMALL * 2)
+    await group_dashboard.invalidate(group.id)
+    with query_budget(small.count) as large:
+        await call(db, owner, group)
+
+    assert large.count == small.count
+    await group_dashboard.invalidate(group.id)
+
+
+def test_get_simplified_debts_query_count_is_constant():
+    async def call(db, user, group):
+        plan = await SummaryService(GroupService(db)).get_simplified_debts(group.id, user.id)
+        assert plan
+
+    _run_in_rolled_back_session(lambda db: _same_query_count(db, call))
+
+
+def test_get_user_groups_query_count_is_constant():
+    async def call(db, user, group):
+        page = await GroupService(db).get_user_groups(user.id)
+        assert [g["id"] for g in page["items"]] == [str(group.id)]
+
+    _run_in_rolled_back_session(lambda db: _same_query_count(db, call))
+
+
+def test_get_group_bills_query_count_is_constant():
+    async def call(db, user, group):
+        page = await BillService(GroupService(db)).get_group_bills(user.id, group.id, limit=100)
+        assert all(len(bill.shares) > 0 for bill in page["items"])
+
+    _run_in_rolled_back_session(lambda db: _same_query_count(db, call))
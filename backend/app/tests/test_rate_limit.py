@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import Settings, settings
+from app.core.rate_limit import client_ip, parse_rate
+
+
+@pytest.mark.parametrize(
+    "rate, expected",
+    [
+        ("10/minute", (10, 60)),
+        ("10/minutes", (10, 60)),
+        ("5/second", (5, 1)),
+        ("100/Hour", (100, 3600)),
+        ("1000/day", (1000, 86400)),
+        ("3/ minute ", (3, 60)),
+        ("7/90", (7, 90)),
+    ],
+)
+def test_parse_rate(rate, expected):
+    assert parse_rate(rate) == expected
+
+
+@pytest.mark.parametrize(
+    "rate", ["10", "10/fortnight", "ten/minute", "5/0s", "5/0", "0/minute", "-1/minute", "5/-60"]
+)
+def test_parse_rate_rejects_malformed_rates(rate):
+    with pytest.raises(ValueError):
+        parse_rate(rate)
+
+
+def test_settings_reject_invalid_rates():
+    with pytest.raises(ValueError, match="RATE_LIMITS"):
+        Settings(RATE_LIMITS={"login": "10/minute", "settle": "5/0s"})
+
+
+def test_configured_rates_parse():
+    for rate in settings.RATE_LIMITS.values():
+        count, period = parse_rate(rate)
+        assert count > 0 and period > 0
+
+
+def test_client_ip_ignores_forwarded_headers():
+    # uvicorn resolves trusted proxies into request.client; a spoofed header must not count
+    request = SimpleNamespace(
+        client=SimpleNamespace(host="203.0.113.7"),
+        headers={"x-forwarded-for": "1.2.3.4"},
+    )
+    assert client_ip(request) == "203.0.113.7"
+    assert client_ip(SimpleNamespace(client=None, headers={})) == "unknown"
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from redis.exceptions import RedisError
+
+from app import main
+from app.core.security import encode_token
+from app.db import routing
+from app.db.routing import ReadRouting, get_read_db
+from app.services.group_dashboard import group_dashboard
+
+
+class FakeSessionFactory:
+    """Stands in for an async_sessionmaker; its sessions are just its name."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self.name
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def replica(fake_redis, monkeypatch):
+    """A configured replica, and a fresh read-your-writes tracker."""
+    monkeypatch.setattr(routing, "read_engine", object())
+    monkeypatch.setattr(routing, "AsyncSessionLocal", FakeSessionFactory("primary"))
+    monkeypatch.setattr(routing, "ReadSessionLocal", FakeSessionFactory("replica"))
+    tracker = ReadRouting()
+    monkeypatch.setattr(routing, "read_routing", tracker)
+    monkeypatch.setattr(main, "read_routing", tracker)
+    return tracker
+
+
+def _request(user_id: str | None = None, method: str = "GET"):
+    headers = {}
+    if user_id is not None:
+        token = encode_token({"sub": user_id, "exp": int(time.time()) + 60})
+        headers["authorization"] = f"Bearer {token}"
+    return SimpleNamespace(headers=headers, method=method)
+
+
+async def _session_for(request) -> str:
+    sessions = get_read_db(request)
+    session = await sessions.__anext__()
+    await sessions.aclose()
+    return session
+
+
+def test_reads_go_to_the_replica(replica):
+    assert asyncio.run(_session_for(_request("u1"))) == "replica"
+    assert asyncio.run(_session_for(_request())) == "replica"
+
+
+def test_writers_read_from_the_primary_on_every_worker(replica):
+    async def scenario():
+        # Marked on another worker: only Redis knows
+        await ReadRouting().mark_write("u1")
+        return await _session_for(_request("u1")), await _session_for(_request("u2"))
+
+    assert asyncio.run(scenario()) == ("primary", "replica")
+
+
+def test_reads_go_to_the_primary_when_redis_is_down(replica, fake_redis, monkeypatch):
+    async def down(*args, **kwargs):
+        raise RedisError("down")
+
+    monkeypatch.setattr(fake_redis, "exists", down)
+
+    assert asyncio.run(_session_for(_request("u1"))) == "primary"
+
+
+@pytest.mark.parametrize(
+    "method, status, pinned",
+    [("POST", 201, True), ("DELETE", 204, True), ("POST", 403, False), ("GET", 200, False)],
+)
+def test_only_successful_writes_pin_the_user(replica, method, status, pinned):
+    async def call_next(request):
+        return SimpleNamespace(status_code=status)
+
+    async def scenario():
+        await main.pin_writers_to_primary(_request("u1", method), call_next)
+        return await replica.recently_wrote("u1")
+
+    assert asyncio.run(scenario()) is pinned
+
+
+def test_documents_built_from_the_replica_are_not_cached(fake_redis, monkeypatch):
+    async def build(db, group_ids):
+        return {gid: {"id": gid, "balances": {}} for gid in group_ids}
+
+    monkeypatch.setattr(group_dashboard, "build", build)
+
+    async def scenario():
+        await group_dashboard.get_many(SimpleNamespace(info={"replica": True}), ["g1"])
+        from_replica = await fake_redis.exists(group_dashboard._key("g1"))
+        await group_dashboard.get_many(SimpleNamespace(info={}), ["g1"])
+        return from_replica, await fake_redis.exists(group_dashboard._key("g1"))
+
+    assert asyncio.run(scenario()) == (0, 1)
@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.exceptions import UnauthorizedError
+from app.core.revocation import RevocationRegistry
+
+
+def _payload(jti: str | None = "jti-1", sub: str = "u1", iat: int | None = None) -> dict:
+    now = int(time.time())
+    payload = {"sub": sub, "iat": now if iat is None else iat, "exp": now + 3600}
+    if jti:
+        payload["jti"] = jti
+    return payload
+
+
+async def _is_revoked(registry: RevocationRegistry, payload: dict, token: str = "token") -> bool:
+    try:
+        await registry.ensure_not_revoked(token, payload)
+    except UnauthorizedError:
+        return True
+    return False
+
+
+@pytest.fixture(params=["synced", "unsynced"])
+def registries(request, fake_redis):
+    """This worker, which revokes, and another one that must see it."""
+    async def make():
+        local, other = RevocationRegistry(), RevocationRegistry()
+        if request.param == "synced":
+            # What _sync sets up: a mirror loaded from Redis, kept current by
+            # the pub/sub messages the test hands over
+            await other._reload()
+            local._synced = other._synced = True
+        return local, other
+
+    return asyncio.run(make())
+
+
+def _deliver(other: RevocationRegistry, *messages: str):
+    for message in messages:
+        other._apply(message)
+
+
+def test_revoke_token_revokes_only_that_token(registries):
+    local, other = registries
+
+    async def scenario():
+        await local.revoke_token("token", _payload("jti-1"))
+        _deliver(other, "jti:jti-1")
+        return [
+            await _is_revoked(registry, payload)
+            for registry in (local, other)
+            for payload in (_payload("jti-1"), _payload("jti-2"))
+        ]
+
+    assert asyncio.run(scenario()) == [True, False, True, False]
+
+
+def test_revoke_token_without_a_jti_blacklists_the_token(registries):
+    local, other = registries
+
+    async def scenario():
+        await local.revoke_token("legacy", _payload(jti=None))
+        return (
+            await _is_revoked(other, _payload(jti=None), token="legacy"),
+            await _is_revoked(other, _payload(jti=None), token="another"),
+        )
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_revoke_token_ignores_expired_tokens(registries, fake_redis):
+    local, _ = registries
+    payload = {**_payload("jti-1"), "exp": int(time.time()) - 1}
+
+    asyncio.run(local.revoke_token("token", payload))
+
+    assert asyncio.run(fake_redis.keys("*")) == []
+
+
+def test_revoke_user_revokes_tokens_issued_before(registries):
+    local, other = registries
+    ts = int(time.time())
+
+    async def scenario():
+        await local.revoke_user("u1", ts)
+        _deliver(other, f"user:u1:{ts}")
+        return [
+            await _is_revoked(registry, payload)
+            for registry in (local, other)
+            for payload in (
+                _payload("old", iat=ts - 10),
+                _payload("new", iat=ts),
+                _payload("theirs", sub="u2", iat=ts - 10),
+            )
+        ]
+
+    assert asyncio.run(scenario()) == [True, False, False, True, False, False]
+
+
+def test_a_starting_worker_loads_existing_revocations(fake_redis):
+    ts = int(time.time())
+
+    async def scenario():
+        await RevocationRegistry().revoke_token("token", _payload("jti-1"))
+        await RevocationRegistry().revoke_user("u2", ts)
+
+        late = RevocationRegistry()
+        await late._reload()
+        late._synced = True
+        return (
+            await _is_revoked(late, _payload("jti-1")),
+            await _is_revoked(late, _payload("other", sub="u2", iat=ts - 1)),
+        )
+
+    assert asyncio.run(scenario()) == (True, True)
+
+
+def test_revocations_and_user_changes_reach_other_workers_over_pubsub(fake_redis):
+    changed = []
+
+    async def wait_for(condition):
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("timed out")
+
+    async def scenario():
+        other = RevocationRegistry()
+        other.on_user_changed(changed.append)
+        await other.start()
+        try:
+            await wait_for(lambda: other._synced)
+            local = RevocationRegistry()
+            await local.revoke_token("token", _payload("jti-1"))
+            await local.user_changed("u3")
+            await wait_for(lambda: "u3" in changed)
+            return await _is_revoked(other, _payload("jti-1"))
+        finally:
+            await other.stop()
+
+    assert asyncio.run(scenario()) is True
+    # None first: the mirror was (re)loaded, so anything cached may be stale
+    assert changed == [None, "u3"]
+
+
+def test_bloom_false_positives_are_confirmed_in_redis(fake_redis):
+    registry = RevocationRegistry()
+    registry._synced = True
+    registry._bloom.add("jti-1")  # in the filter, but never revoked
+
+    assert asyncio.run(_is_revoked(registry, _payload("jti-1"))) is False
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import cache, security
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
+
+
+@pytest.fixture
+def hash_pool(monkeypatch):
+    """One hashing slot and room for one waiting operation."""
+    monkeypatch.setattr(security, "_hash_slots", asyncio.Semaphore(1))
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 1)
+
+
+def test_hashing_runs_off_the_event_loop(hash_pool):
+    async def scenario():
+        return await security._run_hash("hash", lambda: threading.current_thread().name)
+
+    assert asyncio.run(scenario()).startswith("password-hash")
+
+
+def test_hashes_made_at_another_cost_are_replaced_on_login(hash_pool):
+    cheap = security.pwd_context.hash("hunter22", rounds=4)
+
+    valid, new_hash = asyncio.run(security.verify_and_update_password("hunter22", cheap))
+
+    assert valid
+    assert new_hash is not None and new_hash != cheap
+    assert f"${settings.BCRYPT_ROUNDS:02d}$" in new_hash
+    assert asyncio.run(security.verify_and_update_password("hunter22", new_hash)) == (True, None)
+
+
+def test_hashing_is_refused_once_the_queue_is_full(hash_pool):
+    release = threading.Event()
+    rejected = security._hash_rejected.value()
+
+    async def scenario():
+        running = asyncio.create_task(security._run_hash("hash", release.wait))
+        waiting = asyncio.create_task(security._run_hash("hash", lambda: "done"))
+        while security._hash_queue_depth.value() < 1:
+            await asyncio.sleep(0.01)
+
+        with pytest.raises(ServiceUnavailableError):
+            await security._run_hash("hash", lambda: "refused")
+
+        release.set()
+        return await asyncio.gather(running, waiting)
+
+    try:
+        assert asyncio.run(scenario()) == [True, "done"]
+    finally:
+        release.set()
+
+    assert security._hash_rejected.value() == rejected + 1
+    assert security._hash_queue_depth.value() == 0
+    assert security._hash_in_flight.value() == 0
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    """An empty verified-token cache on a clock the test moves."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock.now)
+    monkeypatch.setattr(security, "_verified_tokens", TTLCache(maxsize=10, ttl=3600))
+    return clock
+
+
+def _lookups() -> tuple[float, float]:
+    return (
+        security._jwt_cache_lookups.value(result="hit"),
+        security._jwt_cache_lookups.value(result="miss"),
+    )
+
+
+def test_decode_token_verifies_each_token_once(token_cache):
+    token = security.encode_token({"sub": "u1", "exp": int(time.time()) + 60})
+    hits, misses = _lookups()
+
+    first = security.decode_token(token)
+    first["sub"] = "someone else"  # callers get a copy, not the cached payload
+    second = security.decode_token(token)
+
+    assert second["sub"] == "u1"
+    assert _lookups() == (hits + 1, misses + 1)
+
+
+def test_decode_token_cache_expires_with_the_token(token_cache):
+    token = security.encode_token({"sub": "u1", "exp": int(time.time()) + 60})
+    security.decode_token(token)
+    hits, misses = _lookups()
+
+    token_cache.now += 61
+    security.decode_token(token)
+
+    assert _lookups() == (hits, misses + 1)
+
+
+def test_decode_token_does_not_cache_rejected_tokens(token_cache):
+    expired = security.encode_token({"sub": "u1", "exp": int(time.time()) - 1})
+    forged = security.encode_token({"sub": "u1"})[:-2] + "xx"
+
+    assert security.decode_token(expired) is None
+    assert security.decode_token(forged) is None
+    assert len(security._verified_tokens) == 0
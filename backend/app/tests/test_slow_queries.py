@@ -0,0 +1,43 @@
+import pytest
+
+from app.db.slow_queries import _MAX_SQL, normalize_sql, parameter_shape
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        (
+            "SELECT * FROM users WHERE email = 'o''brien@example.com' LIMIT 10",
+            "SELECT * FROM users WHERE email = ? LIMIT ?",
+        ),
+        (
+            "SELECT id FROM bills WHERE group_id = $1 AND id IN ($2, $3, $4)",
+            "SELECT id FROM bills WHERE group_id = ? AND id IN (...)",
+        ),
+        (
+            "SELECT a.col1,\n       b FROM t1 a WHERE x = %(x_1)s AND y = :y AND z > -3.5",
+            "SELECT a.col1, b FROM t1 a WHERE x = ? AND y = ? AND z > ?",
+        ),
+        # Casts and identifiers with digits are left alone
+        ("SELECT ts::date FROM t2 WHERE d = :d", "SELECT ts::date FROM t2 WHERE d = ?"),
+    ],
+)
+def test_normalize_sql(statement, expected):
+    assert normalize_sql(statement) == expected
+
+
+def test_statements_differing_only_in_values_normalise_the_same():
+    one = normalize_sql("SELECT * FROM bills WHERE amount > 10 AND id IN (1, 2)")
+    other = normalize_sql("SELECT * FROM bills WHERE amount > 99.5 AND id IN (7, 8, 9, 10)")
+    assert one == other
+
+
+def test_normalize_sql_truncates_long_statements():
+    assert len(normalize_sql("SELECT " + "col, " * 1000 + "x FROM t")) == _MAX_SQL
+
+
+def test_parameter_shape_never_includes_values():
+    assert parameter_shape({"email": "a@example.com", "n": 1}, False) == {"email": "str", "n": "int"}
+    assert parameter_shape(("secret", None), False) == ["str", "NoneType"]
+    assert parameter_shape([(1, "a"), (2, "b")], True) == {"rows": 2, "types": ["int", "str"]}
+    assert parameter_shape([], True) == {"rows": 0, "types": []}
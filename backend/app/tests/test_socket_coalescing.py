@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.socket_manager import ConnectionManager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(settings, "WS_COALESCE_WINDOWS", {"UPDATE_BILL": 20})
+    monkeypatch.setattr(settings, "WS_COALESCE_MAX_EVENTS", 3)
+    m = ConnectionManager()
+    m.published = []
+
+    async def publish(group_id, event):
+        m.published.append((group_id, event))
+
+    monkeypatch.setattr(m, "_publish", publish)
+    return m
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_uncoalesced_events_are_sent_immediately(manager):
+    async def scenario():
+        await manager.broadcast_to_group("g", {"type": "NEW_BILL", "id": 1})
+
+    _run(scenario())
+    assert manager.published == [("g", {"group_id": "g", "type": "NEW_BILL", "id": 1})]
+
+
+def test_single_held_event_is_sent_as_is(manager):
+    async def scenario():
+        await manager.broadcast_to_group("g", {"type": "UPDATE_BILL", "id": 1})
+        assert manager.published == []
+        await asyncio.sleep(0.05)
+
+    _run(scenario())
+    assert manager.published == [("g", {"group_id": "g", "type": "UPDATE_BILL", "id": 1})]
+
+
+def test_burst_within_window_becomes_one_batch(manager):
+    async def scenario():
+        await manager.broadcast_to_group("g", {"type": "UPDATE_BILL", "id": 1})
+        await manager.broadcast_to_group("g", {"type": "UPDATE_BILL", "id": 2})
+        await manager.broadcast_to_group("other", {"type": "UPDATE_BILL", "id": 3})
+        await asyncio.sleep(0.05)
+
+    _run(scenario())
+    batches = dict(manager.published)
+    assert batches["g"]["type"] == "BATCH"
+    assert [e["id"] for e in batches["g"]["events"]] == [1, 2]
+    assert batches["other"] == {"group_id": "other", "type": "UPDATE_BILL", "id": 3}
+    assert not manager._pending and not manager._flush_tasks
+
+
+def test_batch_is_sent_early_once_full(manager):
+    async def scenario():
+        for i in range(3):
+            await manager.broadcast_to_group("g", {"type": "UPDATE_BILL", "id": i})
+        # Let the spawned flush run, well inside the 20ms window
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert len(manager.published) == 1
+        await asyncio.sleep(0.05)
+
+    _run(scenario())
+    [(group_id, batch)] = manager.published
+    assert [e["id"] for e in batch["events"]] == [0, 1, 2]
+
+
+def test_held_events_go_out_before_an_immediate_one(manager):
+    async def scenario():
+        await manager.broadcast_to_group("g", {"type": "UPDATE_BILL", "id": 1})
+        await manager.broadcast_to_group("g", {"type": "DELETE_BILL", "id": 2})
+        await asyncio.sleep(0.05)
+
+    _run(scenario())
+    assert [event["id"] for _, event in manager.published] == [1, 2]
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from app.services.socket_manager import ClientConnection, encode_frame
+
+FRAME = json.dumps({"seq": 3, "group_id": "g", "type": "NEW_BILL", "amount": 12.5, "paid": None})
+
+
+def test_json_frames_pass_through_unchanged():
+    assert encode_frame(FRAME, "json") is FRAME
+
+
+def test_msgpack_frames_decode_to_the_same_event():
+    msgpack = pytest.importorskip("msgpack")
+    frame = encode_frame(FRAME, "msgpack")
+    assert isinstance(frame, bytes)
+    assert msgpack.unpackb(frame, raw=False) == json.loads(FRAME)
+
+
+def test_broadcast_encodes_once_per_format(monkeypatch):
+    pytest.importorskip("msgpack")
+    from app.services import socket_manager
+
+    calls = []
+    real = socket_manager.encode_frame
+
+    def counting(text, encoding):
+        calls.append(encoding)
+        return real(text, encoding)
+
+    monkeypatch.setattr(socket_manager, "encode_frame", counting)
+    clients = [
+        ClientConnection(None, None, user_id=str(i), encoding=encoding)
+        for i, encoding in enumerate(["msgpack", "json", "msgpack", "msgpack"])
+    ]
+    frames: dict = {}
+    for client in clients:
+        assert client.enqueue(FRAME, frames)
+
+    assert calls == ["msgpack"]
+    assert clients[1].queue.get_nowait() == FRAME
+    assert clients[0].queue.get_nowait() is clients[2].queue.get_nowait()
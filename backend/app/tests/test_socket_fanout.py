@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+from redis.exceptions import RedisError
+
+from app.services import socket_manager as sm
+from app.services.socket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent: list[dict] = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int | None = None):
+        self.closed_with = code
+
+
+async def _until(condition, timeout: float = 2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+async def _workers(count: int) -> list[ConnectionManager]:
+    workers = [ConnectionManager() for _ in range(count)]
+    for worker in workers:
+        await worker.start()
+    return workers
+
+
+async def _stop(*workers: ConnectionManager):
+    for worker in workers:
+        await worker.stop()
+
+
+async def _connect(worker: ConnectionManager, group_id: str, user_id: str = "u1") -> FakeWebSocket:
+    websocket = FakeWebSocket()
+    assert await worker.connect(websocket, group_id, "token", {"sub": user_id, "iat": 0})
+    return websocket
+
+
+def _events(websocket: FakeWebSocket) -> list[dict]:
+    return [frame for frame in websocket.sent if frame["type"] != "HELLO"]
+
+
+def test_broadcasts_reach_sockets_on_every_worker(fake_redis):
+    async def scenario():
+        a, b = await _workers(2)
+        try:
+            on_a, on_b = await _connect(a, "g1"), await _connect(b, "g1")
+            elsewhere = await _connect(b, "g2")
+            await a.broadcast_to_group("g1", {"type": "NEW_BILL", "id": 1})
+            await _until(lambda: _events(on_a) and _events(on_b))
+            await asyncio.sleep(0.05)
+            return _events(on_a), _events(on_b), _events(elsewhere)
+        finally:
+            await _stop(a, b)
+
+    on_a, on_b, elsewhere = asyncio.run(scenario())
+
+    event = {"seq": 1, "group_id": "g1", "type": "NEW_BILL", "id": 1}
+    assert on_a == [event]
+    assert on_b == [event]
+    assert elsewhere == []
+
+
+def test_workers_subscribe_only_while_they_hold_sockets(fake_redis):
+    async def scenario():
+        [worker] = await _workers(1)
+        try:
+            websocket = await _connect(worker, "g1")
+            subscribed = set(worker._subscribed)
+            await worker.disconnect(websocket)
+            return subscribed, set(worker._subscribed)
+        finally:
+            await _stop(worker)
+
+    subscribed, after = asyncio.run(scenario())
+
+    assert subscribed == {"ws:group:g1", "ws:user:u1"}
+    assert after == set()
+
+
+def test_broadcasts_fall_back_to_local_sockets_when_redis_fails(fake_redis, monkeypatch):
+    async def failing_publish(*args, **kwargs):
+        raise RedisError("down")
+
+    async def scenario():
+        [worker] = await _workers(1)
+        try:
+            websocket = await _connect(worker, "g1")
+            monkeypatch.setattr(sm, "_publish_event", failing_publish)
+            await worker.broadcast_to_group("g1", {"type": "NEW_BILL", "id": 1})
+            await _until(lambda: _events(websocket))
+            return _events(websocket)
+        finally:
+            await _stop(worker)
+
+    # Unsequenced, but delivered
+    assert asyncio.run(scenario()) == [{"group_id": "g1", "type": "NEW_BILL", "id": 1}]
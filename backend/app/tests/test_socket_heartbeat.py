@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services import socket_manager as sm
+from app.services.socket_manager import (
+    GOING_AWAY_CLOSE_CODE,
+    POLICY_CLOSE_CODE,
+    SLOW_CONSUMER_CLOSE_CODE,
+    ConnectionManager,
+)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent: list[dict] = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int | None = None):
+        self.closed_with = code
+
+
+@pytest.fixture
+def manager(fake_redis):
+    return ConnectionManager()
+
+
+async def _connect(manager: ConnectionManager, user_id: str = "u1") -> FakeWebSocket:
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "g1", "token", {"sub": user_id, "iat": 0})
+    return websocket
+
+
+def test_only_silent_clients_that_answered_pings_are_reaped(manager):
+    reaped = sm._reaped.value()
+
+    async def scenario():
+        silent, talking, listen_only = [await _connect(manager, f"u{i}") for i in range(3)]
+        for websocket in (silent, talking):
+            await manager.handle_message(websocket, json.dumps({"type": "PONG"}))
+        for websocket in (silent, listen_only):
+            manager.clients[websocket].last_seen -= settings.WS_IDLE_TIMEOUT + 1
+
+        manager._heartbeat()
+        await asyncio.sleep(0.01)
+        return silent, talking, listen_only
+
+    silent, talking, listen_only = asyncio.run(scenario())
+
+    assert silent.closed_with == GOING_AWAY_CLOSE_CODE
+    assert set(manager.clients) == {talking, listen_only}
+    assert sm._reaped.value() == reaped + 1
+    # Everyone still connected was pinged
+    for websocket in (talking, listen_only):
+        assert websocket.sent[-1]["type"] == "PING"
+
+
+def test_connections_are_capped_per_user(manager, monkeypatch):
+    monkeypatch.setattr(settings, "WS_MAX_CONNECTIONS_PER_USER", 2)
+
+    async def scenario():
+        first, second, third = [await _connect(manager) for _ in range(3)]
+        other_user = await _connect(manager, "u2")
+        # A slot is freed when one of the user's sockets goes away
+        await manager.disconnect(first)
+        fourth = await _connect(manager)
+        return second, third, other_user, fourth
+
+    second, third, other_user, fourth = asyncio.run(scenario())
+
+    assert third.closed_with == POLICY_CLOSE_CODE
+    assert set(manager.clients) == {second, other_user, fourth}
+    assert manager._user_counts == {"u1": 2, "u2": 1}
+
+
+def test_connections_are_capped_per_worker(manager, monkeypatch):
+    monkeypatch.setattr(settings, "WS_MAX_CONNECTIONS_PER_WORKER", 2)
+
+    async def scenario():
+        return [await _connect(manager, f"u{i}") for i in range(3)]
+
+    admitted_a, admitted_b, refused = asyncio.run(scenario())
+
+    assert refused.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert set(manager.clients) == {admitted_a, admitted_b}
+
+
+def test_stop_flushes_queued_frames_then_closes_with_1001(manager):
+    async def scenario():
+        websocket = await _connect(manager)
+        await manager.broadcast_to_group("g1", {"type": "NEW_BILL", "id": 1})
+        await manager.stop()
+        return websocket
+
+    websocket = asyncio.run(scenario())
+
+    assert [frame["type"] for frame in websocket.sent] == ["HELLO", "NEW_BILL"]
+    assert websocket.closed_with == GOING_AWAY_CLOSE_CODE
+    assert manager.clients == {} and manager._user_counts == {}
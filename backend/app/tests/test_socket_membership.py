@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services import socket_manager as sm
+from app.services.socket_manager import POLICY_CLOSE_CODE, ClientConnection, ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.closed_with = None
+
+    async def close(self, code: int | None = None):
+        self.closed_with = code
+
+
+@pytest.fixture
+def manager(fake_redis, monkeypatch):
+    m = ConnectionManager()
+    m.memberships = {}
+
+    async def get_group_ids(user_id):
+        return set(m.memberships.get(user_id, ()))
+
+    monkeypatch.setattr(sm.membership_cache, "get_group_ids", get_group_ids)
+    return m
+
+
+async def _socket(manager, groups: set[str], multiplexed: bool):
+    websocket = FakeWebSocket()
+    manager.clients[websocket] = ClientConnection(websocket, manager._drop, "u1", multiplexed)
+    manager._user_counts["u1"] = manager._user_counts.get("u1", 0) + 1
+    await manager._follow_user(websocket, "u1")
+    for gid in groups:
+        await manager._join(websocket, gid)
+    return websocket
+
+
+def _frames(manager, websocket) -> list[dict]:
+    queue = manager.clients[websocket].queue
+    frames = []
+    while not queue.empty():
+        frames.append(json.loads(queue.get_nowait()))
+    return frames
+
+
+def test_per_user_socket_follows_new_groups(manager, fake_redis):
+    async def scenario():
+        websocket = await _socket(manager, {"g1"}, multiplexed=True)
+        await fake_redis.set(f"{manager.seq_prefix}g2", 7)
+        manager.memberships["u1"] = {"g1", "g2"}
+        await manager._refresh_user_groups("u1")
+        return websocket
+
+    websocket = asyncio.run(scenario())
+
+    assert manager.clients[websocket].groups == {"g1", "g2"}
+    assert websocket in manager.active_connections["g2"]
+    # HELLO first, so the client knows the new group's seq before refetching
+    assert _frames(manager, websocket) == [
+        {"type": "HELLO", "seqs": {"g1": 0, "g2": 7}},
+        {"type": "MEMBERSHIP_CHANGED", "group_ids": ["g1", "g2"]},
+    ]
+
+
+def test_per_user_socket_leaves_groups_it_lost(manager):
+    async def scenario():
+        websocket = await _socket(manager, {"g1", "g2"}, multiplexed=True)
+        manager.memberships["u1"] = {"g2"}
+        await manager._refresh_user_groups("u1")
+        return websocket
+
+    websocket = asyncio.run(scenario())
+
+    assert manager.clients[websocket].groups == {"g2"}
+    assert "g1" not in manager.active_connections
+    assert _frames(manager, websocket)[-1] == {"type": "MEMBERSHIP_CHANGED", "group_ids": ["g2"]}
+
+
+def test_per_group_socket_is_closed_when_its_group_is_lost(manager):
+    async def scenario():
+        kept = await _socket(manager, {"g2"}, multiplexed=False)
+        lost = await _socket(manager, {"g1"}, multiplexed=False)
+        manager.memberships["u1"] = {"g2"}
+        await manager._refresh_user_groups("u1")
+        return kept, lost
+
+    kept, lost = asyncio.run(scenario())
+
+    assert lost.closed_with == POLICY_CLOSE_CODE
+    assert lost not in manager.clients
+    assert kept.closed_with is None
+    # Per-group sockets get no membership frames
+    assert _frames(manager, kept) == []
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.services.socket_manager import ClientConnection, ConnectionManager
+
+GROUP = "g1"
+
+
+@pytest.fixture
+def manager(fake_redis):
+    m = ConnectionManager()
+    # Any non-None pubsub makes _publish go through Redis
+    m._pubsub = object()
+    return m
+
+
+def _connect(manager: ConnectionManager) -> tuple[object, ClientConnection]:
+    websocket = object()
+    client = ClientConnection(websocket, None, user_id="u1")
+    client.groups.add(GROUP)
+    manager.clients[websocket] = client
+    manager.active_connections.setdefault(GROUP, set()).add(websocket)
+    return websocket, client
+
+
+def _frames(client: ClientConnection) -> list[dict]:
+    frames = []
+    while not client.queue.empty():
+        frames.append(json.loads(client.queue.get_nowait()))
+    return frames
+
+
+async def _publish(manager: ConnectionManager, count: int):
+    for i in range(count):
+        await manager._publish(GROUP, {"group_id": GROUP, "type": "NEW_BILL", "n": i})
+
+
+def test_resume_replays_only_missed_events(manager):
+    async def scenario():
+        websocket, client = _connect(manager)
+        await _publish(manager, 3)
+        await manager.resume(websocket, GROUP, 1)
+        return _frames(client)
+
+    frames = asyncio.run(scenario())
+    assert [f["seq"] for f in frames] == [2, 3]
+    assert [f["n"] for f in frames] == [1, 2]
+
+
+def test_resume_when_current_sends_nothing(manager):
+    async def scenario():
+        websocket, client = _connect(manager)
+        await _publish(manager, 2)
+        await manager.resume(websocket, GROUP, 2)
+        return _frames(client)
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_resume_after_trim_sends_resync(manager, fake_redis):
+    async def scenario():
+        websocket, client = _connect(manager)
+        await _publish(manager, 5)
+        await fake_redis.xtrim(f"{manager.stream_prefix}{GROUP}", maxlen=2, approximate=False)
+        await manager.resume(websocket, GROUP, 1)
+        return _frames(client)
+
+    assert asyncio.run(scenario()) == [{"type": "RESYNC", "group_id": GROUP, "seq": 5}]
+
+
+def test_resume_that_would_overflow_the_queue_sends_resync(manager, monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_QUEUE_SIZE", 3)
+
+    async def scenario():
+        websocket, client = _connect(manager)
+        await _publish(manager, 6)
+        await manager.resume(websocket, GROUP, 0)
+        return _frames(client)
+
+    assert asyncio.run(scenario()) == [{"type": "RESYNC", "group_id": GROUP, "seq": 6}]
+
+
+def test_resume_without_redis_sends_resync(manager, fake_redis, monkeypatch):
+    def down(*args, **kwargs):
+        raise RedisError("down")
+
+    async def scenario():
+        websocket, client = _connect(manager)
+        monkeypatch.setattr(fake_redis, "pipeline", down)
+        await manager.resume(websocket, GROUP, 3)
+        return _frames(client)
+
+    assert asyncio.run(scenario()) == [{"type": "RESYNC", "group_id": GROUP, "seq": 0}]
+
+
+def test_evicted_counter_is_reseeded_from_the_stream(manager, fake_redis):
+    async def scenario():
+        websocket, client = _connect(manager)
+        await _publish(manager, 2)
+        # allkeys-lru (or expiry) drops the counter but keeps the stream
+        await fake_redis.delete(f"{manager.seq_prefix}{GROUP}")
+        await _publish(manager, 1)
+        # Published through Redis, not the unsequenced local fallback
+        assert _frames(client) == []
+        await manager.resume(websocket, GROUP, 2)
+        return _frames(client)
+
+    frames = asyncio.run(scenario())
+    assert [f["seq"] for f in frames] == [3]
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services import socket_manager as sm
+from app.services.socket_manager import SLOW_CONSUMER_CLOSE_CODE, ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, send_delay: float = 0):
+        self.send_delay = send_delay
+        self.sent: list[dict] = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int | None = None):
+        self.closed_with = code
+
+
+@pytest.fixture
+def manager(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_QUEUE_SIZE", 3)
+    monkeypatch.setattr(settings, "WS_SEND_TIMEOUT", 0.2)
+    # No pub/sub listener: broadcasts go straight to the local sockets
+    return ConnectionManager()
+
+
+async def _connect(manager: ConnectionManager, websocket: FakeWebSocket, user_id: str):
+    assert await manager.connect(websocket, "g1", "token", {"sub": user_id, "iat": 0})
+    await asyncio.sleep(0.01)  # let the writer send HELLO
+    websocket.sent.clear()
+
+
+async def _broadcast(manager: ConnectionManager, count: int):
+    for i in range(count):
+        await manager.broadcast_to_group("g1", {"type": "NEW_BILL", "id": i})
+        await asyncio.sleep(0.01)  # sockets that keep up send it meanwhile
+
+
+def test_a_slow_socket_does_not_delay_the_others(manager):
+    async def scenario():
+        slow, fast = FakeWebSocket(send_delay=1), FakeWebSocket()
+        await _connect(manager, slow, "u1")
+        await _connect(manager, fast, "u2")
+        await _broadcast(manager, 3)
+        await asyncio.sleep(0.02)
+        return len(slow.sent), len(fast.sent)
+
+    assert asyncio.run(scenario()) == (0, 3)
+
+
+def test_sockets_that_fall_behind_their_queue_are_evicted(manager):
+    evictions = sm._evictions.value()
+
+    async def scenario():
+        stuck, healthy = FakeWebSocket(send_delay=1), FakeWebSocket()
+        await _connect(manager, stuck, "u1")
+        await _connect(manager, healthy, "u2")
+        # HELLO is still in flight; the fourth event overflows its queue of three
+        await _broadcast(manager, 5)
+        await asyncio.sleep(0.02)
+        return stuck, healthy
+
+    stuck, healthy = asyncio.run(scenario())
+
+    assert stuck.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert stuck not in manager.clients and "g1" in manager.active_connections
+    assert [frame["id"] for frame in healthy.sent] == [0, 1, 2, 3, 4]
+    assert sm._evictions.value() == evictions + 1
+
+
+def test_sockets_whose_send_times_out_are_dropped(manager):
+    failures = sm._send_failures.value()
+
+    async def scenario():
+        hung = FakeWebSocket()
+        await _connect(manager, hung, "u1")
+        hung.send_delay = 10
+        await _broadcast(manager, 1)
+        await asyncio.sleep(settings.WS_SEND_TIMEOUT + 0.1)
+        return hung
+
+    hung = asyncio.run(scenario())
+
+    assert hung not in manager.clients
+    assert manager.active_connections == {}
+    assert sm._send_failures.value() == failures + 1
@@ -0,0 +1,160 @@
+import asyncio
+import random
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.tasks import TaskDispatcher
+
+GROUPS = ("a", "b", "c")
+
+
+def _dispatcher(log: list, delay: float = 0.0) -> TaskDispatcher:
+    d = TaskDispatcher()
+
+    @d.task("record")
+    async def record(group: str, n: int):
+        if delay:
+            await asyncio.sleep(random.random() * delay)
+        log.append((d, group, n))
+
+    return d
+
+
+async def _wait_for(condition, timeout: float = 5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _order(log: list, group: str) -> list[int]:
+    return [n for _, g, n in log if g == group]
+
+
+@pytest.fixture
+def local_backend(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_BACKEND", "local")
+
+
+def test_unknown_task_is_rejected():
+    with pytest.raises(KeyError):
+        asyncio.run(TaskDispatcher().enqueue("missing"))
+
+
+def test_runs_inline_when_not_started(local_backend):
+    log = []
+    d = _dispatcher(log)
+
+    asyncio.run(d.enqueue("record", key="a", group="a", n=1))
+
+    assert _order(log, "a") == [1]
+
+
+def test_keyed_tasks_keep_their_order(local_backend, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_WORKERS", 4)
+    log = []
+    d = _dispatcher(log, delay=0.005)
+
+    async def scenario():
+        await d.start()
+        for n in range(20):
+            for group in GROUPS:
+                await d.enqueue("record", key=group, group=group, n=n)
+        await d.stop()
+
+    asyncio.run(scenario())
+
+    for group in GROUPS:
+        assert _order(log, group) == list(range(20))
+
+
+def test_full_keyed_queue_drops_instead_of_blocking(local_backend, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_WORKERS", 1)
+    monkeypatch.setattr(settings, "TASK_QUEUE_SIZE", 1)
+    monkeypatch.setattr(settings, "TASK_ENQUEUE_TIMEOUT", 0.05)
+    ran = []
+    d = TaskDispatcher()
+
+    async def scenario():
+        release = asyncio.Event()
+
+        @d.task("slow")
+        async def slow(n: int):
+            await release.wait()
+            ran.append(n)
+
+        await d.start()
+        await d.enqueue("slow", key="a", n=1)  # taken by the consumer, which blocks
+        await asyncio.sleep(0)
+        await d.enqueue("slow", key="a", n=2)  # fills the queue
+        await asyncio.wait_for(d.enqueue("slow", key="a", n=3), timeout=1)  # dropped
+        release.set()
+        await d.stop()
+
+    asyncio.run(scenario())
+
+    assert ran == [1, 2]
+
+
+def test_falls_back_to_running_locally_when_redis_is_down(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_BACKEND", "redis")
+
+    async def down(*args, **kwargs):
+        raise RedisError("down")
+
+    monkeypatch.setattr(fake_redis, "lpush", down)
+    log = []
+    d = _dispatcher(log)
+
+    asyncio.run(d.enqueue("record", key="a", group="a", n=1))
+
+    assert _order(log, "a") == [1]
+
+
+def test_keyed_order_holds_across_processes(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_BACKEND", "redis")
+    monkeypatch.setattr(settings, "TASK_SHARDS", 4)
+    log = []
+    # Two dispatchers sharing one Redis stand in for two worker processes
+    first, second = _dispatcher(log, delay=0.005), _dispatcher(log, delay=0.005)
+
+    async def scenario():
+        await first.start()
+        await second.start()
+        for n in range(20):
+            for group in GROUPS:
+                await random.choice((first, second)).enqueue("record", key=group, group=group, n=n)
+        await _wait_for(lambda: len(log) == 20 * len(GROUPS))
+        await first.stop()
+        await second.stop()
+
+    asyncio.run(scenario())
+
+    for group in GROUPS:
+        assert _order(log, group) == list(range(20))
+        # Every task of a key ran in the process holding its shard
+        assert len({d for d, g, _ in log if g == group}) == 1
+
+
+def test_stopping_hands_shards_over(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_BACKEND", "redis")
+    monkeypatch.setattr(settings, "TASK_SHARDS", 2)
+    monkeypatch.setattr(settings, "TASK_SHARD_LEASE", 0.3)
+    log = []
+    first, second = _dispatcher(log), _dispatcher(log)
+
+    async def scenario():
+        await first.start()
+        await _wait_for(lambda: len(first._shards) == 2)
+        await second.start()
+        await first.stop()
+        await first.enqueue("record", key="a", group="a", n=1)
+        await _wait_for(lambda: log)
+        await second.stop()
+
+    asyncio.run(scenario())
+
+    assert [(d, n) for d, _, n in log] == [(second, 1)]
@@ -0,0 +1,371 @@
+"""
+HTTP load benchmark for the API hot paths.
+
+Drives the real FastAPI app against the Postgres and Redis in .env, using a
+dataset from scripts/generate_dataset.py (every user's password is
+"password"). Virtual users log in once, then loop over a weighted mix of
+scenarios shaped like the frontend's traffic:
+
+    login        POST /auth/login
+    dashboard    GET /summary/ and GET /groups/ together
+    group_view   GET /groups/{id}, /bills/group/{id} and /summary/debts together
+    create_bill  POST /bills/ (EQUAL or EXACT split over the group's members)
+    mark_paid    PATCH /bills/shares/{id}/mark-paid on one of the user's debts
+    settle_up    POST /summary/settle
+
+Each concurrency level runs for --duration seconds after a --warmup.
+Throughput and p50/p95/p99 latency are reported per scenario:
+
+    uv run python -m benchmarks.http_load --concurrency 10,50,100 --duration 30 \\
+        --save benchmarks/baselines/main.json
+    uv run python -m benchmarks.http_load --concurrency 10,50,100 --duration 30 \\
+        --compare benchmarks/baselines/main.json
+
+By default the app runs in-process over an ASGI transport, with rate
+limiting off. That leaves out the network and uvicorn. Pass --url to
+benchmark a running server instead; rate limits then apply as configured.
+--compare exits non-zero when any p95 or throughput moves past --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from datetime import UTC, datetime
+
+import httpx
+
+API = "/api/v1"
+
+DEFAULT_MIX = {
+    "login": 2,
+    "dashboard": 35,
+    "group_view": 35,
+    "create_bill": 12,
+    "mark_paid": 10,
+    "settle_up": 6,
+}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.enabled = False
+
+    def add(self, scenario: str, elapsed: float, ok: bool):
+        if not self.enabled:
+            return
+        if ok:
+            self.latencies[scenario].append(elapsed)
+        else:
+            self.errors[scenario] += 1
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, email: str, rng: random.Random):
+        self.client = client
+        self.email = email
+        self.rng = rng
+        self.user_id: str | None = None
+        self.headers: dict[str, str] = {}
+        self.group_ids: list[str] = []
+        self.members: dict[str, list[str]] = {}  # group id -> member user ids
+
+    async def setup(self):
+        await self._login()
+        me = await self.client.get(f"{API}/users/me", headers=self.headers)
+        me.raise_for_status()
+        self.user_id = me.json()["id"]
+        groups = await self.client.get(f"{API}/groups/", params={"limit": 50}, headers=self.headers)
+        groups.raise_for_status()
+        self.group_ids = [g["id"] for g in groups.json()["items"]]
+
+    async def _login(self) -> httpx.Response:
+        response = await self.client.post(
+            f"{API}/auth/login", data={"username": self.email, "password": "password"}
+        )
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+
+    def _group(self) -> str | None:
+        return self.rng.choice(self.group_ids) if self.group_ids else None
+
+    async def _members(self, group_id: str) -> list[str]:
+        if group_id not in self.members:
+            detail = await self.client.get(f"{API}/groups/{group_id}", headers=self.headers)
+            detail.raise_for_status()
+            self.members[group_id] = [m["user"]["id"] for m in detail.json()["members"]]
+        return self.members[group_id]
+
+    # Each scenario returns (seconds, responses) for the requests it is judged
+    # on, or None when this user has nothing to act on (no groups, no debts)
+
+    @staticmethod
+    async def _timed(*requests) -> tuple[float, list[httpx.Response]]:
+        """Issue requests concurrently, like the page that makes them; time until the last lands."""
+        started = time.perf_counter()
+        responses = await asyncio.gather(*requests)
+        return time.perf_counter() - started, list(responses)
+
+    async def login(self):
+        return await self._timed(self._login())
+
+    async def dashboard(self):
+        return await self._timed(
+            self.client.get(f"{API}/summary/", headers=self.headers),
+            self.client.get(f"{API}/groups/", params={"limit": 20}, headers=self.headers),
+        )
+
+    async def group_view(self):
+        group_id = self._group()
+        if group_id is None:
+            return None
+        return await self._timed(
+            self.client.get(f"{API}/groups/{group_id}", headers=self.headers),
+            self.client.get(f"{API}/bills/group/{group_id}", params={"limit": 20}, headers=self.headers),
+            self.client.get(f"{API}/summary/debts", params={"group_id": group_id}, headers=self.headers),
+        )
+
+    async def create_bill(self):
+        group_id = self._group()
+        if group_id is None:
+            return None
+        members = await self._members(group_id)
+        participants = self.rng.sample(members, self.rng.randint(min(2, len(members)), len(members)))
+        total = round(self.rng.uniform(50, 5000), 2)
+        if self.rng.random() < 0.2:
+            split_type = "EXACT"
+            each = round(total / len(participants), 2)
+            amounts = [each] * len(participants)
+            amounts[0] = round(amounts[0] + total - sum(amounts), 2)
+            shares = [{"user_id": uid, "amount": a} for uid, a in zip(participants, amounts, strict=True)]
+        else:
+            split_type = "EQUAL"
+            shares = [{"user_id": uid} for uid in participants]
+        body = {
+            "group_id": group_id,
+            "description": "Benchmark bill",
+            "total_amount": total,
+            "split_type": split_type,
+            "shares": shares,
+        }
+        return await self._timed(self.client.post(f"{API}/bills/", json=body, headers=self.headers))
+
+    async def mark_paid(self):
+        group_id = self._group()
+        if group_id is None:
+            return None
+        # Finding a debt is setup, not part of what is measured
+        listing = await self.client.get(
+            f"{API}/bills/group/{group_id}", params={"limit": 50}, headers=self.headers
+        )
+        if listing.status_code != 200:
+            return None
+        debts = [
+            share["id"]
+            for bill in listing.json()["items"]
+            if bill["paid_by"] != self.user_id
+            for share in bill["shares"]
+            if share["user_id"] == self.user_id and not share["paid"]
+        ]
+        if not debts:
+            return None
+        share_id = self.rng.choice(debts)
+        return await self._timed(
+            self.client.patch(f"{API}/bills/shares/{share_id}/mark-paid", headers=self.headers)
+        )
+
+    async def settle_up(self):
+        group_id = self._group()
+        if group_id is None:
+            return None
+        return await self._timed(
+            self.client.post(f"{API}/summary/settle", json={"group_id": group_id}, headers=self.headers)
+        )
+
+
+async def _virtual_user_loop(vu: VirtualUser, mix: dict[str, int], recorder: Recorder, stop: asyncio.Event):
+    names, weights = list(mix), list(mix.values())
+    while not stop.is_set():
+        scenario = vu.rng.choices(names, weights=weights)[0]
+        try:
+            outcome = await getattr(vu, scenario)()
+        except httpx.HTTPError:
+            recorder.add(scenario, 0.0, ok=False)
+            continue
+        if outcome is None:
+            continue
+        elapsed, responses = outcome
+        recorder.add(scenario, elapsed, ok=all(r.status_code < 400 for r in responses))
+
+
+async def run_level(client, emails, concurrency, args, mix, rng) -> dict:
+    vus = [VirtualUser(client, emails[i % len(emails)], random.Random(rng.random())) for i in range(concurrency)]
+    # Log everyone in before the clock starts, a few at a time (bcrypt is slow by design)
+    semaphore = asyncio.Semaphore(16)
+
+    async def setup(vu):
+        async with semaphore:
+            await vu.setup()
+
+    await asyncio.gather(*(setup(vu) for vu in vus))
+
+    recorder, stop = Recorder(), asyncio.Event()
+    loops = [asyncio.create_task(_virtual_user_loop(vu, mix, recorder, stop)) for vu in vus]
+    await asyncio.sleep(args.warmup)
+    recorder.enabled = True
+    started = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    recorder.enabled = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*loops, return_exceptions=True)
+
+    results = {
+        scenario: summarize(recorder.latencies[scenario], recorder.errors[scenario], elapsed)
+        for scenario in mix
+        if recorder.latencies[scenario] or recorder.errors[scenario]
+    }
+    all_latencies = [v for values in recorder.latencies.values() for v in values]
+    results["total"] = summarize(all_latencies, sum(recorder.errors.values()), elapsed)
+    return results
+
+
+def print_level(concurrency: int, results: dict):
+    print(f"\n== concurrency {concurrency}")
+    print(f"{'scenario':<12} {'count':>7} {'errors':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for scenario, r in results.items():
+        print(
+            f"{scenario:<12} {r['count']:>7} {r['errors']:>6} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}"
+        )
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """Regressions beyond `tolerance` (a fraction) in p95 latency or throughput."""
+    problems = []
+    for level, scenarios in current.items():
+        for scenario, now in scenarios.items():
+            before = baseline.get(level, {}).get(scenario)
+            if not before or not before["count"]:
+                continue
+            if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                problems.append(
+                    f"c={level} {scenario}: p95 {before['p95_ms']:.1f}ms -> {now['p95_ms']:.1f}ms"
+                )
+            if now["rps"] < before["rps"] * (1 - tolerance):
+                problems.append(f"c={level} {scenario}: rps {before['rps']:.1f} -> {now['rps']:.1f}")
+    return problems
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args) -> int:
+    mix = dict(DEFAULT_MIX)
+    for item in args.mix or []:
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = int(weight)
+    mix = {name: weight for name, weight in mix.items() if weight > 0}
+
+    rng = random.Random(args.seed)
+    emails = [f"user{i}@example.com" for i in rng.sample(range(1, args.user_pool + 1), args.user_pool)]
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        else:
+            from app.core.config import settings
+
+            settings.RATE_LIMIT_ENABLED = False
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout
+            )
+        await stack.enter_async_context(client)
+
+        current = {}
+        for concurrency in levels:
+            current[str(concurrency)] = await run_level(client, emails, concurrency, args, mix, rng)
+            print_level(concurrency, current[str(concurrency)])
+
+    if args.save:
+        report = {
+            "meta": {
+                "revision": _git_revision(),
+                "at": datetime.now(UTC).isoformat(),
+                "target": args.url or "in-process",
+                "duration": args.duration,
+                "seed": args.seed,
+                "mix": mix,
+            },
+            "results": current,
+        }
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        problems = compare(baseline, current, args.tolerance)
+        if problems:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for line in problems:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the API hot paths.")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--concurrency", default="10,50", help="comma-separated virtual user counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds per level")
+    parser.add_argument("--user-pool", type=int, default=500, help="log in as user1..userN@example.com")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--mix", nargs="*", metavar="SCENARIO=WEIGHT", help="override scenario weights")
+    parser.add_argument("--save", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression, as a fraction")
+    sys.exit(asyncio.run(main(parser.parse_args())))
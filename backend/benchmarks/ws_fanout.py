@@ -0,0 +1,382 @@
+"""
+Websocket fan-out harness for ConnectionManager.
+
+Opens --sockets simulated clients spread evenly over --groups groups on
+/ws/{group_id}, then creates bills over HTTP at --rate per second and
+measures:
+
+  * end-to-end delivery latency: from the POST /bills/ leaving the harness
+    to the NEW_BILL frame reaching each socket (p50/p95/p99/max)
+  * delivered vs expected frames
+  * server memory per connection (RSS growth while the sockets open)
+  * server CPU per broadcast (process CPU time over the bill phase / bills)
+  * time ConnectionManager spends queueing one frame on every local socket
+    (ws_broadcast_fanout_seconds from /metrics)
+
+--slow-fraction of the sockets are slow consumers: "stall" clients never
+read, "drip" clients read one frame every --slow-delay seconds. They use a
+tiny receive buffer so backpressure reaches the server quickly. The report
+shows how many were evicted (close code 1013) and whether the fast clients'
+latency held.
+
+The harness provisions its own users and groups through the API. By
+default it starts a single uvicorn worker with rate limits off and the
+websocket caps raised:
+
+    uv run python -m benchmarks.ws_fanout --sockets 5000 --groups 20 --rate 20 --duration 30
+
+Pass --url (and --server-pid for memory and CPU) to target a server that
+is already running; rate limits and WS_MAX_CONNECTIONS_* must allow the
+load.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import httpx
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+from benchmarks.http_load import percentile
+
+API = "/api/v1"
+SLOW_CONSUMER_CLOSE_CODE = 1013
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+# -------------------------
+# SERVER PROCESS STATS
+# -------------------------
+def rss_bytes(pid: int) -> int | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def cpu_seconds(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    # utime and stime are fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+async def scrape(client: httpx.AsyncClient) -> dict[str, float]:
+    """/metrics, summed per series name across labels."""
+    response = await client.get("/metrics")
+    totals: dict[str, float] = {}
+    for line in response.text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name_labels, _, value = line.rpartition(" ")
+        name = name_labels.split("{", 1)[0]
+        totals[name] = totals.get(name, 0.0) + float(value)
+    return totals
+
+
+# -------------------------
+# SIMULATED CLIENTS
+# -------------------------
+class SimClient:
+    def __init__(self, harness: "Harness", group_id: str, token: str, slow: str | None):
+        self.harness = harness
+        self.group_id = group_id
+        self.token = token
+        self.slow = slow  # None, "stall" or "drip"
+        self.latencies: list[float] = []
+        self.close_code: int | None = None
+        self.connected = False
+
+    async def _slow_socket(self, host: str, port: int) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # A tiny buffer so a non-reading client pushes back on the server quickly
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, (host, port))
+        return sock
+
+    async def run(self, ws_url: str, connected: asyncio.Semaphore):
+        url = f"{ws_url}/ws/{self.group_id}?token={self.token}"
+        options = {"ping_interval": None, "max_size": None, "compression": None}
+        websocket = None
+        try:
+            async with connected:
+                if self.slow:
+                    parts = urlsplit(ws_url)
+                    sock = await self._slow_socket(parts.hostname, parts.port or 80)
+                    websocket = await connect(url, sock=sock, max_queue=1, **options)
+                else:
+                    websocket = await connect(url, **options)
+            self.connected = True
+            async with websocket:
+                if self.slow == "stall":
+                    await websocket.wait_closed()
+                else:
+                    await self._read(websocket)
+        except ConnectionClosed:
+            pass
+        except (OSError, InvalidHandshake):
+            # Refused outright (caps, auth) or the server is unreachable
+            self.harness.connect_errors += 1
+        finally:
+            if websocket is not None:
+                self.close_code = websocket.close_code
+
+    async def _read(self, websocket):
+        async for frame in websocket:
+            received = time.perf_counter()
+            message = json.loads(frame)
+            kind = message.get("type")
+            if kind == "PING":
+                await websocket.send(json.dumps({"type": "PONG"}))
+                continue
+            events = message.get("events", []) if kind == "BATCH" else [message]
+            for event in events:
+                sent = self.harness.sent.get(event.get("description"))
+                if event.get("type") == "NEW_BILL" and sent is not None:
+                    self.latencies.append(received - sent)
+            if self.slow == "drip":
+                await asyncio.sleep(self.harness.args.slow_delay)
+
+
+# -------------------------
+# HARNESS
+# -------------------------
+class Harness:
+    def __init__(self, args):
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.sent: dict[str, float] = {}  # bill description -> perf_counter at POST
+        self.posted: dict[str, int] = {}  # group id -> bills created
+        self.post_errors = 0
+        self.connect_errors = 0
+        self.tokens: list[str] = []
+        self.user_ids: list[str] = []
+        self.group_ids: list[str] = []
+
+    async def provision(self, http: httpx.AsyncClient):
+        """Register --users users and --groups groups that all of them belong to."""
+        emails = [f"fanout-{self.run_id}-{i}@example.com" for i in range(self.args.users)]
+        for email in emails:
+            response = await http.post(
+                f"{API}/users/register", json={"name": email.split("@")[0], "email": email, "password": "password"}
+            )
+            response.raise_for_status()
+            login = await http.post(f"{API}/auth/login", data={"username": email, "password": "password"})
+            login.raise_for_status()
+            self.tokens.append(login.json()["access_token"])
+
+        owner = {"Authorization": f"Bearer {self.tokens[0]}"}
+        for i in range(self.args.groups):
+            response = await http.post(
+                f"{API}/groups/",
+                json={"name": f"Fan-out {self.run_id} #{i}", "initial_members": emails[1:]},
+                headers=owner,
+            )
+            response.raise_for_status()
+            self.group_ids.append(response.json()["id"])
+
+    async def drive_bills(self, http: httpx.AsyncClient):
+        interval = 1 / self.args.rate
+        deadline = time.perf_counter() + self.args.duration
+        pending = set()
+        n = 0
+        while time.perf_counter() < deadline:
+            group_id = self.group_ids[n % len(self.group_ids)]
+            token = self.tokens[n % len(self.tokens)]
+            pending.add(asyncio.create_task(self._post_bill(http, group_id, token, n)))
+            n += 1
+            await asyncio.sleep(interval)
+        await asyncio.gather(*pending)
+
+    async def _post_bill(self, http: httpx.AsyncClient, group_id: str, token: str, n: int):
+        description = f"fanout {self.run_id} {n}"
+        body = {
+            "group_id": group_id,
+            "description": description,
+            "total_amount": 100.0,
+            "split_type": "EQUAL",
+            "shares": [{"user_id": self.user_ids[0]}, {"user_id": self.user_ids[1]}],
+        }
+        self.sent[description] = time.perf_counter()
+        response = await http.post(
+            f"{API}/bills/", json=body, headers={"Authorization": f"Bearer {token}"}
+        )
+        if response.status_code >= 400:
+            self.post_errors += 1
+        else:
+            self.posted[group_id] = self.posted.get(group_id, 0) + 1
+
+    async def user_ids_from(self, http: httpx.AsyncClient):
+        detail = await http.get(
+            f"{API}/groups/{self.group_ids[0]}", headers={"Authorization": f"Bearer {self.tokens[0]}"}
+        )
+        detail.raise_for_status()
+        self.user_ids = [m["user"]["id"] for m in detail.json()["members"]]
+
+
+def _start_server(args) -> tuple[subprocess.Popen, str]:
+    env = {
+        **os.environ,
+        "RATE_LIMIT_ENABLED": "false",
+        "WS_MAX_CONNECTIONS_PER_USER": str(args.sockets),
+        "WS_MAX_CONNECTIONS_PER_WORKER": str(args.sockets + 1000),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    return server, f"http://127.0.0.1:{args.port}"
+
+
+async def _wait_until_up(http: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await http.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise SystemExit("Server did not come up")
+        await asyncio.sleep(0.25)
+
+
+def _mb(value: float) -> str:
+    return f"{value / 1024 / 1024:.1f} MiB"
+
+
+async def main(args) -> int:
+    server = None
+    if args.url:
+        base_url, pid = args.url.rstrip("/"), args.server_pid
+    else:
+        server, base_url = _start_server(args)
+        pid = server.pid
+    ws_url = "ws" + base_url[len("http"):]
+
+    harness = Harness(args)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as http:
+            await _wait_until_up(http)
+            await harness.provision(http)
+            await harness.user_ids_from(http)
+
+            rss_before = rss_bytes(pid) if pid else None
+            slow_every = round(1 / args.slow_fraction) if args.slow_fraction > 0 else 0
+            clients = [
+                SimClient(
+                    harness,
+                    harness.group_ids[i % args.groups],
+                    harness.tokens[i % len(harness.tokens)],
+                    args.slow_mode if slow_every and i % slow_every == slow_every - 1 else None,
+                )
+                for i in range(args.sockets)
+            ]
+            opening = asyncio.Semaphore(args.connect_concurrency)
+            started = time.perf_counter()
+            tasks = [asyncio.create_task(c.run(ws_url, opening)) for c in clients]
+            while sum(c.connected for c in clients) + harness.connect_errors < args.sockets:
+                if time.perf_counter() - started > args.connect_timeout:
+                    break
+                await asyncio.sleep(0.1)
+            connect_elapsed = time.perf_counter() - started
+            await asyncio.sleep(1)  # let the server finish joining groups
+            rss_after = rss_bytes(pid) if pid else None
+            connected = sum(c.connected for c in clients)
+
+            metrics_before = await scrape(http)
+            cpu_before = cpu_seconds(pid) if pid else None
+            await harness.drive_bills(http)
+            await asyncio.sleep(args.settle)
+            cpu_after = cpu_seconds(pid) if pid else None
+            metrics_after = await scrape(http)
+
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    fast = [c for c in clients if c.connected and not c.slow]
+    slow = [c for c in clients if c.connected and c.slow]
+    latencies = sorted(v for c in fast for v in c.latencies)
+    sockets_per_group = dict.fromkeys(harness.group_ids, 0)
+    for c in fast:
+        sockets_per_group[c.group_id] += 1
+    expected = sum(count * sockets_per_group[g] for g, count in harness.posted.items())
+    posted = sum(harness.posted.values())
+
+    def delta(name: str) -> float:
+        return metrics_after.get(name, 0.0) - metrics_before.get(name, 0.0)
+
+    fanout_count = delta("ws_broadcast_fanout_seconds_count")
+
+    print(f"\nsockets   {connected}/{args.sockets} connected in {connect_elapsed:.1f}s "
+          f"({harness.connect_errors} failed), {args.sockets // args.groups} per group, "
+          f"{len(slow)} slow ({args.slow_mode})")
+    if rss_before is not None and rss_after is not None and connected:
+        print(f"memory    {_mb(rss_after - rss_before)} for {connected} sockets, "
+              f"{(rss_after - rss_before) / connected / 1024:.1f} KiB per connection")
+    print(f"bills     {posted} posted, {harness.post_errors} failed")
+    print(f"delivery  {len(latencies)}/{expected} frames to fast clients")
+    if latencies:
+        print(
+            "latency   p50 {:.1f}ms  p95 {:.1f}ms  p99 {:.1f}ms  max {:.1f}ms".format(
+                *(percentile(latencies, p) * 1000 for p in (50, 95, 99)), latencies[-1] * 1000
+            )
+        )
+    if cpu_before is not None and cpu_after is not None and posted:
+        print(f"cpu       {(cpu_after - cpu_before) / posted * 1000:.2f}ms server CPU per bill "
+              "(HTTP request, commit and broadcast)")
+    if fanout_count:
+        print(f"fan-out   {delta('ws_broadcast_fanout_seconds_sum') / fanout_count * 1000:.3f}ms "
+              f"to queue one frame on every local socket ({fanout_count:.0f} broadcasts)")
+    evicted = sum(1 for c in slow if c.close_code == SLOW_CONSUMER_CLOSE_CODE)
+    if slow:
+        print(f"slow      {evicted}/{len(slow)} slow clients evicted; server reports "
+              f"{delta('ws_slow_consumer_evictions_total'):.0f} evictions, "
+              f"{delta('ws_send_failures_total'):.0f} send failures")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure websocket fan-out under load.")
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="pid of the --url server, for memory and CPU")
+    parser.add_argument("--port", type=int, default=8765, help="port for the server started here")
+    parser.add_argument("--sockets", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--users", type=int, default=10, help="users provisioned; sockets share their tokens")
+    parser.add_argument("--rate", type=float, default=10.0, help="bills created per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of bill creation")
+    parser.add_argument("--settle", type=float, default=3.0, help="seconds to wait for late frames")
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--connect-timeout", type=float, default=120.0)
+    parser.add_argument("--slow-fraction", type=float, default=0.0, help="share of sockets that are slow")
+    parser.add_argument("--slow-mode", choices=("stall", "drip"), default="stall")
+    parser.add_argument("--slow-delay", type=float, default=1.0, help="seconds between reads in drip mode")
+    args = parser.parse_args()
+    if args.users < 2:
+        parser.error("--users must be at least 2: bills are paid by one user and split with another")
+    if args.groups < 1 or args.sockets < 1:
+        parser.error("--groups and --sockets must be at least 1")
+    if not 0 <= args.slow_fraction <= 1:
+        parser.error("--slow-fraction must be between 0 and 1")
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,115 @@
+"""
+Print EXPLAIN (ANALYZE, BUFFERS) for the hot read queries against DATABASE_URL.
+
+Run it before and after `alembic upgrade head` on a realistically sized
+database and diff the output:
+
+    uv run python -m scripts.explain_hot_paths > before.txt
+    uv run alembic upgrade head
+    uv run python -m scripts.explain_hot_paths > after.txt
+
+The busiest user and group are picked automatically unless --user/--group
+are given. Every query is a read; nothing is written.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.db.session import engine
+
+# (label, SQL) mirroring what GroupService/BillService/SummaryService issue
+HOT_QUERIES = [
+    (
+        "user's active groups (GroupService.get_user_groups, membership cache)",
+        """
+        SELECT gm.group_id FROM "GroupMember" gm
+        JOIN "Group" g ON g.id = gm.group_id
+        WHERE gm.user_id = :user_id AND gm.deleted_at IS NULL AND g.deleted_at IS NULL
+        """,
+    ),
+    (
+        "membership check (GroupService.check_is_member)",
+        """
+        SELECT * FROM "GroupMember"
+        WHERE user_id = :user_id AND group_id = :group_id AND deleted_at IS NULL
+        """,
+    ),
+    (
+        "group members (dashboard document)",
+        """
+        SELECT * FROM "GroupMember"
+        WHERE group_id = :group_id AND deleted_at IS NULL
+        ORDER BY created_at
+        """,
+    ),
+    (
+        "group bills, newest first (BillService.get_group_bills)",
+        """
+        SELECT * FROM "Bill"
+        WHERE group_id = :group_id AND deleted_at IS NULL
+        ORDER BY created_at DESC LIMIT 20
+        """,
+    ),
+    (
+        "total owed (SummaryService.get_user_summary)",
+        """
+        SELECT sum(s.amount) FROM "BillShare" s JOIN "Bill" b ON b.id = s.bill_id
+        WHERE b.paid_by = :user_id AND b.deleted_at IS NULL
+          AND s.user_id != :user_id AND s.paid = false
+        """,
+    ),
+    (
+        "total owe (SummaryService.get_user_summary)",
+        """
+        SELECT sum(s.amount) FROM "BillShare" s JOIN "Bill" b ON b.id = s.bill_id
+        WHERE b.paid_by != :user_id AND b.deleted_at IS NULL
+          AND s.user_id = :user_id AND s.paid = false
+        """,
+    ),
+    (
+        "unpaid shares of a group (SummaryService.get_simplified_debts)",
+        """
+        SELECT s.user_id, s.amount, b.paid_by FROM "BillShare" s JOIN "Bill" b ON b.id = s.bill_id
+        WHERE b.group_id = :group_id AND b.deleted_at IS NULL AND s.paid = false
+        """,
+    ),
+]
+
+BUSIEST_GROUP = """
+    SELECT group_id FROM "Bill" WHERE deleted_at IS NULL
+    GROUP BY group_id ORDER BY count(*) DESC LIMIT 1
+"""
+BUSIEST_MEMBER = """
+    SELECT user_id FROM "GroupMember" WHERE group_id = :group_id AND deleted_at IS NULL
+    ORDER BY created_at LIMIT 1
+"""
+
+
+async def main(user_id: str | None, group_id: str | None):
+    async with engine.connect() as conn:
+        if group_id is None:
+            group_id = str((await conn.execute(text(BUSIEST_GROUP))).scalar_one())
+        if user_id is None:
+            user_id = str(
+                (await conn.execute(text(BUSIEST_MEMBER), {"group_id": group_id})).scalar_one()
+            )
+        print(f"-- user_id={user_id} group_id={group_id}\n")
+
+        params = {"user_id": user_id, "group_id": group_id}
+        for label, sql in HOT_QUERIES:
+            rows = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+            print(f"== {label}")
+            for (line,) in rows:
+                print(line)
+            print()
+        await conn.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user", help="user id to plan with (default: a member of the busiest group)")
+    parser.add_argument("--group", help="group id to plan with (default: the group with most bills)")
+    args = parser.parse_args()
+    asyncio.run(main(args.user, args.group))
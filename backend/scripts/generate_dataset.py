@@ -0,0 +1,314 @@
+"""
+Generate a large, reproducible synthetic dataset for performance work.
+
+    uv run python -m scripts.generate_dataset --users 50000 --groups 12000 \\
+        --bills 2000000 --seed 42 --truncate
+
+Rows are streamed into Postgres with COPY (asyncpg copy_records_to_table) in
+batches, so memory stays flat and a ~10M-share database loads in minutes.
+The same --seed always produces the same ids, amounts and timestamps.
+
+Shape of the data:
+  * group sizes are heavy-tailed (most 2-6 people, a few with 100+), and a
+    few users belong to many groups
+  * bill volume per group is skewed too, so some groups hold 10k+ bills
+  * EQUAL and EXACT splits with the same rules as BillService (the payer's
+    own share is stored as paid), some shares already marked paid
+  * settle-up bills as SummaryService.settle_up writes them
+  * soft deletes: bills, memberships (people who left) and whole groups
+
+Every user's password is "password", and user0@example.com is an ADMIN, so
+benchmarks can log in as anyone.
+"""
+import argparse
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import asyncpg
+from sqlalchemy.engine.url import make_url
+
+from app.core.config import settings
+from app.core.security import hash_password
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+logger = logging.getLogger(__name__)
+
+TABLES = ("BillShare", "Bill", "GroupMember", "Group", "User")
+
+USER_COLUMNS = ("id", "name", "email", "password", "role", "created_at")
+GROUP_COLUMNS = ("id", "name", "description", "created_by", "created_at", "deleted_at", "deleted_by")
+MEMBER_COLUMNS = (
+    "id", "user_id", "group_id", "role", "created_by", "created_at", "deleted_at", "deleted_by",
+)
+BILL_COLUMNS = (
+    "id", "group_id", "paid_by", "created_by", "description", "total_amount", "split_type",
+    "created_at", "deleted_at", "deleted_by",
+)
+SHARE_COLUMNS = ("id", "bill_id", "user_id", "amount", "paid", "created_by", "created_at", "updated_at")
+
+FIRST_NAMES = (
+    "Aarav", "Ananya", "Arjun", "Diya", "Ishaan", "Kavya", "Rohan", "Saanvi", "Vihaan", "Meera",
+    "Alice", "Bob", "Charlie", "David", "Eve", "Frank", "Grace", "Priya", "Rahul", "Neha",
+)
+LAST_NAMES = (
+    "Sharma", "Verma", "Iyer", "Nair", "Gupta", "Reddy", "Patel", "Khan", "Das", "Singh",
+    "Smith", "Jones", "Brown", "Mehta", "Joshi", "Rao", "Bose", "Kapoor", "Chopra", "Malhotra",
+)
+GROUP_NAMES = (
+    "Goa Trip", "Flatmates", "Office Lunch", "Weekend Trek", "Wedding", "Road Trip", "Book Club",
+    "Cricket Team", "Family", "Hostel", "Manali Trip", "Birthday Party", "Startup Team",
+)
+BILL_NAMES = (
+    "Dinner", "Groceries", "Cab", "Rent", "Electricity", "Movie", "Drinks", "Snacks", "Hotel",
+    "Fuel", "Flight Tickets", "Breakfast", "Internet", "Coffee", "Train Tickets", "Gift",
+)
+
+# Dataset "now", fixed so runs with the same seed are identical
+EPOCH = datetime(2026, 1, 1, tzinfo=UTC)
+HISTORY = timedelta(days=730)
+
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.user_ids: list[uuid.UUID] = []
+        self.user_names: list[str] = []
+        self.user_index: dict[uuid.UUID, int] = {}
+        self.user_weights: list[float] = []
+        # (group id, member user ids, deleted_at or None)
+        self.groups: list[tuple[uuid.UUID, list[uuid.UUID], datetime | None]] = []
+
+    def new_id(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def timestamp(self, after: datetime | None = None) -> datetime:
+        start = after or EPOCH - HISTORY
+        return start + (EPOCH - start) * self.rng.random()
+
+    # -------------------------
+    # USERS
+    # -------------------------
+    def users(self, password_hash: str):
+        for i in range(self.args.users):
+            user_id = self.new_id()
+            name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            self.user_index[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self.user_names.append(name)
+            # A few very social users end up in many groups
+            self.user_weights.append(self.rng.paretovariate(1.5))
+            role = "ADMIN" if i == 0 else "USER"
+            yield (user_id, name, f"user{i}@example.com", password_hash, role, self.timestamp())
+
+    # -------------------------
+    # GROUPS AND MEMBERS
+    # -------------------------
+    def group_size(self) -> int:
+        # Never more members than there are users to draw from
+        limit = min(self.args.max_group_size, len(self.user_ids))
+        return min(limit, 1 + math.ceil(self.rng.paretovariate(1.2)))
+
+    def groups_and_members(self):
+        cum_weights = _cumulative(self.user_weights)
+        group_rows, member_rows = [], []
+        for _ in range(self.args.groups):
+            group_id = self.new_id()
+            size = self.group_size()
+            members: list[uuid.UUID] = []
+            seen = set()
+            while len(members) < size:
+                user_id = self.rng.choices(self.user_ids, cum_weights=cum_weights)[0]
+                if user_id not in seen:
+                    seen.add(user_id)
+                    members.append(user_id)
+
+            creator = members[0]
+            created_at = self.timestamp()
+            deleted_at = self.timestamp(created_at) if self.rng.random() < self.args.group_delete_rate else None
+            group_rows.append((
+                group_id, f"{self.rng.choice(GROUP_NAMES)} {self.rng.randint(2019, 2026)}", None,
+                creator, created_at, deleted_at, creator if deleted_at else None,
+            ))
+            for position, user_id in enumerate(members):
+                joined = created_at if position == 0 else self.timestamp(created_at)
+                left = deleted_at
+                if left is None and position > 0 and self.rng.random() < self.args.leave_rate:
+                    left = self.timestamp(joined)
+                member_rows.append((
+                    self.new_id(), user_id, group_id, "ADMIN" if position == 0 else "MEMBER",
+                    creator, joined, left, (creator if deleted_at else user_id) if left else None,
+                ))
+            self.groups.append((group_id, members, deleted_at))
+        return group_rows, member_rows
+
+    # -------------------------
+    # BILLS AND SHARES
+    # -------------------------
+    def bill_batches(self):
+        """Yields (bill rows, share rows) of about --batch bills each."""
+        # Bigger groups are busier, and activity itself is heavy-tailed
+        cum_weights = _cumulative([len(members) * self.rng.lognormvariate(0, 1.5) for _, members, _ in self.groups])
+        remaining = self.args.bills
+        while remaining > 0:
+            count = min(self.args.batch, remaining)
+            remaining -= count
+            bills, shares = [], []
+            for group_id, members, group_deleted in self.rng.choices(self.groups, cum_weights=cum_weights, k=count):
+                if self.rng.random() < self.args.settle_rate and len(members) > 1:
+                    self._settle_up(group_id, members, group_deleted, bills, shares)
+                else:
+                    self._bill(group_id, members, group_deleted, bills, shares)
+            yield bills, shares
+
+    def _deleted(self, created_at: datetime, group_deleted: datetime | None, by: uuid.UUID):
+        if group_deleted is not None:
+            return group_deleted, by
+        if self.rng.random() < self.args.bill_delete_rate:
+            return self.timestamp(created_at), by
+        return None, None
+
+    def _bill(self, group_id, members, group_deleted, bills, shares):
+        rng = self.rng
+        bill_id = self.new_id()
+        payer = rng.choice(members)
+        created_at = self.timestamp()
+        total = round(rng.lognormvariate(6.5, 1.2), 2) or 1.0
+        participants = rng.sample(members, rng.randint(min(2, len(members)), len(members)))
+        if payer not in participants:
+            participants[0] = payer
+
+        if rng.random() < self.args.exact_rate:
+            split_type = "EXACT"
+            weights = [rng.random() + 0.1 for _ in participants]
+            scale = total / sum(weights)
+            amounts = [round(w * scale, 2) for w in weights]
+        else:
+            split_type = "EQUAL"
+            amounts = [round(total / len(participants), 2)] * len(participants)
+        # Rounding remainder goes to the first person, as BillService does
+        amounts[0] = round(amounts[0] + total - sum(amounts), 2)
+
+        deleted_at, deleted_by = self._deleted(created_at, group_deleted, payer)
+        bills.append((
+            bill_id, group_id, payer, payer, rng.choice(BILL_NAMES), total, split_type,
+            created_at, deleted_at, deleted_by,
+        ))
+        for user_id, amount in zip(participants, amounts, strict=True):
+            paid = user_id == payer or rng.random() < self.args.paid_rate
+            updated_at = self.timestamp(created_at) if paid and user_id != payer else None
+            shares.append((self.new_id(), bill_id, user_id, amount, paid, payer, created_at, updated_at))
+
+    def _settle_up(self, group_id, members, group_deleted, bills, shares):
+        # "Settle Up: A paid B": A is the payer, B holds one unpaid share
+        rng = self.rng
+        payer, receiver = rng.sample(members, 2)
+        bill_id = self.new_id()
+        created_at = self.timestamp()
+        amount = round(rng.lognormvariate(7, 1), 2) or 1.0
+        payer_name = self.user_names[self.user_index[payer]]
+        receiver_name = self.user_names[self.user_index[receiver]]
+        deleted_at, deleted_by = self._deleted(created_at, group_deleted, payer)
+        bills.append((
+            bill_id, group_id, payer, payer, f"Settle Up: {payer_name} paid {receiver_name}",
+            amount, "EXACT", created_at, deleted_at, deleted_by,
+        ))
+        shares.append((self.new_id(), bill_id, receiver, amount, False, payer, created_at, None))
+
+
+def _cumulative(weights: list[float]) -> list[float]:
+    total, out = 0.0, []
+    for weight in weights:
+        total += weight
+        out.append(total)
+    return out
+
+
+def _dsn() -> str:
+    url = make_url(settings.DATABASE_URL).set(drivername="postgresql", query={})
+    return url.render_as_string(hide_password=False)
+
+
+async def _copy(conn, table: str, columns, rows) -> int:
+    rows = list(rows)
+    if rows:
+        await conn.copy_records_to_table(table, records=rows, columns=columns)
+    return len(rows)
+
+
+async def main(args):
+    started = time.perf_counter()
+    conn = await asyncpg.connect(_dsn())
+    try:
+        existing = await conn.fetchval('SELECT count(*) FROM "User"')
+        if existing and not args.truncate:
+            raise SystemExit(f'"User" already has {existing} rows; pass --truncate to replace everything')
+        if args.truncate:
+            logger.info("Truncating %s", ", ".join(TABLES))
+            quoted = ", ".join(f'"{table}"' for table in TABLES)
+            await conn.execute(f"TRUNCATE {quoted} CASCADE")
+        if args.skip_fk_checks:
+            # Needs superuser; skips the per-row foreign key triggers during COPY
+            await conn.execute("SET session_replication_role = replica")
+
+        gen = Generator(args)
+        count = await _copy(conn, "User", USER_COLUMNS, gen.users(hash_password("password")))
+        logger.info("Users: %d", count)
+
+        group_rows, member_rows = gen.groups_and_members()
+        await _copy(conn, "Group", GROUP_COLUMNS, group_rows)
+        await _copy(conn, "GroupMember", MEMBER_COLUMNS, member_rows)
+        logger.info("Groups: %d, memberships: %d", len(group_rows), len(member_rows))
+
+        bills_total = shares_total = 0
+        for bills, shares in gen.bill_batches():
+            async with conn.transaction():
+                bills_total += await _copy(conn, "Bill", BILL_COLUMNS, bills)
+                shares_total += await _copy(conn, "BillShare", SHARE_COLUMNS, shares)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "Bills: %d, shares: %d (%.0f shares/s)", bills_total, shares_total, shares_total / elapsed
+            )
+
+        if args.skip_fk_checks:
+            await conn.execute("SET session_replication_role = DEFAULT")
+        logger.info("Analyzing")
+        for table in TABLES:
+            await conn.execute(f'ANALYZE "{table}"')
+    finally:
+        await conn.close()
+    logger.info("Done in %.1fs", time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load a synthetic dataset with COPY.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--groups", type=int, default=12_000)
+    parser.add_argument("--bills", type=int, default=2_000_000)
+    parser.add_argument("--max-group-size", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=50_000, help="bills per COPY batch")
+    parser.add_argument("--exact-rate", type=float, default=0.2, help="share of bills split EXACT")
+    parser.add_argument("--paid-rate", type=float, default=0.3, help="share of debts already marked paid")
+    parser.add_argument("--settle-rate", type=float, default=0.03, help="share of bills that are settle-ups")
+    parser.add_argument("--bill-delete-rate", type=float, default=0.02)
+    parser.add_argument("--leave-rate", type=float, default=0.03, help="memberships soft-deleted")
+    parser.add_argument("--group-delete-rate", type=float, default=0.01)
+    parser.add_argument("--truncate", action="store_true", help="empty all tables first")
+    parser.add_argument(
+        "--skip-fk-checks", action="store_true",
+        help="disable FK triggers while loading (superuser only; much faster)",
+    )
+    args = parser.parse_args()
+    if args.users < 2:
+        parser.error("--users must be at least 2 (every group has a creator and one other member)")
+    if args.max_group_size < 2:
+        parser.error("--max-group-size must be at least 2")
+    if args.groups < 0 or args.bills < 0 or args.batch < 1:
+        parser.error("--groups and --bills must not be negative, --batch must be positive")
+    asyncio.run(main(args))
@@ -150,8 +150,23 @@ export default function GroupDetailPage() {
     // Subscribe to group updates
     const unsubscribe = subscribe(id, (message) => {
       console.log("WebSocket message received:", message);
-      // Refresh the group details and summary
-      fetchGroupDetail();
+      // Bursts arrive as one BATCH frame
+      const events: any[] = message.type === "BATCH" ? message.events : [message];
+      // balances is null when the server could not tell what moved (RESYNC and
+      // membership events carry none either); only then is a refetch needed
+      if (events.every((e) => e.balances)) {
+        // Ledger events list every user whose balance moved; update in place
+        const myBalance = currentUser && events
+          .map((e) => e.balances[currentUser.id])
+          .filter(Boolean)
+          .pop();
+        if (myBalance) {
+          setGroupSummary({ total_owed: myBalance.owed, total_owe: myBalance.owe });
+        }
+      } else {
+        // Refresh the group details and summary
+        fetchGroupDetail();
+      }
       // Increase refresh trigger to notify BillList
       setRefreshTrigger(prev => prev + 1);
     });
@@ -159,7 +174,7 @@ export default function GroupDetailPage() {
     return () => {
       unsubscribe();
     };
-  }, [id, subscribe, fetchGroupDetail]);
+  }, [id, subscribe, fetchGroupDetail, currentUser]);
 
   const handleBillAdded = () => {
     setIsAddBillOpen(false);
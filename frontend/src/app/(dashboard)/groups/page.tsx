@@ -26,6 +26,7 @@ import { Modal } from "@/components/ui/modal";
 import { Input } from "@/components/ui/input";
 
 import { GroupsAPI, UsersAPI, SummaryAPI } from "@/lib/api";
+import { useWebSocket } from "@/components/providers/WebSocketProvider";
 
 type SortOption = "newest" | "oldest" | "name_asc" | "name_desc" | "owed" | "owe";
 
@@ -117,6 +118,10 @@ export default function GroupsPage() {
     fetchGroups();
   }, [fetchGroups]);
 
+  // Groups the user was added to (or removed from) elsewhere show up live
+  const { onMembershipChange } = useWebSocket();
+  React.useEffect(() => onMembershipChange(fetchGroups), [onMembershipChange, fetchGroups]);
+
 
   const resetModal = () => {
     setIsModalOpen(false);
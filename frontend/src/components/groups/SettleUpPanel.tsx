@@ -40,12 +40,21 @@ export function SettleUpPanel({ groupId, currentUserId }: SettleUpPanelProps) {
     // Real-time refresh on any bill or settle event
     useEffect(() => {
         const unsub = subscribe(groupId, (msg) => {
-            if (
-                msg.type === "NEW_BILL" ||
-                msg.type === "UPDATE_BILL" ||
-                msg.type === "SETTLE_UP" ||
-                msg.type === "PAYMENT_UPDATE"
-            ) {
+            const events: any[] = msg.type === "BATCH" ? msg.events : [msg];
+            const ledger = events.filter((e) =>
+                e.type === "NEW_BILL" ||
+                e.type === "UPDATE_BILL" ||
+                e.type === "SETTLE_UP" ||
+                e.type === "PAYMENT_UPDATE" ||
+                e.type === "RESYNC"
+            );
+            if (ledger.length === 0) return;
+
+            // Ledger events carry the new plan; only refetch when they don't
+            const latest = ledger[ledger.length - 1];
+            if (Array.isArray(latest.settlement_plan)) {
+                setDebts(latest.settlement_plan);
+            } else {
                 fetchDebts();
             }
         });
@@ -6,93 +6,202 @@ import { useToast } from '../ui/Toast';
 
 interface WebSocketContextType {
     subscribe: (groupId: string, callback: (message: any) => void) => () => void;
+    // Called when the user joins or leaves a group, and after a reconnect
+    onMembershipChange: (callback: () => void) => () => void;
 }
 
 const WebSocketContext = createContext<WebSocketContextType | undefined>(undefined);
 
 export function WebSocketProvider({ children }: { children: React.ReactNode }) {
     const { toast } = useToast();
-    const sockets = useRef<Map<string, WebSocket>>(new Map());
+    // One socket per user carries every group; frames name their group_id
+    const socketRef = useRef<WebSocket | null>(null);
     const subscribers = useRef<Map<string, Set<(message: any) => void>>>(new Map());
+    const membershipListeners = useRef<Set<() => void>>(new Set());
+    // Last seq seen per group (from events or HELLO), sent back on reconnect to replay only what was missed
+    const lastSeq = useRef<Map<string, number>>(new Map());
+    const reconnectTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+    const reconnectDelay = useRef(1000);
+    const reconnecting = useRef(false);
+
+    const showToast = useCallback((message: any) => {
+        // Show toast for certain events
+        if (message.type === 'NEW_BILL') {
+            toast(`${message.created_by_name} added a new bill: ${message.description}`, 'success');
+        } else if (message.type === 'SETTLE_UP') {
+            const names = message.settled_with || [];
+            let namesText = '';
+
+            if (names.length === 1) {
+                namesText = names[0];
+            } else if (names.length === 2) {
+                namesText = `${names[0]} and ${names[1]}`;
+            } else if (names.length > 2) {
+                namesText = `${names.slice(0, -1).join(', ')} and ${names[names.length - 1]}`;
+            } else {
+                namesText = 'everyone';
+            }
 
-    const subscribe = useCallback((groupId: string, callback: (message: any) => void) => {
-        if (!subscribers.current.has(groupId)) {
-            subscribers.current.set(groupId, new Set());
+            toast(`${message.user_name} settled with ${namesText}`, 'success');
         }
-        subscribers.current.get(groupId)!.add(callback);
+    }, [toast]);
 
-        if (!sockets.current.has(groupId)) {
-            const token = localStorage.getItem('token');
-            if (!token) return () => { };
-
-            const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-            // Extract domain and port from API_BASE_URL. 
-            // We assume the WS endpoint is at the root /ws/ regardless of API prefix.
-            const url = new URL(API_BASE_URL);
-            const wsUrl = `${protocol}//${url.host}/ws/${groupId}?token=${token}`;
-
-            const socket = new WebSocket(wsUrl);
-
-            socket.onmessage = (event) => {
-                const message = JSON.parse(event.data);
-
-                // Show toast for certain events
-                if (message.type === 'NEW_BILL') {
-                    toast(`${message.created_by_name} added a new bill: ${message.description}`, 'success');
-                } else if (message.type === 'UPDATE_BILL') {
-                    toast(`Bill updated: ${message.description}`, 'info');
-                } else if (message.type === 'SETTLE_UP') {
-                    const names = message.settled_with || [];
-                    let namesText = '';
-
-                    if (names.length === 1) {
-                        namesText = names[0];
-                    } else if (names.length === 2) {
-                        namesText = `${names[0]} and ${names[1]}`;
-                    } else if (names.length > 2) {
-                        namesText = `${names.slice(0, -1).join(', ')} and ${names[names.length - 1]}`;
-                    } else {
-                        namesText = 'everyone';
-                    }
+    const handleMessage = useCallback((event: MessageEvent) => {
+        const message = JSON.parse(event.data);
 
-                    toast(`${message.user_name} settled with ${namesText}`, 'success');
-                }
+        if (message.type === 'PING') {
+            // Server heartbeat; sockets that stay silent are closed as dead
+            socketRef.current?.send(JSON.stringify({ type: 'PONG', ts: message.ts }));
+            return;
+        }
 
-                // Notify all subscribers for this group
-                subscribers.current.get(groupId)?.forEach((cb) => cb(message));
-            };
+        if (message.type === 'HELLO') {
+            // Current seq of every group, sent on connect and when our groups change.
+            // Seqs already known are kept: RESUME replays from those.
+            Object.entries(message.seqs || {}).forEach(([groupId, seq]) => {
+                if (!lastSeq.current.has(groupId)) lastSeq.current.set(groupId, seq as number);
+            });
+            return;
+        }
 
-            socket.onclose = () => {
-                console.log(`WS Connection closed for group ${groupId}`);
-                sockets.current.delete(groupId);
-                // We could implement auto-reconnect here if needed
-            };
+        if (message.type === 'MEMBERSHIP_CHANGED') {
+            // Sent right after the HELLO naming the user's current groups
+            membershipListeners.current.forEach((cb) => cb());
+            return;
+        }
 
-            socket.onerror = (err) => {
-                // WebSocket errors are often generic. Only log if the socket isn't purposefully closing.
-                if (socket.readyState !== WebSocket.CLOSED && socket.readyState !== WebSocket.CLOSING) {
-                    console.warn(`WebSocket transient error for group ${groupId}. This is normal during hot-reloads or network switches.`);
-                }
-            };
+        if (typeof message.seq === 'number' && message.group_id) {
+            const seen = lastSeq.current.get(message.group_id);
+            // Replayed and live events can overlap after a reconnect
+            if (message.type !== 'RESYNC' && seen !== undefined && message.seq <= seen) return;
+            lastSeq.current.set(message.group_id, message.seq);
+        }
+
+        const groupSubscribers = subscribers.current.get(message.group_id);
+        // Only surface events for groups something on screen is listening to
+        if (!groupSubscribers) return;
+
+        // Bursts arrive as one BATCH frame; subscribers get the frame once
+        const events: any[] = message.type === 'BATCH' ? message.events : [message];
+        const updates = events.filter((e) => e.type === 'UPDATE_BILL');
+        if (updates.length > 1) {
+            toast(`${updates.length} bills updated`, 'info');
+        } else if (updates.length === 1) {
+            toast(`Bill updated: ${updates[0].description}`, 'info');
+        }
+        events.forEach((e) => showToast(e));
+
+        // Notify all subscribers for this group
+        groupSubscribers.forEach((cb) => cb(message));
+    }, [toast, showToast]);
+
+    const hasListeners = () => subscribers.current.size > 0 || membershipListeners.current.size > 0;
+
+    const releaseSocket = useCallback(() => {
+        // Close the socket once nothing on screen listens to it
+        if (hasListeners()) return;
+        if (reconnectTimer.current) {
+            clearTimeout(reconnectTimer.current);
+            reconnectTimer.current = null;
+        }
+        const socket = socketRef.current;
+        socketRef.current = null;
+        socket?.close();
+        lastSeq.current.clear();
+        reconnecting.current = false;
+    }, []);
+
+    const ensureSocket = useCallback(function ensureSocket() {
+        if (socketRef.current || reconnectTimer.current) return;
+
+        const token = localStorage.getItem('token');
+        if (!token) return;
+
+        const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        // Extract domain and port from API_BASE_URL.
+        // We assume the WS endpoint is at the root /ws regardless of API prefix.
+        const url = new URL(API_BASE_URL);
+        const socket = new WebSocket(`${protocol}//${url.host}/ws?token=${token}`);
+
+        socket.onopen = () => {
+            reconnectDelay.current = 1000;
+            // Every group the last HELLO named is resumed, not only those that sent events
+            if (lastSeq.current.size > 0) {
+                socket.send(JSON.stringify({ type: 'RESUME', seqs: Object.fromEntries(lastSeq.current) }));
+            }
+            if (reconnecting.current) {
+                // Groups on screen with no known seq cannot be resumed; have them refetch
+                subscribers.current.forEach((callbacks, groupId) => {
+                    if (!lastSeq.current.has(groupId)) {
+                        callbacks.forEach((cb) => cb({ type: 'RESYNC', group_id: groupId }));
+                    }
+                });
+                // Memberships may have changed while we were away
+                membershipListeners.current.forEach((cb) => cb());
+            }
+            reconnecting.current = false;
+        };
+
+        socket.onmessage = handleMessage;
+
+        socket.onclose = (event) => {
+            console.log('WS Connection closed');
+            if (socketRef.current !== socket) return;
+            socketRef.current = null;
+            // 1008: rejected (bad token or too many connections); retrying will not help
+            if (!hasListeners() || event.code === 1008) return;
+
+            // Reconnect with jittered backoff and resume from the last seen seqs
+            const delay = reconnectDelay.current * (0.5 + Math.random());
+            reconnectDelay.current = Math.min(reconnectDelay.current * 2, 30000);
+            reconnecting.current = true;
+            reconnectTimer.current = setTimeout(() => {
+                reconnectTimer.current = null;
+                ensureSocket();
+            }, delay);
+        };
+
+        socket.onerror = () => {
+            // WebSocket errors are often generic. Only log if the socket isn't purposefully closing.
+            if (socket.readyState !== WebSocket.CLOSED && socket.readyState !== WebSocket.CLOSING) {
+                console.warn('WebSocket transient error. This is normal during hot-reloads or network switches.');
+            }
+        };
+
+        socketRef.current = socket;
+    }, [handleMessage]);
 
-            sockets.current.set(groupId, socket);
+    const subscribe = useCallback((groupId: string, callback: (message: any) => void) => {
+        if (!subscribers.current.has(groupId)) {
+            subscribers.current.set(groupId, new Set());
         }
+        subscribers.current.get(groupId)!.add(callback);
+        ensureSocket();
 
         return () => {
             const groupSubscribers = subscribers.current.get(groupId);
             if (groupSubscribers) {
                 groupSubscribers.delete(callback);
                 if (groupSubscribers.size === 0) {
-                    sockets.current.get(groupId)?.close();
-                    sockets.current.delete(groupId);
                     subscribers.current.delete(groupId);
                 }
             }
+            releaseSocket();
         };
-    }, [toast]);
+    }, [ensureSocket, releaseSocket]);
+
+    const onMembershipChange = useCallback((callback: () => void) => {
+        membershipListeners.current.add(callback);
+        ensureSocket();
+
+        return () => {
+            membershipListeners.current.delete(callback);
+            releaseSocket();
+        };
+    }, [ensureSocket, releaseSocket]);
 
     return (
-        <WebSocketContext.Provider value={{ subscribe }}>
+        <WebSocketContext.Provider value={{ subscribe, onMembershipChange }}>
             {children}
         </WebSocketContext.Provider>
     );